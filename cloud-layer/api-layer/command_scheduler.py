@@ -0,0 +1,187 @@
+"""
+Command Scheduler
+Coalesces bursts of relay/control commands per device before they reach
+the broker or relay, and rate limits relay transitions
+"""
+
+import threading
+import time
+
+
+class _Slot:
+    """Scheduling state for one (device, command group) pair"""
+
+    __slots__ = ('desired', 'pending', 'sent', 'sent_at', 'timer', 'failures')
+
+    def __init__(self):
+        self.desired = None   # Latest requested command (last writer wins)
+        self.pending = None   # Command waiting for the next flush
+        self.sent = None      # Last command actually sent
+        self.sent_at = None   # Monotonic time of the last send
+        self.timer = None     # Pending flush timer (kept while a send is in flight)
+        self.failures = 0     # Consecutive failed sends
+
+
+class CommandScheduler:
+    """
+    Per-device command scheduler
+
+    Commands for the same device arriving within the coalescing window
+    collapse into one (last writer wins). State commands (e.g. relay
+    ON/OFF) share a group, are never re-sent when the device is already
+    in that state, and are spaced at least min_interval seconds apart.
+    A failed send is retried with exponential backoff unless a newer
+    command replaces it first.
+    """
+
+    def __init__(self, send, coalesce_window=0.25, min_interval=2.0, state_commands=None,
+                 max_backoff=30.0):
+        """
+        Args:
+            send: Callable(device_id, command) that actually delivers a command
+            coalesce_window: Seconds to wait for further commands before sending
+            min_interval: Minimum seconds between two state transitions
+            state_commands: Dict mapping state commands to their group name,
+                e.g. {'RELAY_ON': 'relay', 'RELAY_OFF': 'relay'}
+            max_backoff: Longest wait in seconds before retrying a failed send
+        """
+        self.send = send
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.state_commands = state_commands or {}
+        self.max_backoff = max_backoff
+
+        self._slots = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {
+            'submitted': 0,
+            'sent': 0,
+            'coalesced': 0,
+            'suppressed': 0,
+            'failed': 0,
+            'retried': 0
+        }
+
+    def submit(self, device_id, command):
+        """
+        Queue a command for a device
+
+        Returns:
+            Dict with the device's desired and applied command and the delay
+            until the next flush
+        """
+        group = self.state_commands.get(command, command)
+        key = (device_id, group)
+        now = time.monotonic()
+
+        with self._lock:
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = _Slot()
+
+            self.stats['submitted'] += 1
+            if slot.pending is not None:
+                self.stats['coalesced'] += 1
+
+            slot.desired = command
+            slot.pending = command
+
+            delay = 0.0
+            if slot.timer is None:
+                delay = self._next_delay(slot, command, now)
+                self._arm(key, slot, delay)
+
+            return {
+                'device_id': device_id,
+                'desired': slot.desired,
+                'applied': slot.sent,
+                'scheduled_in': round(delay, 3)
+            }
+
+    def _next_delay(self, slot, command, now):
+        """Seconds to wait before flushing a freshly queued command"""
+        delay = self.coalesce_window
+        if command in self.state_commands and slot.sent_at is not None:
+            delay = max(delay, slot.sent_at + self.min_interval - now)
+        return delay
+
+    def _arm(self, key, slot, delay):
+        """Start the flush timer for a slot (caller holds the lock)"""
+        if self._closed:
+            slot.timer = None
+            return
+        slot.timer = threading.Timer(delay, self._flush, (key,))
+        slot.timer.daemon = True
+        slot.timer.start()
+
+    def _flush(self, key):
+        """Send the pending command for a slot (runs on the timer thread)"""
+        device_id, _ = key
+
+        with self._lock:
+            slot = self._slots[key]
+            command, slot.pending = slot.pending, None
+            if command is None:
+                slot.timer = None
+                return
+
+            if command in self.state_commands and command == slot.sent:
+                self.stats['suppressed'] += 1
+                slot.timer = None
+                return
+            # slot.timer stays set until the send finishes, so submit()
+            # queues behind this flush instead of starting a second one
+
+        try:
+            self.send(device_id, command)
+        except Exception as e:
+            with self._lock:
+                self.stats['failed'] += 1
+                slot.failures += 1
+                # A command submitted meanwhile supersedes the failed one
+                if slot.pending is None:
+                    slot.pending = command
+                    self.stats['retried'] += 1
+                delay = min(self.coalesce_window * 2 ** slot.failures, self.max_backoff)
+                self._arm(key, slot, delay)
+            print(f"✗ Failed to send {command} to {device_id}, retrying in {delay:.2f}s: {e}")
+            return
+
+        with self._lock:
+            self.stats['sent'] += 1
+            slot.sent = command
+            slot.sent_at = time.monotonic()
+            slot.failures = 0
+            if slot.pending is not None:
+                self._arm(key, slot, self._next_delay(slot, slot.pending, slot.sent_at))
+            else:
+                slot.timer = None
+
+    def get_state(self, device_id, group):
+        """
+        Get desired and applied command for a device's command group
+
+        Returns:
+            Dict with 'desired' and 'applied' (None if never set)
+        """
+        with self._lock:
+            slot = self._slots.get((device_id, group))
+            if slot is None:
+                return {'desired': None, 'applied': None}
+            return {'desired': slot.desired, 'applied': slot.sent}
+
+    def pending_count(self):
+        """Number of commands waiting to be flushed"""
+        with self._lock:
+            return sum(1 for slot in self._slots.values() if slot.pending is not None)
+
+    def close(self):
+        """Cancel all pending flushes and retries"""
+        with self._lock:
+            self._closed = True
+            for slot in self._slots.values():
+                if slot.timer is not None:
+                    slot.timer.cancel()
+                    slot.timer = None
+                slot.pending = None
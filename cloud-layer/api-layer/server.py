@@ -3,17 +3,28 @@ Hybrid Edge-Cloud System - API Server
 Provides REST API and serves dashboard with manual relay control
 """
 
-from flask import Flask, jsonify, render_template_string, request
+from flask import Flask, abort, g, jsonify, request
 from flask_cors import CORS
+import gzip
 import os
 import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from storage.storage_manager import StorageManager
+from storage.timeseries import METHODS as DOWNSAMPLE_METHODS, downsample
 from cloud_intelligence.risk_classifier import RiskClassifier
 from cloud_intelligence.decision_engine import DecisionEngine
+from cloud_intelligence.trend_tracker import TrendTracker
+from static_assets import Asset, AssetCache, accepts_encoding
+from command_scheduler import CommandScheduler
+from monitoring.metrics import CONTENT_TYPE, REGISTRY, SIZE_BUCKETS
 
 app = Flask(__name__)
 CORS(app)
@@ -28,11 +39,110 @@ storage = StorageManager(storage_dir=storage_dir)
 classifier = RiskClassifier()
 decision_engine = DecisionEngine()
 
+# ================== RESPONSE CACHING ==================
+DASHBOARD_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'dashboard'
+)
+
+STATIC_MAX_AGE = 31536000      # Fingerprinted assets never change (1 year)
+JSON_COMPRESS_MIN_SIZE = 1024  # Bytes; smaller JSON bodies are sent as-is
+JSON_GZIP_LEVEL = 5            # Speed over ratio for per-request compression
+
+# ================== TIME SERIES ==================
+TIMESERIES_FIELDS = ('risk_score', 'motion_count')
+TIMESERIES_DEFAULT_POINTS = 500
+TIMESERIES_MAX_POINTS = 5000
+TIMESERIES_DEFAULT_RANGE = timedelta(hours=24)
+
+# ================== TRENDS ==================
+# Per-device trends fed incrementally from rows appended to events.csv
+trend_tracker = TrendTracker()
+trend_feed = {"offset": 0}
+trend_lock = threading.Lock()
+
+def refresh_trends():
+    """Feed events logged since the last call into the trend tracker"""
+    with trend_lock:
+        new_events, trend_feed["offset"] = storage.tail_events(trend_feed["offset"])
+        for event in new_events:
+            try:
+                score = float(event.get("risk_score") or 0)
+            except ValueError:
+                continue
+            trend_tracker.update(event.get("device_id") or "UNKNOWN", score, event.get("timestamp"))
+
+def parse_time_arg(value, default):
+    """
+    Parse an ISO-8601 or epoch-seconds query argument as naive local time
+
+    Raises:
+        ValueError: Unparsable or out-of-range value (reported as 400)
+    """
+    if not value:
+        return default
+    try:
+        return datetime.fromtimestamp(float(value))
+    except (OverflowError, OSError):
+        raise ValueError(f"time out of range: {value}")
+    except ValueError:
+        pass
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        # Stored timestamps are naive local time
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+def check_time_range(start, end):
+    """
+    Check that both bounds of a time range have an epoch time
+
+    Raises:
+        ValueError: A bound outside the platform's epoch range (e.g. year 1
+            in some time zones) or start after end
+    """
+    for bound in (start, end):
+        try:
+            bound.timestamp()
+        except (ValueError, OverflowError, OSError):
+            raise ValueError(f"time out of range: {bound.isoformat()}")
+    if start > end:
+        raise ValueError("from is after to")
+
+# ================== METRICS ==================
+API_LATENCY = REGISTRY.histogram(
+    'api_request_seconds', 'API handler latency', ['endpoint']
+)
+API_RESPONSE_BYTES = REGISTRY.histogram(
+    'api_response_bytes', 'API response body size (after compression)', ['endpoint'],
+    buckets=SIZE_BUCKETS
+)
+API_REQUESTS = REGISTRY.counter(
+    'api_requests_total', 'API requests served', ['endpoint', 'status']
+)
+QUEUE_DEPTH = REGISTRY.gauge('queue_depth', 'Items waiting in internal queues', ['queue'])
+
 # ================== RELAY STATE ==================
 relay_state = {
     "status": "OFF"
 }
 
+RELAY_DEVICE_ID = "relay"
+RELAY_COALESCE_WINDOW = 0.25  # Seconds to collapse rapid toggles into one
+RELAY_MIN_INTERVAL = 2.0      # Minimum seconds between relay transitions
+
+def apply_relay_command(device_id, command):
+    """Apply a coalesced relay command"""
+    relay_state["status"] = command
+
+relay_scheduler = CommandScheduler(
+    apply_relay_command,
+    coalesce_window=RELAY_COALESCE_WINDOW,
+    min_interval=RELAY_MIN_INTERVAL,
+    state_commands={"ON": "relay", "OFF": "relay"}
+)
+QUEUE_DEPTH.labels('relay_commands').set_function(relay_scheduler.pending_count)
+
 # ================== DASHBOARD HTML ==================
 DASHBOARD_HTML = """
 <!DOCTYPE html>
@@ -223,39 +333,166 @@ setInterval(updateDashboard, 5000);
 </html>
 """
 
+# Compile and render the template once, then keep compressed copies in memory
+DASHBOARD_PAGE = Asset(
+    app.jinja_env.from_string(DASHBOARD_HTML).render().encode('utf-8'),
+    'text/html; charset=utf-8'
+)
+static_assets = AssetCache(DASHBOARD_DIR, url_prefix='/dashboard/')
+
+def asset_response(asset, immutable=False):
+    """Serve a cached asset with validators and the best accepted encoding"""
+    if asset.etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        body, encoding = asset.select(request.headers.get('Accept-Encoding', ''))
+        response = app.response_class(body, content_type=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(asset.etag)
+    response.vary.add('Accept-Encoding')
+    if immutable:
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+# Registered before compress_json so it runs last and sees the final body size
+@app.after_request
+def record_metrics(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        endpoint = request.endpoint or 'unknown'
+        API_LATENCY.labels(endpoint).observe(time.perf_counter() - start)
+        API_RESPONSE_BYTES.labels(endpoint).observe(response.content_length or 0)
+        API_REQUESTS.labels(endpoint, response.status_code).inc()
+    return response
+
+@app.after_request
+def compress_json(response):
+    """Gzip JSON responses above the size threshold"""
+    if (response.mimetype != 'application/json'
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.content_length is None
+            or response.content_length < JSON_COMPRESS_MIN_SIZE):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    if not accepts_encoding(request.headers.get('Accept-Encoding', ''), 'gzip'):
+        return response
+
+    response.set_data(gzip.compress(response.get_data(), compresslevel=JSON_GZIP_LEVEL))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
 # ================== ROUTES ==================
 @app.route("/")
 def dashboard():
-    return render_template_string(DASHBOARD_HTML)
+    return asset_response(DASHBOARD_PAGE)
+
+@app.route("/dashboard/")
+@app.route("/dashboard/<path:filename>")
+def dashboard_assets(filename='index.html'):
+    asset, immutable = static_assets.get(filename)
+    if asset is None:
+        abort(404)
+    return asset_response(asset, immutable)
 
 @app.route("/api/relay", methods=["GET", "POST"])
 def relay_control():
-    global relay_state
+    desired = relay_scheduler.get_state(RELAY_DEVICE_ID, "relay")["desired"]
 
     if request.method == "POST":
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         cmd = data.get("command")
 
-        if cmd == "ON":
-            relay_state["status"] = "ON"
-        elif cmd == "OFF":
-            relay_state["status"] = "OFF"
+        if cmd in ("ON", "OFF"):
+            result = relay_scheduler.submit(RELAY_DEVICE_ID, cmd)
+        else:
+            result = {**relay_scheduler.get_state(RELAY_DEVICE_ID, "relay"), "scheduled_in": None}
 
+        # The scheduler sends later; report what was queued, not what is on
+        applied = result["applied"] or relay_state["status"]
+        desired = result["desired"] or applied
         return jsonify({
-            "relay_status": relay_state["status"],
-            "message": f"Relay turned {relay_state['status']}"
+            "relay_status": desired,
+            "applied_status": applied,
+            "scheduled_in": result["scheduled_in"],
+            "message": f"Relay {desired} scheduled (currently {applied})"
         })
 
-    return jsonify(relay_state)
+    return jsonify({**relay_state, "desired": desired or relay_state["status"]})
 
 @app.route("/api/events")
 def events():
     return jsonify({"events": storage.get_recent_events(20)})
 
+@app.route("/api/timeseries")
+def timeseries():
+    device_id = request.args.get("device_id") or None
+    method = request.args.get("method", "lttb")
+
+    try:
+        end = parse_time_arg(request.args.get("to"), datetime.now())
+        start = parse_time_arg(request.args.get("from"), end - TIMESERIES_DEFAULT_RANGE)
+        points = int(request.args.get("points", TIMESERIES_DEFAULT_POINTS))
+        check_time_range(start, end)
+    except (ValueError, OverflowError, OSError) as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
+
+    if method not in DOWNSAMPLE_METHODS:
+        return jsonify({"error": f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}"}), 400
+    points = max(3, min(points, TIMESERIES_MAX_POINTS))
+
+    timestamps, values = storage.get_series(device_id, start, end, TIMESERIES_FIELDS)
+    x = np.asarray(timestamps, dtype=np.float64)
+    order = np.argsort(x, kind="stable")
+    x = x[order]
+
+    series = {}
+    for field in TIMESERIES_FIELDS:
+        sx, sy = downsample(x, np.asarray(values[field], dtype=np.float64)[order], points, method)
+        series[field] = {
+            "timestamps": [datetime.fromtimestamp(t).isoformat() for t in sx.tolist()],
+            "values": sy.tolist()
+        }
+
+    return jsonify({
+        "device_id": device_id,
+        "from": start.isoformat(),
+        "to": end.isoformat(),
+        "method": method,
+        "points": points,
+        "raw_count": int(len(x)),
+        "series": series
+    })
+
+@app.route("/api/trend")
+def trend():
+    device_id = request.args.get("device_id")
+    if not device_id:
+        return jsonify({"error": "device_id is required"}), 400
+
+    refresh_trends()
+    state = trend_tracker.get(device_id)
+    if state is None:
+        return jsonify({"error": f"No events for device {device_id}"}), 404
+    return jsonify({"device_id": device_id, **state})
+
 @app.route("/api/stats")
 def stats():
     return jsonify(storage.get_statistics())
 
+@app.route("/metrics")
+def metrics():
+    return app.response_class(REGISTRY.render(), content_type=CONTENT_TYPE)
+
 @app.route("/api/health")
 def health():
     return jsonify({"status": "OK"})
@@ -0,0 +1,169 @@
+"""
+Static Asset Cache
+Loads dashboard assets once, fingerprints them by content hash and keeps
+precompressed (gzip/brotli) copies in memory so requests never touch disk
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
+# Assets worth compressing (images like PNG are already compressed)
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+# Extensions served from the dashboard folder
+SERVED_EXTENSIONS = ('.html', '.css', '.js', '.svg', '.png', '.ico')
+
+
+def accepts_encoding(accept_encoding, encoding):
+    """
+    Check whether an Accept-Encoding header allows an encoding
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+        encoding: Encoding name such as 'gzip' or 'br'
+
+    Returns:
+        True if the encoding is listed without q=0
+    """
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.strip().partition(';')
+        if name.strip() not in (encoding, '*'):
+            continue
+        params = params.replace(' ', '')
+        if params.startswith('q='):
+            try:
+                return float(params[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def precompress(body, gzip_level=9):
+    """
+    Build compressed variants of a payload
+
+    Only variants that are actually smaller than the original are kept.
+
+    Returns:
+        Dict mapping encoding name to compressed bytes
+    """
+    variants = {'gzip': gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    return {name: data for name, data in variants.items() if len(data) < len(body)}
+
+
+class Asset:
+    """A single in-memory asset with its precompressed variants"""
+
+    def __init__(self, body, mimetype):
+        self.body = body
+        self.mimetype = mimetype
+        self.digest = hashlib.sha256(body).hexdigest()
+        self.etag = self.digest[:16]
+        self.encodings = {}
+        if mimetype.startswith(COMPRESSIBLE_TYPES):
+            self.encodings = precompress(body)
+
+    def select(self, accept_encoding):
+        """
+        Pick the best variant the client accepts
+
+        Returns:
+            (body, encoding) where encoding is None for the identity body
+        """
+        for encoding in ('br', 'gzip'):
+            if encoding in self.encodings and accepts_encoding(accept_encoding, encoding):
+                return self.encodings[encoding], encoding
+        return self.body, None
+
+
+class AssetCache:
+    """Content-hashed, precompressed copy of a static asset folder"""
+
+    def __init__(self, asset_dir, url_prefix='/static/'):
+        """
+        Load every servable asset from a folder
+
+        Args:
+            asset_dir: Folder holding the static files
+            url_prefix: URL prefix the assets are mounted under
+        """
+        self.asset_dir = asset_dir
+        self.url_prefix = url_prefix
+        self.assets = {}        # served name -> Asset
+        self.hashed_names = {}  # original name -> fingerprinted name
+        self.pages = set()      # HTML pages, served under their own name
+
+        if os.path.isdir(asset_dir):
+            self._load()
+
+    def _load(self):
+        """Fingerprint plain assets first so HTML pages can reference them"""
+        names = [
+            name for name in sorted(os.listdir(self.asset_dir))
+            if name.endswith(SERVED_EXTENSIONS)
+            and os.path.isfile(os.path.join(self.asset_dir, name))
+        ]
+
+        for name in names:
+            if name.endswith('.html'):
+                continue
+            asset = Asset(self._read(name), self._guess_type(name))
+            stem, ext = os.path.splitext(name)
+            hashed = f"{stem}.{asset.digest[:10]}{ext}"
+            self.assets[hashed] = asset
+            self.hashed_names[name] = hashed
+
+        for name in names:
+            if not name.endswith('.html'):
+                continue
+            html = self._rewrite_references(self._read(name).decode('utf-8'))
+            self.assets[name] = Asset(html.encode('utf-8'), self._guess_type(name))
+            self.pages.add(name)
+
+    def _read(self, name):
+        with open(os.path.join(self.asset_dir, name), 'rb') as f:
+            return f.read()
+
+    @staticmethod
+    def _guess_type(name):
+        mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+        if mimetype.startswith('text/') or mimetype == 'application/javascript':
+            mimetype += '; charset=utf-8'
+        return mimetype
+
+    def _rewrite_references(self, html):
+        """Point src/href attributes at the fingerprinted asset URLs"""
+        def replace(match):
+            attr, quote, target = match.groups()
+            if target in self.hashed_names:
+                target = self.url_for(target)
+            return f'{attr}={quote}{target}{quote}'
+
+        return re.sub(r'\b(src|href)=(["\'])([^"\']+)\2', replace, html)
+
+    def url_for(self, name):
+        """Public URL of an asset (fingerprinted where possible)"""
+        return self.url_prefix + self.hashed_names.get(name, name)
+
+    def get(self, name):
+        """
+        Look up an asset by served name
+
+        Returns:
+            (asset, immutable) or (None, False) if unknown
+        """
+        asset = self.assets.get(name)
+        if asset is None:
+            return None, False
+        return asset, name not in self.pages
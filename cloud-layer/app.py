@@ -3,8 +3,14 @@ from flask_cors import CORS
 import paho.mqtt.client as mqtt
 import paho.mqtt.publish as publish
 import json
+import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'api-layer'))
+
+from command_scheduler import CommandScheduler
+
 app = Flask(__name__)
 CORS(app)
 
@@ -14,6 +20,10 @@ MQTT_PORT = 1883
 CONTROL_TOPIC = "hackathon/relay/control"
 DATA_TOPIC = "hackathon/device/data"
 
+DEFAULT_DEVICE_ID = "ESP32_01"
+COMMAND_COALESCE_WINDOW = 0.25  # Seconds to collapse rapid clicks into one
+RELAY_MIN_INTERVAL = 2.0        # Minimum seconds between relay transitions
+
 latest = {"risk_score": 0, "motion_count": 0}
 events = []
 
@@ -44,12 +54,24 @@ mqtt_client.on_message = on_message
 mqtt_client.connect(MQTT_BROKER, MQTT_PORT, 60)
 mqtt_client.loop_start()
 
+# ---------- COMMANDS ----------
+def send_command(device_id, cmd):
+    publish.single(CONTROL_TOPIC, cmd, hostname=MQTT_BROKER, port=MQTT_PORT)
+
+command_scheduler = CommandScheduler(
+    send_command,
+    coalesce_window=COMMAND_COALESCE_WINDOW,
+    min_interval=RELAY_MIN_INTERVAL,
+    state_commands={"RELAY_ON": "relay", "RELAY_OFF": "relay"}
+)
+
 # ---------- API ----------
 @app.route("/api/command", methods=["POST"])
 def command():
     cmd = request.json["command"]
-    publish.single(CONTROL_TOPIC, cmd, hostname=MQTT_BROKER, port=MQTT_PORT)
-    return jsonify({"status": "ok"})
+    device_id = request.json.get("device_id", DEFAULT_DEVICE_ID)
+    result = command_scheduler.submit(device_id, cmd)
+    return jsonify({"status": "ok", "desired": result["desired"]})
 
 @app.route("/api/stats")
 def stats():
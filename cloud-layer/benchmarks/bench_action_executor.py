@@ -0,0 +1,102 @@
+"""
+Action Executor Benchmark
+Time spent on the ingestion path per decision when one notification
+channel hangs and another fails, using local stub channels, and what
+each channel received once the queues drain. Relay commands go through
+the subscriber's per-device CommandScheduler; the relay publishes that
+reach the broker are counted too.
+
+Usage:
+    python bench_action_executor.py
+    python bench_action_executor.py --decisions 20000 --slow-delay 2.0
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+CLOUD_LAYER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CLOUD_LAYER)
+sys.path.insert(0, os.path.join(CLOUD_LAYER, 'api-layer'))
+
+from cloud_intelligence.action_executor import ActionExecutor, StubChannel
+from cloud_intelligence.decision_engine import DecisionEngine
+from command_scheduler import CommandScheduler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--decisions', type=int, default=5000, help='Decisions submitted')
+    parser.add_argument('--devices', type=int, default=200, help='Number of devices')
+    parser.add_argument('--slow-delay', type=float, default=1.0, help='Seconds the hanging email channel takes')
+    parser.add_argument('--batch-interval', type=float, default=0.5, help='Email / SMS batch interval')
+    args = parser.parse_args()
+
+    channels = [
+        StubChannel('email', delay=args.slow_delay, batch_interval=args.batch_interval,
+                    max_batch=1000, timeout=args.slow_delay / 2, retries=1, backoff=0.1),
+        StubChannel('sms', fail_first=2, batch_interval=args.batch_interval, backoff=0.05),
+        StubChannel('dashboard'),
+        StubChannel('security'),
+        StubChannel('recorder'),
+        StubChannel('incident_log'),
+    ]
+    executor = ActionExecutor(channels, queue_size=args.decisions * 5)
+    relay_sent = []
+    relay = CommandScheduler(
+        lambda device_id, command: relay_sent.append((device_id, command)),
+        coalesce_window=0.25, min_interval=2.0,
+        state_commands={'RELAY_ON': 'relay', 'RELAY_OFF': 'relay'}
+    )
+    engine = DecisionEngine(alert_cooldown=0)
+
+    rng = np.random.default_rng(0)
+    levels = rng.choice(['LOW', 'MEDIUM', 'HIGH', 'CRITICAL'], args.decisions, p=[0.4, 0.3, 0.2, 0.1])
+    devices = rng.integers(0, args.devices, args.decisions)
+
+    print("=" * 60)
+    print(f"Action Executor ({args.decisions} decisions, email hangs {args.slow_delay}s, "
+          f"SMS fails twice)")
+    print("=" * 60)
+
+    submit_us = []
+    for level, device in zip(levels.tolist(), devices.tolist()):
+        decision = engine.make_decision(level, 50, 3, device_id=device)
+        event = {'device_id': f'CAM_{device:03d}', 'risk_score': 50, 'timestamp': ''}
+        start = time.perf_counter()
+        relay.submit(event['device_id'], 'RELAY_ON' if level in ('HIGH', 'CRITICAL') else 'RELAY_OFF')
+        executor.submit(decision, event)
+        submit_us.append((time.perf_counter() - start) * 1e6)
+
+    submit_us = np.asarray(submit_us)
+    print(f"submit(): mean {submit_us.mean():.1f} us   p99 {np.percentile(submit_us, 99):.1f} us   "
+          f"max {submit_us.max():.0f} us")
+    print(f"Pending right after submitting: {executor.pending_count()}")
+
+    start = time.perf_counter()
+    executor.close(timeout=60)
+    time.sleep(relay.coalesce_window + 0.1)
+    relay.close()
+    print(f"Drained in {time.perf_counter() - start:.2f}s\n")
+
+    high = int(np.isin(levels, ['HIGH', 'CRITICAL']).sum())
+    print(f"Relay: {high} HIGH/CRITICAL decisions, {relay.stats['submitted']} state submissions -> "
+          f"{len(relay_sent)} commands published ({relay.stats['coalesced']} coalesced, "
+          f"{relay.stats['suppressed']} unchanged)\n")
+
+    print(f"  {'channel':13s} {'queued':>7s} {'sent':>7s} {'batches':>8s} {'retries':>8s} "
+          f"{'timeouts':>9s} {'failed':>7s}")
+    for name, s in executor.stats.items():
+        print(f"  {name:13s} {s['queued']:7d} {s['sent']:7d} {s['batches']:8d} {s['retries']:8d} "
+              f"{s['timeouts']:9d} {s['failed']:7d}")
+
+    accounted = all(s['queued'] == s['sent'] + s['failed'] for s in executor.stats.values())
+    print(f"\nEvery queued item delivered or reported failed: {'✓ yes' if accounted else '✗ NO'}")
+    return 0 if accounted else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
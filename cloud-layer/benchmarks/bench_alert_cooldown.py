@@ -0,0 +1,122 @@
+"""
+Alert Cooldown Benchmark
+Many devices sending interleaved MEDIUM/HIGH events through the decision
+engine: decision throughput of the keyed per-device cooldown against the
+previous list scan (global, and with the device added to the match), and
+a check that every device gets exactly the alerts its own cooldown allows
+
+Usage:
+    python bench_alert_cooldown.py
+    python bench_alert_cooldown.py --devices 10000 --events 200000 --rate 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+CLOUD_LAYER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CLOUD_LAYER)
+
+from cloud_intelligence.decision_engine import DecisionEngine
+
+
+class ListCooldownEngine(DecisionEngine):
+    """
+    The previous cooldown: a list of recent alerts scanned on every
+    decision and rebuilt on every alert (5 minute retention)
+
+    per_device=False is the original behaviour (one cooldown per level for
+    all devices); per_device=True adds the device to the match, the
+    straightforward fix without a keyed structure.
+    """
+
+    def __init__(self, alert_cooldown=10, per_device=False):
+        super().__init__(alert_cooldown)
+        self.per_device = per_device
+        self.recent_alerts = []
+
+    def _should_send_alert(self, risk_level, device_id=None, now=None):
+        for alert in self.recent_alerts:
+            if alert['level'] == risk_level and (not self.per_device or alert['device_id'] == device_id):
+                if now - alert['time'] < self.alert_cooldown:
+                    return False
+        return True
+
+    def _record_alert(self, risk_level, device_id=None, now=None):
+        self.recent_alerts.append({'level': risk_level, 'device_id': device_id, 'time': now})
+        cutoff = now - 300
+        self.recent_alerts = [a for a in self.recent_alerts if a['time'] > cutoff]
+
+
+def make_stream(n_devices, n_events, rate, seed=0):
+    """Interleaved events: (time, device_id, level) at `rate` events per second"""
+    rng = np.random.default_rng(seed)
+    devices = [f"CAM_{i:05d}" for i in rng.integers(0, n_devices, n_events)]
+    levels = np.where(rng.random(n_events) < 0.3, 'HIGH', 'MEDIUM').tolist()
+    times = (np.arange(n_events) / rate).tolist()
+    return list(zip(times, devices, levels))
+
+
+def expected_alerts(stream, cooldown):
+    """Reference answer: alerts each (device, level) is allowed on its own"""
+    last = {}
+    alerts = 0
+    for now, device, level in stream:
+        key = (device, level)
+        if key not in last or now - last[key] >= cooldown:
+            last[key] = now
+            alerts += 1
+    return alerts
+
+
+def run(engine, stream, max_seconds):
+    """Feed the stream until done or max_seconds; returns (decisions, alerts, seconds)"""
+    alerts = 0
+    start = time.perf_counter()
+    for i, (now, device, level) in enumerate(stream):
+        if engine.make_decision(level, 50, 3, device_id=device, now=now)['send_alert']:
+            alerts += 1
+        if i % 1000 == 0 and time.perf_counter() - start > max_seconds:
+            return i + 1, alerts, time.perf_counter() - start
+    return len(stream), alerts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--devices', type=int, default=10000, help='Number of devices')
+    parser.add_argument('--events', type=int, default=200000, help='Events in the stream')
+    parser.add_argument('--rate', type=float, default=500.0, help='Events per second of simulated time')
+    parser.add_argument('--cooldown', type=float, default=10.0, help='Alert cooldown in seconds')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='Time limit for each list engine')
+    args = parser.parse_args()
+
+    stream = make_stream(args.devices, args.events, args.rate)
+
+    print("=" * 60)
+    print(f"Alert Cooldown ({args.devices} devices, {args.events} events, "
+          f"{args.rate:.0f} events/s, {args.cooldown:.0f}s cooldown)")
+    print("=" * 60)
+
+    engine = DecisionEngine(alert_cooldown=args.cooldown)
+    decisions, alerts, elapsed = run(engine, stream, float('inf'))
+    expected = expected_alerts(stream, args.cooldown)
+    correct = alerts == expected
+    print(f"{'Per-device heap:':17s}{decisions / elapsed:12,.0f} decisions/s   "
+          f"{alerts} alerts (expected {expected}) {'✓' if correct else '✗'}")
+    print(f"{'':17s}{len(engine._last_alert)} cooldowns tracked at the end, "
+          f"{len(engine._expiry)} heap entries")
+
+    for per_device, label in ((False, 'List, global:'), (True, 'List, per device:')):
+        legacy = ListCooldownEngine(alert_cooldown=args.cooldown, per_device=per_device)
+        decisions, alerts, elapsed = run(legacy, stream, args.max_seconds)
+        print(f"{label:17s}{decisions / elapsed:12,.0f} decisions/s   "
+              f"{alerts} alerts in the first {decisions} events, list at {len(legacy.recent_alerts)}")
+
+    return 0 if correct else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
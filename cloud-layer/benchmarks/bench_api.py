@@ -0,0 +1,239 @@
+"""
+API & Storage Regression Benchmark
+Measures StorageManager and the Flask endpoints over synthetic event
+stores and compares the results against a recorded JSON baseline
+
+Usage:
+    python bench_api.py                         # 10k and 1M rows, compare to baseline
+    python bench_api.py --sizes 10k,1m,10m      # include the 10M row store
+    python bench_api.py --update-baseline       # record a new baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+CLOUD_LAYER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CLOUD_LAYER)
+sys.path.insert(0, os.path.join(CLOUD_LAYER, 'api-layer'))
+
+from storage.storage_manager import StorageManager
+from synthetic_events import build_store
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), 'hybrid-edge-bench')
+
+# Benchmark name -> request path
+ENDPOINTS = {
+    'GET /api/events': '/api/events',
+    'GET /api/stats': '/api/stats',
+    'GET /api/timeseries': '/api/timeseries?device_id=TEST_SIMULATOR_01'
+                           '&from=2026-01-01&to=2027-01-01&points=500'
+}
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1m' -> 1000000"""
+    text = text.strip().lower()
+    multiplier = {'k': 1000, 'm': 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip('km')) * multiplier)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    """Turn per-call latencies (seconds) into throughput and percentiles"""
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3)
+    }
+
+
+def measure(func, min_calls=5, max_calls=1000, max_seconds=5.0):
+    """Call func repeatedly until the call or time budget runs out"""
+    latencies = []
+    start = time.perf_counter()
+    while len(latencies) < max_calls:
+        t0 = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - t0)
+        if len(latencies) >= min_calls and time.perf_counter() - start > max_seconds:
+            break
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def measure_concurrent(app, path, clients, requests_per_client):
+    """Hit an endpoint from several threads, each with its own test client"""
+    latencies = []
+    lock = threading.Lock()
+
+    def worker():
+        client = app.test_client()
+        local = []
+        for _ in range(requests_per_client):
+            t0 = time.perf_counter()
+            response = client.get(path)
+            local.append(time.perf_counter() - t0)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}")
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        for future in [pool.submit(worker) for _ in range(clients)]:
+            future.result()
+    return summarize(latencies, time.perf_counter() - start)
+
+
+def sample_event():
+    return {
+        'timestamp': '',
+        'device_id': 'TEST_SIMULATOR_01',
+        'edge_risk_level': 'MEDIUM',
+        'cloud_risk_level': 'MEDIUM',
+        'risk_score': 45,
+        'motion_count': 3,
+        'relay_state': 'OFF',
+        'actions': 'RECORD_EVENT,MONITOR',
+        'alert_sent': True,
+        'severity': 2
+    }
+
+
+def bench_size(n_rows, data_dir, clients, requests_per_client, max_seconds):
+    storage_dir = os.path.join(data_dir, f"events_{n_rows}")
+    print(f"\n📦 Building {n_rows:,} row store in {storage_dir}...")
+    t0 = time.perf_counter()
+    events_file = build_store(storage_dir, n_rows)
+    print(f"   ready in {time.perf_counter() - t0:.1f}s ({os.path.getsize(events_file) / 1e6:.1f} MB)")
+
+    storage = StorageManager(storage_dir=storage_dir)
+    results = {}
+
+    results['get_recent_events'] = measure(
+        lambda: storage.get_recent_events(20), max_seconds=max_seconds
+    )
+    results['get_statistics'] = measure(storage.get_statistics, max_seconds=max_seconds)
+
+    # log_event appends; truncate afterwards so the store stays reusable
+    size_before = os.path.getsize(events_file)
+    results['log_event'] = measure(
+        lambda: storage.log_event(sample_event()),
+        min_calls=100, max_calls=5000, max_seconds=max_seconds
+    )
+    os.truncate(events_file, size_before)
+
+    import server
+    server.storage = storage
+    for name, path in ENDPOINTS.items():
+        results[name] = measure_concurrent(
+            server.app, path, clients, requests_per_client
+        )
+
+    for name, stats in results.items():
+        print(f"   {name:32s} {stats['ops_per_sec']:>10.1f} ops/s"
+              f"  p50 {stats['p50_ms']:>9.3f} ms  p99 {stats['p99_ms']:>9.3f} ms")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline
+
+    Returns:
+        List of regression messages (empty when everything is within threshold)
+    """
+    regressions = []
+    for size, benches in results.items():
+        for name, stats in benches.items():
+            base = baseline.get('results', {}).get(size, {}).get(name)
+            if not base:
+                continue
+            if stats['ops_per_sec'] < base['ops_per_sec'] * (1 - threshold):
+                regressions.append(
+                    f"{size} rows / {name}: throughput {stats['ops_per_sec']} ops/s "
+                    f"< baseline {base['ops_per_sec']} ops/s"
+                )
+            if stats['p99_ms'] > base['p99_ms'] * (1 + threshold):
+                regressions.append(
+                    f"{size} rows / {name}: p99 {stats['p99_ms']} ms "
+                    f"> baseline {base['p99_ms']} ms"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='10k,1m', help='Comma separated store sizes (e.g. 10k,1m,10m)')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent API clients')
+    parser.add_argument('--requests', type=int, default=25, help='Requests per client per endpoint')
+    parser.add_argument('--max-seconds', type=float, default=5.0, help='Time budget per storage benchmark')
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help='Where synthetic stores are built')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--output', help='Also write this run\'s results to a JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed regression (0.2 = 20%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("API & Storage Benchmark")
+    print("=" * 60)
+
+    results = {}
+    for size in args.sizes.split(','):
+        n_rows = parse_size(size)
+        results[str(n_rows)] = bench_size(
+            n_rows, args.data_dir, args.clients, args.requests, args.max_seconds
+        )
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'clients': args.clients,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+
+    print(f"\n✓ No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+Risk Classifier Inference Benchmark
+Single-event latency and batch throughput of the sklearn forest against
+its flat numpy export, and a check that both give identical results
+
+Usage:
+    python bench_classifier.py
+    python bench_classifier.py --trees 200 --depth 12 --batch 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+CLOUD_LAYER = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CLOUD_LAYER)
+
+from cloud_intelligence.flat_forest import FlatForest
+from cloud_intelligence.model_train import generate_sample_data
+
+FEATURES = ['risk_score', 'motion_count', 'time_of_day', 'day_of_week', 'frequency']
+
+
+def per_call_us(func, max_seconds=2.0, max_calls=100000):
+    func()  # Warm up (builds the compiled evaluator for the flat forest)
+    calls = 0
+    start = time.perf_counter()
+    while calls < max_calls and time.perf_counter() - start < max_seconds:
+        func()
+        calls += 1
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trees', type=int, default=100, help='n_estimators')
+    parser.add_argument('--depth', type=int, default=10, help='max_depth')
+    parser.add_argument('--batch', type=int, default=50000, help='Rows in the batch test')
+    args = parser.parse_args()
+
+    df = generate_sample_data(n_samples=5000)
+    model = RandomForestClassifier(
+        n_estimators=args.trees, max_depth=args.depth, min_samples_split=5,
+        random_state=42, n_jobs=-1
+    ).fit(df[FEATURES].values, df['label'].values)
+    forest = FlatForest.from_sklearn(model)
+
+    rng = np.random.default_rng(0)
+    batch = np.column_stack([
+        rng.uniform(0, 100, args.batch), rng.integers(0, 15, args.batch),
+        rng.integers(0, 24, args.batch), rng.integers(0, 7, args.batch),
+        rng.uniform(0, 10, args.batch)
+    ])
+    row = list(batch[0])
+
+    print("=" * 60)
+    print(f"Risk Classifier Inference ({forest.n_trees} trees, {forest.n_nodes} nodes, "
+          f"depth {forest.max_depth})")
+    print("=" * 60)
+
+    identical = np.array_equal(model.predict_proba(batch), forest.predict_proba(batch))
+    singles = np.array([forest.predict_one(r) for r in batch[:2000]])
+    identical &= np.array_equal(singles, model.predict(batch[:2000]))
+    print(f"Identical to sklearn: {'✓ yes' if identical else '✗ NO'}")
+
+    sk_single = per_call_us(lambda: model.predict([row]), max_calls=200)
+    flat_single = per_call_us(lambda: forest.predict_one(row))
+    print(f"\nSingle event:  sklearn {sk_single:9.1f} us   flat {flat_single:7.1f} us   "
+          f"({sk_single / flat_single:.0f}x)")
+
+    start = time.perf_counter()
+    model.predict(batch)
+    sk_batch = (time.perf_counter() - start) / len(batch) * 1e6
+    start = time.perf_counter()
+    forest.predict(batch)
+    flat_batch = (time.perf_counter() - start) / len(batch) * 1e6
+    print(f"Batch ({len(batch)}): sklearn {sk_batch:7.2f} us/row   flat {flat_batch:5.2f} us/row")
+
+    return 0 if identical else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
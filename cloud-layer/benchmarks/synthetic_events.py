@@ -0,0 +1,108 @@
+"""
+Synthetic Event Store Generator
+Builds events.csv files of arbitrary size in the same row format the
+TEST_SIMULATOR_01 publisher produces
+"""
+
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+
+FIELDNAMES = [
+    'timestamp', 'device_id', 'edge_risk_level', 'cloud_risk_level',
+    'risk_score', 'motion_count', 'relay_state', 'actions',
+    'alert_sent', 'severity'
+]
+
+# Same action lists DecisionEngine emits per level
+LEVEL_ACTIONS = {
+    'LOW': 'LOG_EVENT',
+    'MEDIUM': 'RECORD_EVENT,MONITOR',
+    'HIGH': 'ACTIVATE_RELAY,SEND_ALERT,RECORD_EVENT,LOG_INCIDENT',
+    'CRITICAL': 'ACTIVATE_RELAY,SEND_EMERGENCY_ALERT,RECORD_VIDEO,NOTIFY_SECURITY,LOG_INCIDENT'
+}
+LEVEL_SEVERITY = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'CRITICAL': 4}
+
+# Scores the simulator cycles through, weighted towards quiet periods
+SCORE_CHOICES = [15, 15, 15, 20, 20, 45, 45, 70, 90]
+
+
+def _level(risk_score, motion_count):
+    """Cloud rule thresholds (see RiskClassifier._classify_rules)"""
+    if risk_score >= 80 or motion_count >= 8:
+        return 'CRITICAL'
+    elif risk_score >= 60 or motion_count >= 5:
+        return 'HIGH'
+    elif risk_score >= 35 or motion_count >= 2:
+        return 'MEDIUM'
+    return 'LOW'
+
+
+def generate_rows(n_rows, devices=4, seed=42, start=None, interval=2.0):
+    """
+    Yield synthetic event rows (lists in FIELDNAMES order)
+
+    Args:
+        n_rows: Number of rows to produce
+        devices: Number of simulated devices (TEST_SIMULATOR_01..NN)
+        seed: Random seed, so every run builds the same store
+        start: datetime of the first event
+        interval: Seconds between consecutive events
+    """
+    rng = random.Random(seed)
+    start = start or datetime(2026, 1, 1)
+    device_ids = [f"TEST_SIMULATOR_{i + 1:02d}" for i in range(devices)]
+
+    for i in range(n_rows):
+        risk_score = rng.choice(SCORE_CHOICES)
+        motion_count = max(0, risk_score // 12 + rng.randint(-1, 1))
+        level = _level(risk_score, motion_count)
+        yield [
+            (start + timedelta(seconds=i * interval)).isoformat(timespec='seconds'),
+            device_ids[i % devices],
+            level,
+            level,
+            risk_score,
+            motion_count,
+            'ON' if level in ('HIGH', 'CRITICAL') else 'OFF',
+            LEVEL_ACTIONS[level],
+            level != 'LOW',
+            LEVEL_SEVERITY[level]
+        ]
+
+
+def build_store(storage_dir, n_rows, devices=4, seed=42, chunk_size=100000):
+    """
+    Write an events.csv with n_rows synthetic events
+
+    An existing file with the right row count and seed is reused.
+
+    Returns:
+        Path of the generated events.csv
+    """
+    os.makedirs(storage_dir, exist_ok=True)
+    path = os.path.join(storage_dir, 'events.csv')
+    marker = os.path.join(storage_dir, '.synthetic')
+    signature = f"{n_rows},{devices},{seed}"
+
+    if os.path.exists(path) and os.path.exists(marker):
+        with open(marker) as f:
+            if f.read().strip() == signature:
+                return path
+
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(FIELDNAMES)
+        chunk = []
+        for row in generate_rows(n_rows, devices=devices, seed=seed):
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                writer.writerows(chunk)
+                chunk.clear()
+        writer.writerows(chunk)
+
+    with open(marker, 'w') as f:
+        f.write(signature)
+
+    return path
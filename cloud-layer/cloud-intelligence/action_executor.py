@@ -0,0 +1,373 @@
+"""
+Action Executor
+Carries out the actions DecisionEngine returns (alerts, security
+notifications, recordings) off the ingestion path
+
+Actions are routed to channels through ACTION_TABLE. Every channel has its
+own queue and worker thread: submit() only enqueues and never waits, so a
+slow or failing channel delays nothing but itself. Workers group queued
+items into batches (up to batch_interval seconds of alerts per delivery),
+retry failed batches with exponential backoff and abandon deliveries that
+overrun the channel timeout.
+
+Relay commands are device state rather than notifications; they go through
+a per-device CommandScheduler (coalesced, rate limited, transitions only)
+in the subscriber instead of a channel here.
+"""
+
+import abc
+import queue
+import threading
+import time
+from datetime import datetime
+
+# Route marker: deliver to the decision's own alert_channels
+ALERT = 'ALERT'
+
+# Action -> channels it is delivered to
+ACTION_TABLE = {
+    'SEND_ALERT': (ALERT,),
+    'SEND_EMERGENCY_ALERT': (ALERT,),
+    'NOTIFY_SECURITY': ('security',),
+    'CONTACT_ON_CALL_STAFF': ('security',),
+    'RECORD_VIDEO': ('recorder',),
+    'LOG_INCIDENT': ('incident_log',),
+    'ESCALATING_TREND': ('dashboard',),
+    'ANOMALY_DETECTED': ('dashboard',),
+    # Relay state is sent through the subscriber's CommandScheduler
+    'ACTIVATE_RELAY': (),
+    # Already covered by StorageManager.log_event on the ingestion path
+    'RECORD_EVENT': (),
+    'LOG_EVENT': (),
+    'MONITOR': (),
+    'AFTER_HOURS_PROTOCOL': (),
+}
+
+_STOP = object()
+
+
+class Channel(abc.ABC):
+    """
+    Delivery target for one kind of action
+
+    Subclasses implement deliver(items, timeout); raising marks the batch
+    as failed and it is retried. Deliveries should give up after timeout
+    seconds: the executor abandons one that overruns it (it may still
+    complete later) and counts it as timed out.
+    """
+
+    def __init__(self, name, batch_interval=0.0, max_batch=100, timeout=5.0, retries=2, backoff=0.5):
+        """
+        Args:
+            name: Channel name used in ACTION_TABLE and decision alert_channels
+            batch_interval: Seconds to collect items after the first one
+                before delivering them together (0 = deliver what is queued)
+            max_batch: Maximum items per delivery
+            timeout: Seconds a delivery may take (None = no limit)
+            retries: Extra attempts for a failed batch
+            backoff: Seconds before the first retry, doubled for each next one
+        """
+        self.name = name
+        self.batch_interval = batch_interval
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+    @abc.abstractmethod
+    def deliver(self, items, timeout):
+        """Deliver a batch of items; raise to have it retried"""
+
+
+class CallbackChannel(Channel):
+    """Channel backed by a function(items, timeout)"""
+
+    def __init__(self, name, callback, **kwargs):
+        super().__init__(name, **kwargs)
+        self.callback = callback
+
+    def deliver(self, items, timeout):
+        self.callback(items, timeout)
+
+
+class ConsoleChannel(Channel):
+    """Prints deliveries; stands in for providers that are not configured"""
+
+    def __init__(self, name, icon='🔔', **kwargs):
+        super().__init__(name, **kwargs)
+        self.icon = icon
+
+    def deliver(self, items, timeout):
+        summary = ', '.join(f"{item['device_id']} {item['risk_level']}" for item in items[:5])
+        more = f" (+{len(items) - 5} more)" if len(items) > 5 else ''
+        print(f"{self.icon} [{self.name}] {len(items)} action(s): {summary}{more}")
+
+
+class AlertLogChannel(Channel):
+    """Writes alert records to alerts.csv through StorageManager.log_alert"""
+
+    def __init__(self, storage, name='alert_log', **kwargs):
+        super().__init__(name, **kwargs)
+        self.storage = storage
+
+    def deliver(self, items, timeout):
+        for item in items:
+            if not self.storage.log_alert(item):
+                raise IOError("could not write alert record")
+
+
+class StubChannel(Channel):
+    """
+    Local test channel: records what it receives
+
+    Can simulate a slow provider (delay seconds per delivery, cut short by
+    the timeout) and a failing one (fail_first deliveries raise).
+    """
+
+    def __init__(self, name, delay=0.0, fail_first=0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.delay = delay
+        self.fail_first = fail_first
+        self.attempts = 0
+        self.batches = []
+
+    @property
+    def items(self):
+        return [item for batch in self.batches for item in batch]
+
+    def deliver(self, items, timeout):
+        self.attempts += 1
+        if self.delay:
+            time.sleep(min(self.delay, timeout))
+            if self.delay > timeout:
+                raise TimeoutError(f"{self.name} did not answer within {timeout}s")
+        if self.attempts <= self.fail_first:
+            raise ConnectionError(f"{self.name} unavailable (simulated)")
+        self.batches.append(list(items))
+
+
+class ActionExecutor:
+    def __init__(self, channels, queue_size=1000, action_table=None):
+        """
+        Args:
+            channels: Channel instances (one worker thread each)
+            queue_size: Items a channel may have waiting; further items are
+                dropped (and counted) rather than blocking the caller
+            action_table: Action -> channel names (defaults to ACTION_TABLE)
+        """
+        self.channels = {channel.name: channel for channel in channels}
+        self.queue_size = queue_size
+        self.action_table = ACTION_TABLE if action_table is None else action_table
+
+        self._queues = {name: queue.Queue() for name in self.channels}
+        self._lock = threading.Lock()
+        self._unrouted = set()
+        self._overrun = {}  # Channel name -> helper thread of an abandoned delivery
+        self.stats = {
+            name: {'queued': 0, 'sent': 0, 'batches': 0, 'retries': 0,
+                   'timeouts': 0, 'failed': 0, 'dropped': 0}
+            for name in self.channels
+        }
+
+        self._workers = []
+        for name, channel in self.channels.items():
+            worker = threading.Thread(
+                target=self._run, args=(channel, self._queues[name]),
+                name=f'action-{name}', daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, decision, event):
+        """
+        Queue the actions of one decision (never blocks)
+
+        Args:
+            decision: Dict returned by DecisionEngine.make_decision
+            event: Event dict the decision was made for (device_id,
+                risk_score, timestamp)
+
+        Returns:
+            Number of items queued
+        """
+        base = {
+            'timestamp': event.get('timestamp') or datetime.now().isoformat(),
+            'device_id': event.get('device_id', 'UNKNOWN'),
+            'risk_level': decision['risk_level'],
+            'severity': decision['severity'],
+            'risk_score': event.get('risk_score')
+        }
+
+        queued = 0
+        for action in decision['actions']:
+            routes = self.action_table.get(action)
+            if routes is None:
+                self._warn_unrouted(action)
+                continue
+            for route in routes:
+                if route == ALERT:
+                    if not decision['send_alert']:
+                        continue  # Suppressed by the alert cooldown
+                    names = decision['alert_channels']
+                else:
+                    names = (route,)
+                for name in names:
+                    queued += self._put(name, dict(base, action=action))
+
+        if decision['send_alert'] and 'alert_log' in self.channels:
+            queued += self._put('alert_log', {
+                'timestamp': base['timestamp'],
+                'device_id': base['device_id'],
+                'alert_level': decision['risk_level'],
+                'channels': ', '.join(decision['alert_channels']),
+                'message': f"{decision['risk_level']} risk on {base['device_id']} "
+                           f"(score {base['risk_score']}): {', '.join(decision['actions'])}"
+            })
+        return queued
+
+    def _put(self, name, item):
+        q = self._queues.get(name)
+        if q is None:
+            self._warn_unrouted(name)
+            return 0
+        with self._lock:
+            stats = self.stats[name]
+            if q.qsize() >= self.queue_size:
+                stats['dropped'] += 1
+                return 0
+            stats['queued'] += 1
+        q.put(item)
+        return 1
+
+    def _warn_unrouted(self, target):
+        if target not in self._unrouted:
+            self._unrouted.add(target)
+            print(f"⚠ Action executor: no channel for '{target}', skipping")
+
+    def _run(self, channel, q):
+        """Worker: collect a batch, deliver it, repeat until stopped"""
+        while True:
+            item = q.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            deadline = time.monotonic() + channel.batch_interval
+            while len(batch) < channel.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = q.get(timeout=remaining) if remaining > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+
+            self._deliver(channel, batch)
+            if stop:
+                return
+
+    def _deliver(self, channel, batch):
+        """Deliver one batch with retries; returns True on success"""
+        stats = self.stats[channel.name]
+        error = None
+        for attempt in range(channel.retries + 1):
+            if attempt:
+                time.sleep(channel.backoff * 2 ** (attempt - 1))
+            try:
+                self._call(channel, batch)
+                with self._lock:
+                    stats['sent'] += len(batch)
+                    stats['batches'] += 1
+                    stats['retries'] += attempt
+                return True
+            except TimeoutError as e:
+                error = e
+                with self._lock:
+                    stats['timeouts'] += 1
+            except Exception as e:
+                error = e
+
+        with self._lock:
+            stats['failed'] += len(batch)
+            stats['retries'] += channel.retries
+        print(f"✗ Action channel '{channel.name}' failed {len(batch)} item(s) "
+              f"after {channel.retries + 1} attempts: {error}")
+        return False
+
+    def _call(self, channel, batch):
+        """
+        Run one delivery, waiting at most channel.timeout for it
+
+        The delivery runs on a helper thread; if it overruns, it is left to
+        finish on its own and TimeoutError is raised. While an abandoned
+        delivery is still running, further attempts on that channel fail at
+        once, so a hung provider holds at most one thread.
+        """
+        if not channel.timeout:
+            channel.deliver(batch, channel.timeout)
+            return
+
+        overrun = self._overrun.get(channel.name)
+        if overrun is not None:
+            if overrun.is_alive():
+                raise TimeoutError(f"{channel.name} is still busy with a timed-out delivery")
+            del self._overrun[channel.name]
+
+        error = []
+
+        def run():
+            try:
+                channel.deliver(batch, channel.timeout)
+            except Exception as e:
+                error.append(e)
+
+        helper = threading.Thread(target=run, name=f'deliver-{channel.name}', daemon=True)
+        helper.start()
+        helper.join(channel.timeout)
+        if helper.is_alive():
+            self._overrun[channel.name] = helper
+            raise TimeoutError(f"{channel.name} did not answer within {channel.timeout}s")
+        if error:
+            raise error[0]
+
+    def pending_count(self):
+        """Number of items waiting in all channel queues"""
+        return sum(q.qsize() for q in self._queues.values())
+
+    def close(self, timeout=5.0):
+        """Deliver what is already queued, then stop the workers"""
+        for q in self._queues.values():
+            q.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for worker in self._workers:
+            worker.join(timeout=max(0.0, deadline - time.monotonic()))
+
+
+def default_channels(storage=None, alert_batch_interval=5.0, timeout=5.0, retries=2):
+    """
+    Standard channel set for the subscriber
+
+    Email and SMS are console stubs until a provider is configured; they
+    batch alerts per alert_batch_interval. The alert log delivers
+    immediately.
+
+    Args:
+        storage: StorageManager for the alert log (None to skip it)
+        alert_batch_interval: Seconds of alerts grouped per email / SMS
+        timeout: Seconds per delivery
+        retries: Extra attempts per failed batch
+    """
+    options = {'timeout': timeout, 'retries': retries}
+    channels = [
+        ConsoleChannel('email', '📧', batch_interval=alert_batch_interval, **options),
+        ConsoleChannel('sms', '📱', batch_interval=alert_batch_interval, **options),
+        ConsoleChannel('dashboard', '🖥', **options),
+        ConsoleChannel('security', '🚨', **options),
+        ConsoleChannel('recorder', '🎥', **options),
+        ConsoleChannel('incident_log', '📝', batch_interval=alert_batch_interval, **options),
+    ]
+    if storage is not None:
+        channels.append(AlertLogChannel(storage, **options))
+    return channels
@@ -3,15 +3,27 @@ Decision Engine
 Determines appropriate actions based on risk classification
 """
 
-from datetime import datetime, timedelta
+import heapq
+import time
 
 class DecisionEngine:
-    def __init__(self):
-        """Initialize decision engine"""
-        self.recent_alerts = []
-        self.alert_cooldown = 10  # Seconds between similar alerts
+    def __init__(self, alert_cooldown=10):
+        """
+        Initialize decision engine
+
+        Args:
+            alert_cooldown: Seconds between alerts of the same level from the same device
+        """
+        self.alert_cooldown = alert_cooldown
+
+        # Cooldown state per (device_id, level): time of the last alert sent.
+        # Check and update are single dict operations; entries are dropped
+        # through a min-heap of expiry times, so memory follows the devices
+        # that alerted within the last cooldown period.
+        self._last_alert = {}
+        self._expiry = []  # (expires_at, (device_id, level))
         
-    def make_decision(self, risk_level, risk_score, motion_count, context=None):
+    def make_decision(self, risk_level, risk_score, motion_count, context=None, device_id=None, now=None):
         """
         Make decision on actions to take
         
@@ -20,10 +32,15 @@ class DecisionEngine:
             risk_score: Numeric risk score
             motion_count: Number of detected motions
             context: Additional context (time, location, etc.)
+            device_id: Device the event came from (cooldowns are per device)
+            now: time.monotonic() timestamp (defaults to the current time)
             
         Returns:
             decision: Dict with actions, alerts, and severity
         """
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
         decision = {
             'risk_level': risk_level,
             'actions': [],
@@ -57,7 +74,7 @@ class DecisionEngine:
                 'RECORD_EVENT',
                 'LOG_INCIDENT'
             ]
-            decision['send_alert'] = self._should_send_alert('HIGH')
+            decision['send_alert'] = self._should_send_alert('HIGH', device_id, now)
             decision['alert_channels'] = ['dashboard', 'email']
             decision['log_level'] = 'WARNING'
             
@@ -66,7 +83,7 @@ class DecisionEngine:
                 'RECORD_EVENT',
                 'MONITOR'
             ]
-            decision['send_alert'] = self._should_send_alert('MEDIUM')
+            decision['send_alert'] = self._should_send_alert('MEDIUM', device_id, now)
             decision['alert_channels'] = ['dashboard']
             decision['log_level'] = 'INFO'
             
@@ -81,7 +98,7 @@ class DecisionEngine:
         
         # Record alert if sending
         if decision['send_alert']:
-            self._record_alert(risk_level)
+            self._record_alert(risk_level, device_id, now)
         
         return decision
     
@@ -95,35 +112,33 @@ class DecisionEngine:
         }
         return severity_map.get(risk_level, 2)
     
-    def _should_send_alert(self, risk_level):
+    def _should_send_alert(self, risk_level, device_id=None, now=None):
         """
         Determine if alert should be sent
-        Implements cooldown to prevent alert spam
+        Implements a per-device cooldown to prevent alert spam
         """
-        now = datetime.now()
-        
-        # Check recent alerts for same level
-        for alert in self.recent_alerts:
-            if alert['level'] == risk_level:
-                time_diff = (now - alert['time']).total_seconds()
-                if time_diff < self.alert_cooldown:
-                    return False  # Still in cooldown
-        
-        return True
+        last = self._last_alert.get((device_id, risk_level))
+        if last is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - last >= self.alert_cooldown
     
-    def _record_alert(self, risk_level):
+    def _record_alert(self, risk_level, device_id=None, now=None):
         """Record alert to track cooldowns"""
-        self.recent_alerts.append({
-            'level': risk_level,
-            'time': datetime.now()
-        })
-        
-        # Clean old alerts (older than 5 minutes)
-        cutoff = datetime.now() - timedelta(minutes=5)
-        self.recent_alerts = [
-            a for a in self.recent_alerts 
-            if a['time'] > cutoff
-        ]
+        now = time.monotonic() if now is None else now
+        key = (device_id, risk_level)
+        self._last_alert[key] = now
+        heapq.heappush(self._expiry, (now + self.alert_cooldown, key))
+    
+    def _expire(self, now):
+        """Drop cooldown entries that have run out"""
+        expiry = self._expiry
+        while expiry and expiry[0][0] <= now:
+            expires_at, key = heapq.heappop(expiry)
+            # A newer alert for the same key pushed a later expiry; keep it
+            last = self._last_alert.get(key)
+            if last is not None and last + self.alert_cooldown <= expires_at:
+                del self._last_alert[key]
     
     def _apply_context(self, decision, context):
         """
@@ -133,6 +148,7 @@ class DecisionEngine:
         - time_of_day: After hours = higher severity
         - location: Sensitive areas = stricter response
         - day_of_week: Weekend = different protocol
+        - trend: Device trend from TrendTracker (rising risk, anomalies)
         """
         # Example: Upgrade severity for after-hours events
         hour = context.get('hour', 12)
@@ -151,6 +167,14 @@ class DecisionEngine:
         if is_weekend and decision['severity'] >= 3:
             decision['actions'].append('CONTACT_ON_CALL_STAFF')
         
+        # Rising risk or a sudden outlier on a device that is already active
+        trend = context.get('trend')
+        if trend and decision['severity'] >= 2:
+            if trend['trend'] == 'increasing' and trend['confidence'] == 'high':
+                decision['actions'].append('ESCALATING_TREND')
+            if trend['anomaly']:
+                decision['actions'].append('ANOMALY_DETECTED')
+        
         return decision
     
     def get_action_details(self, action):
@@ -195,6 +219,16 @@ class DecisionEngine:
                 'description': 'Continue monitoring',
                 'implementation': 'Increase sampling rate',
                 'priority': 'low'
+            },
+            'ESCALATING_TREND': {
+                'description': 'Risk on this device keeps rising',
+                'implementation': 'Dashboard notification with the trend',
+                'priority': 'medium'
+            },
+            'ANOMALY_DETECTED': {
+                'description': 'Risk far outside the device\'s recent range',
+                'implementation': 'Dashboard notification for review',
+                'priority': 'medium'
             }
         }
         return action_details.get(action, {
@@ -0,0 +1,97 @@
+"""
+Feature Store
+Per-device features for the risk classifier and the decision context,
+kept in memory and updated incrementally per event
+
+Features of an event:
+    time_of_day / hour  - Local hour of the event (0-23)
+    day_of_week         - Weekday, Monday = 0
+    is_weekend          - Saturday or Sunday
+    frequency           - Events per minute from this device over the
+                          frequency window, including this one
+    seconds_since_last  - Gap to the device's previous event
+    zone / location     - Static device metadata (e.g. mqtt_config.DEVICE_ZONES)
+
+The ML model's feature order is [risk_score, motion_count, time_of_day,
+day_of_week, frequency] (see RiskClassifier._classify_ml).
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+
+try:
+    from .trend_tracker import to_epoch
+except ImportError:
+    from trend_tracker import to_epoch
+
+DEFAULT_ZONE = {'zone': 'default', 'location': ''}
+
+
+class FeatureStore:
+    def __init__(self, zones=None, frequency_window=60.0, max_events=1024, max_devices=10000):
+        """
+        Args:
+            zones: Dict device_id -> metadata dict (zone, location, ...)
+            frequency_window: Seconds of events counted for the frequency
+            max_events: Most event times kept per device (caps memory; the
+                frequency saturates at this many events per window)
+            max_devices: Devices tracked; the least recently seen are dropped
+        """
+        self.zones = zones or {}
+        self.frequency_window = frequency_window
+        self.max_events = max_events
+        self.max_devices = max_devices
+        self._devices = OrderedDict()  # device_id -> (event times deque, [total])
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def update(self, device_id, timestamp=None):
+        """
+        Record one event and return its features
+
+        Args:
+            device_id: Device the event came from
+            timestamp: Epoch seconds or ISO-8601 string (defaults to now)
+
+        Returns:
+            Feature dict (usable as classify() additional_features and as
+            decision context)
+        """
+        t = to_epoch(timestamp)
+        with self._lock:
+            entry = self._devices.get(device_id)
+            if entry is None:
+                entry = self._devices[device_id] = (deque(maxlen=self.max_events), [0])
+                if len(self._devices) > self.max_devices:
+                    self._devices.popitem(last=False)
+            else:
+                self._devices.move_to_end(device_id)
+
+            times, total = entry
+            last = times[-1] if times else None
+            times.append(t)
+            total[0] += 1
+            cutoff = t - self.frequency_window
+            while times[0] <= cutoff:
+                times.popleft()
+            count = len(times)
+
+        return self._features(device_id, t, count, last, total[0])
+
+    def _features(self, device_id, t, count, last, total):
+        local = time.localtime(t)
+        features = {
+            'time_of_day': local.tm_hour,
+            'hour': local.tm_hour,
+            'day_of_week': local.tm_wday,
+            'is_weekend': local.tm_wday >= 5,
+            'frequency': round(count * 60.0 / self.frequency_window, 3),
+            'seconds_since_last': round(t - last, 3) if last is not None else None,
+            'events_total': total
+        }
+        features.update(DEFAULT_ZONE)
+        features.update(self.zones.get(device_id, {}))
+        return features
@@ -0,0 +1,244 @@
+"""
+Flat Random Forest
+Compact numpy form of a trained sklearn RandomForestClassifier for fast
+inference without sklearn's per-call validation overhead
+
+All trees are stored back to back in shared node arrays. Leaves point
+to themselves, so every tree can be walked a fixed number of steps
+(the forest depth) with no per-node branching. Results match sklearn
+predicting with n_jobs=1: inputs are cast to float32 as sklearn does
+before comparing with the float64 thresholds, and per-tree class
+probabilities are summed in tree order and averaged. With n_jobs > 1
+sklearn adds the trees in whatever order its threads finish, so the
+last bits of its probabilities can differ from run to run.
+
+Batches walk the arrays vectorized; single events use a Python function
+generated from the same arrays (one if/else chain per tree) so they skip
+numpy's per-call overhead too.
+"""
+
+from bisect import bisect_left
+
+import numpy as np
+
+# Deepest forest compiled into Python source (CPython caps block nesting at 100)
+MAX_COMPILED_DEPTH = 90
+
+
+class FlatForest:
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features, max_depth):
+        """
+        Args:
+            feature: Split feature per node (int32, 0 for leaves)
+            threshold: Split threshold per node (float64)
+            left, right: Child node indices (int32); leaves point to themselves
+            value: Per-node class probabilities (n_nodes x n_classes, float64)
+            roots: Root node index of every tree
+            classes: Class labels in value column order
+            n_features: Number of input features
+            max_depth: Deepest root-to-leaf path in the forest
+        """
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+
+        # Interleaved (left, right) children: next node = children[2 * node + go_right]
+        self._children = np.stack([left, right], axis=1).ravel()
+        self._leaves = None  # Compiled single-row evaluator, built on first use
+
+        # Sorted distinct split thresholds per feature (see quantize)
+        split = self.left != np.arange(len(left))
+        self.bin_edges = [
+            np.unique(threshold[split & (feature == f)]).tolist()
+            for f in range(self.n_features_in_)
+        ]
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Flatten a fitted RandomForestClassifier"""
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        n_classes = len(model.classes_)
+
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            n = tree.node_count
+            leaf = tree.children_left == -1
+            own = np.arange(offset, offset + n, dtype=np.int32)
+
+            features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+            thresholds.append(np.where(leaf, 0.0, tree.threshold))
+            lefts.append(np.where(leaf, own, tree.children_left + offset).astype(np.int32))
+            rights.append(np.where(leaf, own, tree.children_right + offset).astype(np.int32))
+
+            # sklearn >= 1.4 stores class fractions; older versions store
+            # counts and normalize them in predict_proba
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            if not np.allclose(normalizer, 1.0):
+                normalizer[normalizer == 0.0] = 1.0
+                value = value / normalizer
+            values.append(value)
+
+            roots.append(offset)
+            max_depth = max(max_depth, tree.max_depth)
+            offset += n
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds),
+            np.concatenate(lefts), np.concatenate(rights),
+            np.concatenate(values), np.array(roots, dtype=np.int32),
+            np.asarray(model.classes_), model.n_features_in_, max_depth
+        )
+
+    def save(self, path):
+        np.savez_compressed(
+            path, feature=self.feature, threshold=self.threshold,
+            left=self.left, right=self.right, value=self.value, roots=self.roots,
+            classes=self.classes_, n_features=self.n_features_in_, max_depth=self.max_depth
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data['feature'], data['threshold'], data['left'], data['right'],
+                data['value'], data['roots'], data['classes'],
+                data['n_features'], data['max_depth']
+            )
+
+    def _check(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has {X.shape[-1]} features, but FlatForest is expecting "
+                f"{self.n_features_in_} features as input"
+            )
+        return X
+
+    def apply(self, X):
+        """
+        Leaf reached in every tree, walking one tree at a time over the batch
+
+        Returns:
+            (n_trees x n_samples) array of node indices
+        """
+        X = self._check(X)
+        n = len(X)
+        columns = np.ascontiguousarray(X.T).ravel()  # Feature-major: x[f] at f * n + row
+        rows = np.arange(n)
+        leaves = np.empty((self.n_trees, n), dtype=np.int64)
+        for t, root in enumerate(self.roots):
+            nodes = np.full(n, root, dtype=np.int64)
+            for _ in range(self.max_depth):
+                go_right = columns.take(self.feature.take(nodes) * n + rows) > self.threshold.take(nodes)
+                nodes = self._children.take(nodes * 2 + go_right)
+            leaves[t] = nodes
+        return leaves
+
+    def predict_proba(self, X):
+        proba = None
+        for nodes in self.apply(X):
+            # Accumulate tree by tree, the order sklearn sums them in
+            if proba is None:
+                proba = self.value.take(nodes, axis=0)
+            else:
+                proba += self.value.take(nodes, axis=0)
+        proba /= self.n_trees
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _compile_leaves(self):
+        """
+        Generate one Python function with every tree as nested if/else blocks
+
+        Walking ~n_trees * depth compiled comparisons is far cheaper for a
+        single row than a numpy call per tree level. Returns None when the
+        forest is too deep for the parser's nesting limit.
+        """
+        if self.max_depth > MAX_COMPILED_DEPTH:
+            return None
+
+        feature, threshold = self.feature.tolist(), self.threshold.tolist()
+        left, right = self.left.tolist(), self.right.tolist()
+        lines = [f"def leaves({', '.join(f'x{i}' for i in range(self.n_features_in_))}):"]
+
+        for t, root in enumerate(self.roots.tolist()):
+            stack = [(root, 1)]
+            while stack:
+                item, depth = stack.pop()
+                indent = ' ' * depth
+                if item == 'else':
+                    lines.append(f"{' ' * (depth - 1)}else:")
+                elif left[item] == item:
+                    lines.append(f"{indent}l{t} = {item}")
+                else:
+                    lines.append(f"{indent}if x{feature[item]} <= {threshold[item]!r}:")
+                    stack.append((right[item], depth + 1))
+                    stack.append(('else', depth + 1))
+                    stack.append((left[item], depth + 1))
+
+        lines.append(f" return ({', '.join(f'l{t}' for t in range(self.n_trees))},)")
+        namespace = {}
+        exec(compile('\n'.join(lines), '<flat_forest>', 'exec'), namespace)
+        return namespace['leaves']
+
+    def quantize(self, features):
+        """
+        Map a feature row to its threshold bin in every feature
+
+        Every split compares one feature with one of that feature's
+        thresholds, so two rows with the same bins take the same path
+        through every tree: the bins are an exact cache key.
+
+        Returns:
+            Tuple of bin indices, one per feature
+        """
+        x = np.asarray(features, dtype=np.float32)
+        if x.shape != (self.n_features_in_,):
+            raise ValueError(
+                f"X has {x.size} features, but FlatForest is expecting "
+                f"{self.n_features_in_} features as input"
+            )
+        # x <= threshold[i]  <=>  bisect_left(thresholds, x) <= i
+        return tuple(bisect_left(edges, value) for edges, value in zip(self.bin_edges, x.tolist()))
+
+    def predict_one(self, features):
+        """
+        Class label for a single feature row
+
+        Uses the compiled tree function (built on first use) and falls back
+        to the vectorized path for very deep forests.
+        """
+        if self._leaves is None:
+            self._leaves = self._compile_leaves() or False
+        if not self._leaves:
+            return self.predict(features)[0]
+
+        x = np.asarray(features, dtype=np.float32)
+        if x.shape != (self.n_features_in_,):
+            raise ValueError(
+                f"X has {x.size} features, but FlatForest is expecting "
+                f"{self.n_features_in_} features as input"
+            )
+        proba = self.value.take(self._leaves(*x.tolist()), axis=0).sum(axis=0)
+        return self.classes_[np.argmax(proba)]
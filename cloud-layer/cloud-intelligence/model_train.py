@@ -1,15 +1,64 @@
 """
 ML Model Training (Optional)
 Train a machine learning model for risk classification
+
+Data sources:
+    events.csv (--events)  - The real event store, streamed in chunks; the
+                             features are derived the way FeatureStore
+                             computes them live. Labels are the ground
+                             truth in labels.csv (operator confirmations
+                             and labeled events, see StorageManager.log_label)
+    labeled CSV (--data)   - Rows that already have the feature columns
+                             and a numeric label
+    synthetic (default)    - generate_sample_data()
+
+Usage:
+    python model_train.py
+    python model_train.py --events ../storage/events.csv --since 2026-01-01
+    python model_train.py --events ../storage/events.csv --label-column cloud_risk_level
 """
 
+import argparse
+import json
+import os
 import pickle
+import time
+from datetime import datetime
+
 import numpy as np
+import sklearn
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import RandomizedSearchCV, train_test_split
+from sklearn.metrics import classification_report, confusion_matrix, f1_score
 import pandas as pd
 
+try:
+    from .flat_forest import FlatForest
+except ImportError:
+    from flat_forest import FlatForest
+
+# Model input columns, in the order RiskClassifier._classify_ml builds them
+FEATURE_COLUMNS = ['risk_score', 'motion_count', 'time_of_day', 'day_of_week', 'frequency']
+LABELS = {'LOW': 0, 'MEDIUM': 1, 'HIGH': 2, 'CRITICAL': 3}
+TARGET_NAMES = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
+
+# events.csv columns written by the system itself; a model trained on them
+# reproduces past classifications instead of learning from outcomes
+SELF_LABEL_COLUMNS = ('cloud_risk_level', 'edge_risk_level')
+
+# Events per minute are counted over this trailing window (FeatureStore default)
+FREQUENCY_WINDOW_SECONDS = 60.0
+
+# Random search space; depth stays bounded so single-event inference stays fast
+SEARCH_SPACE = {
+    'n_estimators': [50, 100, 200],
+    'max_depth': [6, 8, 10, 12, 16],
+    'min_samples_split': [2, 5, 10],
+    'min_samples_leaf': [1, 2, 4],
+    'class_weight': [None, 'balanced'],
+}
+DEFAULT_PARAMS = {'n_estimators': 100, 'max_depth': 10, 'min_samples_split': 5}
+
 def generate_sample_data(n_samples=1000):
     """
     Generate synthetic training data
@@ -49,52 +98,256 @@ def generate_sample_data(n_samples=1000):
     
     return df
 
-def train_model(data_path=None, output_path='trained_model.pkl'):
+def _chunk_features(frame, window_seconds):
+    """
+    Vectorized features for one chunk of events (sorted by device and time)
+
+    frequency is the number of events from the same device in the trailing
+    window (t - window, t], per minute, as FeatureStore counts it live.
+    """
+    frame = frame.sort_values(['device_id', 'ts'], kind='stable')
+    t = frame['ts'].to_numpy(dtype='datetime64[ns]').astype(np.int64) / 1e9
+    device = frame['device_id'].to_numpy()
+
+    # Offset every device onto its own stretch of the time axis so one
+    # searchsorted finds each row's window start within its device
+    starts = np.flatnonzero(np.r_[True, device[1:] != device[:-1]])
+    group = np.repeat(np.arange(len(starts)), np.diff(np.r_[starts, len(device)]))
+    span = (t.max() - t.min()) + 2 * window_seconds if len(t) else 0.0
+    key = (t - t.min() if len(t) else t) + group * span
+    first = np.searchsorted(key, key - window_seconds, side='right')
+    counts = np.arange(len(key)) - first + 1
+
+    frame = frame.assign(
+        time_of_day=frame['ts'].dt.hour,
+        day_of_week=frame['ts'].dt.dayofweek,
+        frequency=counts * (60.0 / window_seconds)
+    )
+    return frame
+
+
+def _event_keys(device_id, timestamp):
+    """Join key of events.csv / labels.csv rows: device_id and stored timestamp"""
+    return device_id.fillna('') + '|' + timestamp.fillna('')
+
+
+def load_labels(labels_path):
+    """
+    Ground-truth labels written by StorageManager.log_label
+
+    Returns:
+        Series of numeric labels indexed by event key (the latest label of
+        an event wins)
+    """
+    labels = pd.read_csv(labels_path, usecols=['timestamp', 'device_id', 'label'], dtype=str)
+    labels['label'] = labels['label'].str.strip().str.upper().map(LABELS)
+    labels = labels.dropna(subset=['label'])
+    keys = _event_keys(labels['device_id'], labels['timestamp'])
+    series = pd.Series(labels['label'].to_numpy(dtype=np.int64), index=keys.to_numpy())
+    return series[~series.index.duplicated(keep='last')]
+
+
+def load_event_features(events_path, start=None, end=None, chunksize=100000,
+                        labels=None, label_column=None, window_seconds=FREQUENCY_WINDOW_SECONDS):
+    """
+    Stream the event store and derive model features chunk by chunk
+
+    Only the needed columns are read, chunksize rows at a time. The last
+    window_seconds of every chunk are carried into the next one so the
+    frequency of rows near a chunk boundary counts events on both sides
+    (events.csv is appended in time order). Unlabeled events still count
+    towards the frequency of the labeled ones.
+
+    Args:
+        events_path: events.csv written by StorageManager
+        start, end: Optional datetime bounds of the training window
+        chunksize: Rows read per chunk
+        labels: load_labels() Series joined on device_id + timestamp
+        label_column: events.csv column used as the label instead of labels
+        window_seconds: Frequency window
+
+    Returns:
+        (X, y, info) with X as float32 rows of FEATURE_COLUMNS, y the
+        numeric labels and info the training window and row counts
+    """
+    if (labels is None) == (label_column is None):
+        raise ValueError("Pass exactly one of labels and label_column")
+    columns = ['timestamp', 'device_id', 'risk_score', 'motion_count']
+    if label_column is not None:
+        columns.append(label_column)
+    X_parts, y_parts = [], []
+    carry = None
+    info = {'rows_read': 0, 'rows_used': 0, 'start': None, 'end': None}
+
+    for chunk in pd.read_csv(events_path, usecols=columns, chunksize=chunksize,
+                             dtype={'timestamp': str, 'device_id': str, label_column or 'label': str}):
+        info['rows_read'] += len(chunk)
+        if label_column is not None:
+            chunk['label'] = chunk.pop(label_column).map(LABELS)
+        else:
+            chunk['label'] = _event_keys(chunk['device_id'], chunk['timestamp']).map(labels)
+        chunk['ts'] = pd.to_datetime(chunk['timestamp'], format='ISO8601', errors='coerce')
+        chunk['risk_score'] = pd.to_numeric(chunk['risk_score'], errors='coerce')
+        chunk['motion_count'] = pd.to_numeric(chunk['motion_count'], errors='coerce')
+        chunk = chunk.dropna(subset=['ts', 'risk_score', 'motion_count'])
+        chunk = chunk.drop(columns=['timestamp']).assign(carried=False)
+        if chunk.empty:
+            continue
+
+        frame = chunk if carry is None else pd.concat([carry, chunk], ignore_index=True)
+        frame = _chunk_features(frame, window_seconds)
+        carry = chunk[chunk['ts'] > chunk['ts'].max() - pd.Timedelta(seconds=window_seconds)]
+        carry = carry.assign(carried=True)
+
+        rows = frame[~frame['carried'] & frame['label'].notna()]
+        if start is not None:
+            rows = rows[rows['ts'] >= start]
+        if end is not None:
+            rows = rows[rows['ts'] <= end]
+        if rows.empty:
+            continue
+
+        X_parts.append(rows[FEATURE_COLUMNS].to_numpy(dtype=np.float32))
+        y_parts.append(rows['label'].to_numpy(dtype=np.int64))
+        first, last = rows['ts'].min(), rows['ts'].max()
+        info['start'] = first if info['start'] is None else min(info['start'], first)
+        info['end'] = last if info['end'] is None else max(info['end'], last)
+
+    if not X_parts:
+        return np.empty((0, len(FEATURE_COLUMNS)), dtype=np.float32), np.empty(0, dtype=np.int64), info
+
+    X = np.concatenate(X_parts)
+    y = np.concatenate(y_parts)
+    info['rows_used'] = len(y)
+    info['start'] = info['start'].isoformat()
+    info['end'] = info['end'].isoformat()
+    return X, y, info
+
+
+def search_hyperparameters(X, y, n_iter=20, cv=3, max_rows=200000, n_jobs=-1, random_state=42):
+    """
+    Randomized search over SEARCH_SPACE, one candidate fit per core
+
+    The search runs on at most max_rows rows (stratified sample); the
+    chosen parameters are refit on the full training set by the caller.
+
+    Returns:
+        (best_params, best_cv_score)
+    """
+    if len(y) > max_rows:
+        X, _, y, _ = train_test_split(X, y, train_size=max_rows, random_state=random_state,
+                                      stratify=_stratify(y))
+    search = RandomizedSearchCV(
+        RandomForestClassifier(random_state=random_state, n_jobs=1),
+        SEARCH_SPACE, n_iter=n_iter, cv=cv, scoring='f1_macro',
+        n_jobs=n_jobs, random_state=random_state
+    )
+    search.fit(X, y)
+    return search.best_params_, float(search.best_score_)
+
+
+def _stratify(y):
+    """Labels to stratify on, or None when a class is too rare to split"""
+    _, counts = np.unique(y, return_counts=True)
+    return y if counts.min() >= 2 else None
+
+
+def train_model(data_path=None, output_path='trained_model.pkl', events_path=None,
+                start=None, end=None, chunksize=100000, search_iter=0, search_rows=200000,
+                labels_path=None, label_column=None):
     """
     Train Random Forest classifier
     
     Args:
-        data_path: Path to CSV with training data (optional)
+        data_path: Path to CSV with feature columns and label (optional)
         output_path: Path to save trained model
+        events_path: events.csv to stream and derive features from (optional)
+        start, end: Training window (datetime) for events_path
+        chunksize: Rows per chunk when streaming events_path
+        search_iter: Random search candidates (0 = fixed DEFAULT_PARAMS)
+        search_rows: Rows the search may use
+        labels_path: Ground-truth labels for events_path (defaults to the
+            labels.csv next to it)
+        label_column: events_path column used as the label instead of
+            labels_path (cloud_risk_level trains on past classifications)
     """
     print("=" * 60)
     print("Training Risk Classification Model")
     print("=" * 60)
     
     # Load or generate data
-    if data_path:
-        print(f"Loading data from {data_path}...")
-        df = pd.read_csv(data_path)
+    window = {'start': None, 'end': None}
+    label_source, self_labeled = 'label', False
+    if events_path:
+        labels = None
+        if label_column:
+            label_source = label_column
+            self_labeled = label_column in SELF_LABEL_COLUMNS
+            if self_labeled:
+                print(f"⚠ Training on {label_column}, the system's own past classifications: "
+                      f"the model will reproduce them, not learn from real outcomes")
+        else:
+            labels_path = labels_path or os.path.join(os.path.dirname(events_path), 'labels.csv')
+            if not os.path.exists(labels_path):
+                raise FileNotFoundError(
+                    f"No ground-truth labels at {labels_path}. Collect operator labels on the "
+                    f"labels topic, or pass --label-column cloud_risk_level to train on past "
+                    f"classifications (self-labeled)"
+                )
+            labels = load_labels(labels_path)
+            label_source = os.path.abspath(labels_path)
+            print(f"Ground-truth labels: {len(labels)} from {labels_path}")
+
+        print(f"Streaming events from {events_path} ({chunksize} rows per chunk)...")
+        started = time.perf_counter()
+        X, y, info = load_event_features(events_path, start, end, chunksize,
+                                         labels=labels, label_column=label_column)
+        print(f"  {info['rows_read']} rows read, {info['rows_used']} used "
+              f"in {time.perf_counter() - started:.1f}s")
+        window = {'start': info['start'], 'end': info['end']}
+        source = os.path.abspath(events_path)
     else:
-        print("Generating synthetic training data...")
-        df = generate_sample_data(n_samples=1000)
+        if data_path:
+            print(f"Loading data from {data_path}...")
+            df = pd.read_csv(data_path)
+            source = os.path.abspath(data_path)
+        else:
+            print("Generating synthetic training data...")
+            df = generate_sample_data(n_samples=1000)
+            source = 'synthetic'
+        X = df[FEATURE_COLUMNS].values
+        y = df['label'].values
+
+    if len(y) == 0:
+        raise ValueError("No training rows (check the data source and training window)")
     
-    print(f"Dataset size: {len(df)} samples")
+    labels, counts = np.unique(y, return_counts=True)
+    class_counts = {TARGET_NAMES[int(label)]: int(count) for label, count in zip(labels, counts)}
+    print(f"Dataset size: {len(y)} samples")
     print(f"\nClass distribution:")
-    print(df['label'].value_counts().sort_index())
-    
-    # Prepare features and labels
-    feature_columns = ['risk_score', 'motion_count', 'time_of_day', 'day_of_week', 'frequency']
-    X = df[feature_columns].values
-    y = df['label'].values
+    for name, count in class_counts.items():
+        print(f"  {name:10s} {count}")
     
     # Split data
     X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
+        X, y, test_size=0.2, random_state=42, stratify=_stratify(y)
     )
     
     print(f"\nTraining set: {len(X_train)} samples")
     print(f"Test set: {len(X_test)} samples")
     
+    # Hyperparameters
+    params, cv_score = dict(DEFAULT_PARAMS), None
+    if search_iter:
+        print(f"\nSearching hyperparameters ({search_iter} candidates, all cores)...")
+        started = time.perf_counter()
+        params, cv_score = search_hyperparameters(X_train, y_train, n_iter=search_iter,
+                                                  max_rows=search_rows)
+        print(f"  Best {params} (CV macro F1 {cv_score:.3f}) in {time.perf_counter() - started:.1f}s")
+    
     # Train Random Forest
     print("\nTraining Random Forest Classifier...")
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=10,
-        min_samples_split=5,
-        random_state=42,
-        n_jobs=-1
-    )
+    model = RandomForestClassifier(random_state=42, n_jobs=-1, **params)
     
     model.fit(X_train, y_train)
     
@@ -114,8 +367,10 @@ def train_model(data_path=None, output_path='trained_model.pkl'):
     
     # Classification report
     print("\nClassification Report:")
-    target_names = ['LOW', 'MEDIUM', 'HIGH', 'CRITICAL']
-    print(classification_report(y_test, y_pred, target_names=target_names))
+    present = np.unique(np.concatenate([y_test, y_pred]))
+    target_names = [TARGET_NAMES[int(label)] for label in present]
+    print(classification_report(y_test, y_pred, labels=present, target_names=target_names,
+                                zero_division=0))
     
     # Confusion matrix
     print("Confusion Matrix:")
@@ -124,16 +379,61 @@ def train_model(data_path=None, output_path='trained_model.pkl'):
     
     # Feature importance
     print("\nFeature Importance:")
-    for feature, importance in zip(feature_columns, model.feature_importances_):
+    for feature, importance in zip(FEATURE_COLUMNS, model.feature_importances_):
         print(f"  {feature:20s}: {importance:.3f}")
     
+    # Flat numpy export for fast inference (RiskClassifier prefers it).
+    # Checked before anything is written; sklearn only sums the trees in
+    # a fixed order when it predicts single-threaded.
+    forest = FlatForest.from_sklearn(model)
+    n_jobs, model.n_jobs = model.n_jobs, 1
+    try:
+        matches = np.array_equal(forest.predict_proba(X_test), model.predict_proba(X_test))
+    finally:
+        model.n_jobs = n_jobs
+    if not matches:
+        raise RuntimeError("Flat forest export does not match the sklearn model")
+
     # Save model
     with open(output_path, 'wb') as f:
         pickle.dump(model, f)
     
     print(f"\n✓ Model saved to {output_path}")
+
+    flat_path = os.path.splitext(output_path)[0] + '.npz'
+    forest.save(flat_path)
+    print(f"✓ Flat forest saved to {flat_path} ({forest.n_trees} trees, {forest.n_nodes} nodes)")
+
+    # Metadata: what the model expects, what it was trained on, how it scored
+    metadata_path = os.path.splitext(output_path)[0] + '.json'
+    metadata = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'model': 'RandomForestClassifier',
+        'sklearn_version': sklearn.__version__,
+        'feature_columns': FEATURE_COLUMNS,
+        'labels': LABELS,
+        'frequency_window_seconds': FREQUENCY_WINDOW_SECONDS,
+        'source': source,
+        'label_source': label_source,
+        'self_labeled': self_labeled,
+        'training_window': window,
+        'rows': {'train': int(len(y_train)), 'test': int(len(y_test))},
+        'class_counts': class_counts,
+        'params': params,
+        'search': {'candidates': search_iter, 'cv_f1_macro': cv_score} if search_iter else None,
+        'metrics': {
+            'train_accuracy': round(float(train_score), 4),
+            'test_accuracy': round(float(test_score), 4),
+            'test_f1_macro': round(float(f1_score(y_test, y_pred, average='macro')), 4),
+            'confusion_matrix': cm.tolist()
+        },
+        'files': {'model': os.path.basename(output_path), 'flat': os.path.basename(flat_path)}
+    }
+    with open(metadata_path, 'w') as f:
+        json.dump(metadata, f, indent=2)
+    print(f"✓ Metadata saved to {metadata_path}")
     print("\nTo use the model:")
-    print("  1. Copy trained_model.pkl to cloud-intelligence folder")
+    print("  1. Copy trained_model.pkl and trained_model.npz to cloud-intelligence folder")
     print("  2. RiskClassifier will automatically load and use it")
     
     return model
@@ -185,8 +485,28 @@ def test_model(model_path='trained_model.pkl'):
         print(f"  ✓ Match!" if predicted_level == case['expected'] else "  ✗ Mismatch")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', help='Train on this events.csv (streamed)')
+    parser.add_argument('--data', help='Train on a CSV with feature columns and label')
+    parser.add_argument('--since', type=datetime.fromisoformat, help='Training window start (ISO-8601)')
+    parser.add_argument('--until', type=datetime.fromisoformat, help='Training window end (ISO-8601)')
+    parser.add_argument('--chunksize', type=int, default=100000, help='Rows per chunk when streaming')
+    parser.add_argument('--search', type=int, default=0, help='Random search candidates (0 = fixed parameters)')
+    parser.add_argument('--search-rows', type=int, default=200000, help='Rows the search may use')
+    parser.add_argument('--labels', help='Ground-truth labels for --events (default: labels.csv next to it)')
+    parser.add_argument('--label-column',
+                        help='Use this events.csv column as the label instead of --labels '
+                             '(cloud_risk_level = past classifications, self-labeled)')
+    parser.add_argument('--output', default='trained_model.pkl', help='Model path')
+    args = parser.parse_args()
+
     # Train the model
-    model = train_model()
+    model = train_model(
+        data_path=args.data, output_path=args.output, events_path=args.events,
+        start=args.since, end=args.until, chunksize=args.chunksize,
+        search_iter=args.search, search_rows=args.search_rows,
+        labels_path=args.labels, label_column=args.label_column
+    )
     
     # Test the model
-    test_model()
+    test_model(args.output)
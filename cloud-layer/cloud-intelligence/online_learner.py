@@ -0,0 +1,273 @@
+"""
+Online Learner
+Incremental risk model trained from labeled events on the live stream
+
+Labels come from operators (a confirmation message naming an earlier
+event) or from events that arrive with a label. Labeled feature rows are
+queued by the ingestion path and learned in mini-batches on a background
+thread with StandardScaler + SGDClassifier partial_fit. Every batch is
+scored before it is learned (test-then-train), which gives a running
+accuracy on unseen events. Periodic snapshots are pickled as a plain
+sklearn Pipeline and hot-swapped into RiskClassifier when they are
+accurate enough.
+"""
+
+import copy
+import json
+import os
+import pickle
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+import numpy as np
+
+try:
+    from .risk_classifier import LEVEL_MAP
+except ImportError:
+    from risk_classifier import LEVEL_MAP
+
+LABELS = {level: label for label, level in LEVEL_MAP.items()}
+CLASSES = np.array(sorted(LEVEL_MAP))
+
+# Events scored before being learned that the running accuracy covers
+ACCURACY_WINDOW = 500
+
+
+def feature_row(risk_score, motion_count, features):
+    """Model input row in the RiskClassifier feature order"""
+    return [
+        float(risk_score), float(motion_count),
+        features.get('time_of_day', 12), features.get('day_of_week', 1),
+        features.get('frequency', 0)
+    ]
+
+
+def parse_label(value):
+    """Numeric label from a level name ('HIGH') or class number (None if invalid)"""
+    if isinstance(value, str):
+        return LABELS.get(value.strip().upper())
+    if isinstance(value, (int, float)) and int(value) in LEVEL_MAP:
+        return int(value)
+    return None
+
+
+class OnlineLearner:
+    def __init__(self, classifier=None, snapshot_path='online_model.pkl', batch_size=32,
+                 flush_interval=5.0, snapshot_interval=60.0, min_samples=200,
+                 min_accuracy=0.7, pending_size=10000, queue_size=10000):
+        """
+        Args:
+            classifier: RiskClassifier snapshots are swapped into (None = only save)
+            snapshot_path: Pickle the current model is saved to
+            batch_size: Labeled events per partial_fit
+            flush_interval: Seconds before a partial batch is learned anyway
+            snapshot_interval: Minimum seconds between snapshots
+            min_samples: Labeled events learned before the first snapshot
+            min_accuracy: Running test-then-train accuracy a snapshot needs
+                to go live
+            pending_size: Recent unlabeled events kept for later confirmation
+            queue_size: Labeled events waiting for the trainer; more are dropped
+        """
+        self.classifier = classifier
+        self.snapshot_path = snapshot_path
+        self.metadata_path = os.path.splitext(snapshot_path)[0] + '.json'
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.snapshot_interval = snapshot_interval
+        self.min_samples = min_samples
+        self.min_accuracy = min_accuracy
+        self.pending_size = pending_size
+
+        self._pending = OrderedDict()  # (device_id, timestamp) -> feature row
+        self._pending_lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self._scaler = None
+        self._model = None
+        self._recent = deque(maxlen=ACCURACY_WINDOW)  # 1 / 0 per scored event
+        self._last_snapshot = time.monotonic()
+        self._snapshot_learned = 0  # Samples learned at the last snapshot
+
+        self.stats = {
+            'observed': 0, 'labeled': 0, 'confirmed': 0, 'unmatched': 0,
+            'dropped': 0, 'learned': 0, 'batches': 0, 'snapshots': 0, 'swaps': 0
+        }
+
+    @property
+    def accuracy(self):
+        """Running accuracy of the model on events before it learned them"""
+        return sum(self._recent) / len(self._recent) if self._recent else None
+
+    # ================= INGESTION PATH =================
+
+    def observe(self, device_id, timestamp, row, label=None):
+        """
+        Record an event (never blocks)
+
+        Args:
+            device_id, timestamp: Event identity used by confirm()
+            row: feature_row() of the event
+            label: Level or class if the event arrived labeled
+        """
+        self.stats['observed'] += 1
+        label = parse_label(label) if label is not None else None
+        if label is not None:
+            self._enqueue(row, label)
+            return
+
+        with self._pending_lock:
+            self._pending[(device_id, timestamp)] = row
+            if len(self._pending) > self.pending_size:
+                self._pending.popitem(last=False)
+
+    def confirm(self, device_id, timestamp, label):
+        """
+        Attach an operator label to a recent event
+
+        Returns:
+            True if the event was found and queued for learning
+        """
+        label = parse_label(label)
+        with self._pending_lock:
+            row = self._pending.pop((device_id, timestamp), None)
+        if row is None or label is None:
+            self.stats['unmatched'] += 1
+            return False
+        self.stats['confirmed'] += 1
+        self._enqueue(row, label)
+        return True
+
+    def _enqueue(self, row, label):
+        try:
+            self._queue.put_nowait((row, label))
+            self.stats['labeled'] += 1
+        except queue.Full:
+            self.stats['dropped'] += 1
+
+    # ================= TRAINER =================
+
+    def _new_model(self):
+        from sklearn.linear_model import SGDClassifier
+        from sklearn.preprocessing import StandardScaler
+        return StandardScaler(), SGDClassifier(loss='log_loss', alpha=1e-4, random_state=42)
+
+    def _resume(self):
+        """Continue from the last snapshot, if there is one"""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                pipeline = pickle.load(f)
+            self._scaler, self._model = pipeline.named_steps['scale'], pipeline.named_steps['sgd']
+            if os.path.exists(self.metadata_path):
+                with open(self.metadata_path) as f:
+                    self.stats['learned'] = json.load(f).get('samples', 0)
+            self._snapshot_learned = self.stats['learned']
+            print(f"✓ Online model resumed from {self.snapshot_path} "
+                  f"({self.stats['learned']} samples learned)")
+        except FileNotFoundError:
+            self._scaler, self._model = self._new_model()
+        except Exception as e:
+            print(f"⚠ Could not resume online model ({e}), starting fresh")
+            self._scaler, self._model = self._new_model()
+
+    def learn(self, X, y):
+        """Score then learn one mini-batch"""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        if self.stats['learned']:
+            predicted = self._model.predict(self._scaler.transform(X))
+            self._recent.extend((predicted == y).astype(int).tolist())
+        self._scaler.partial_fit(X)
+        self._model.partial_fit(self._scaler.transform(X), y, classes=CLASSES)
+        self.stats['learned'] += len(y)
+        self.stats['batches'] += 1
+
+    def snapshot(self):
+        """
+        Save the current model and swap it into the classifier if it is good enough
+
+        Returns:
+            True if the snapshot went live
+        """
+        from sklearn.pipeline import Pipeline
+        pipeline = Pipeline([('scale', copy.deepcopy(self._scaler)), ('sgd', copy.deepcopy(self._model))])
+
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            pickle.dump(pipeline, f)
+        os.replace(temp_path, self.snapshot_path)
+
+        accuracy = self.accuracy
+        with open(self.metadata_path, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'model': 'StandardScaler + SGDClassifier (online)',
+                'samples': self.stats['learned'],
+                'running_accuracy': accuracy
+            }, f, indent=2)
+        self.stats['snapshots'] += 1
+        self._last_snapshot = time.monotonic()
+        self._snapshot_learned = self.stats['learned']
+
+        if self.classifier is None:
+            return False
+        if accuracy is None or accuracy < self.min_accuracy:
+            print(f"ℹ Online snapshot saved, not swapped in (accuracy "
+                  f"{'n/a' if accuracy is None else f'{accuracy:.2f}'} < {self.min_accuracy})")
+            return False
+        version = f"{os.path.basename(self.snapshot_path)}@{datetime.now():%Y%m%d-%H%M%S}"
+        try:
+            self.classifier.swap_model(pipeline, version)
+        except Exception as e:
+            print(f"✗ Online snapshot rejected by classifier: {e}")
+            return False
+        self.stats['swaps'] += 1
+        return True
+
+    def _run(self):
+        """Trainer thread: learn mini-batches, snapshot periodically"""
+        X, y = [], []
+        first = None
+        while not self._stop.is_set():
+            try:
+                row, label = self._queue.get(timeout=self.flush_interval)
+                X.append(row)
+                y.append(label)
+                first = first or time.monotonic()
+            except queue.Empty:
+                pass
+
+            if X and (len(X) >= self.batch_size or time.monotonic() - first >= self.flush_interval):
+                try:
+                    self.learn(X, y)
+                except Exception as e:
+                    print(f"✗ Online learning error: {e}")
+                X, y, first = [], [], None
+
+            if (self.stats['learned'] >= self.min_samples
+                    and self.stats['learned'] > self._snapshot_learned
+                    and time.monotonic() - self._last_snapshot >= self.snapshot_interval):
+                try:
+                    self.snapshot()
+                except Exception as e:
+                    print(f"✗ Online snapshot error: {e}")
+                    self._last_snapshot = time.monotonic()
+
+    def start(self):
+        if self._thread is not None:
+            return self._thread
+        self._resume()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='online-learner', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 2.0)
+            self._thread = None
@@ -3,33 +3,326 @@ Cloud Risk Classifier
 Advanced risk classification using rules and optional ML
 """
 
-import pickle
 import os
+import signal
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime
 
+import numpy as np
+
+try:
+    from .flat_forest import FlatForest
+except ImportError:
+    from flat_forest import FlatForest
+
+# Model output -> risk level
+LEVEL_MAP = {0: 'LOW', 1: 'MEDIUM', 2: 'HIGH', 3: 'CRITICAL'}
+
+# Version tag of rule-based classifications
+RULES_VERSION = 'rules'
+
+# [risk_score, motion_count, time_of_day, day_of_week, frequency] samples
+# run through a new model before it goes live
+WARMUP_ROWS = [
+    [10, 0, 14, 2, 0.5],
+    [45, 3, 10, 1, 2.0],
+    [70, 6, 22, 5, 4.5],
+    [90, 10, 3, 6, 8.0],
+]
+
+
+class PredictionCache:
+    """
+    Thread-safe LRU cache of ML predictions for one model
+    
+    Entries belong to the model they were computed with; looking up with a
+    different model object clears the cache first, so a retrained or
+    reloaded model never serves stale answers.
+    """
+    
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._model = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _bind(self, model):
+        if model is not self._model:
+            if self._data:
+                self.invalidations += 1
+            self._data.clear()
+            self._model = model
+    
+    def get(self, model, key):
+        """Return the cached value or None"""
+        with self._lock:
+            self._bind(model)
+            value = self._data.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def put(self, model, key, value):
+        with self._lock:
+            self._bind(model)
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+    
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+    
+    def info(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+
+
+class ModelState:
+    """A loaded model and its version tag, swapped in as one reference"""
+    
+    __slots__ = ('model', 'version', 'signature')
+    
+    def __init__(self, model, version, signature=None):
+        self.model = model
+        self.version = version
+        self.signature = signature  # Model files on disk when it was loaded
+
+
 class RiskClassifier:
-    def __init__(self, model_path='trained_model.pkl'):
+    def __init__(self, model_path='trained_model.pkl', cache_size=4096, lazy=True):
         """
         Initialize classifier
         
         Args:
-            model_path: Path to trained ML model (optional)
+            model_path: Path to trained ML model (optional). A flat forest
+                export next to it (same name, .npz) is preferred; a pickled
+                RandomForestClassifier is flattened on load.
+            cache_size: ML predictions kept in the LRU cache (0 disables it)
+            lazy: Load the model on the first classification instead of now
         """
-        self.model = None
-        self.use_ml = False
+        self.model_path = model_path
+        self.flat_path = os.path.splitext(model_path)[0] + '.npz'
+        self.cache = PredictionCache(cache_size) if cache_size else None
         
-        # Try to load ML model if exists
-        if os.path.exists(model_path):
+        self._state = None  # ModelState; replaced, never mutated
+        self._load_lock = threading.Lock()
+        self._reload_requested = threading.Event()
+        self._stop = threading.Event()
+        self._watcher = None
+        
+        if not lazy:
+            self._ensure_loaded()
+    
+    # ================= MODEL LIFECYCLE =================
+    
+    @property
+    def model(self):
+        return self._ensure_loaded().model
+    
+    @property
+    def use_ml(self):
+        return self.model is not None
+    
+    @property
+    def model_version(self):
+        return self._ensure_loaded().version
+    
+    def _candidates(self):
+        """Model files in load preference order"""
+        return [path for path in (self.flat_path, self.model_path) if os.path.exists(path)]
+    
+    def _signature(self):
+        """Identity of the model files on disk: (path, mtime_ns, size) for each"""
+        signature = []
+        for path in self._candidates():
             try:
-                with open(model_path, 'rb') as f:
-                    self.model = pickle.load(f)
-                self.use_ml = True
-                print("✓ ML model loaded successfully")
+                stat = os.stat(path)
+                signature.append((path, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                continue
+        return tuple(signature)
+    
+    def _load_file(self, path):
+        if path.endswith('.npz'):
+            return FlatForest.load(path)
+        
+        # Only pickled models need pickle (and whatever they pull in, e.g. sklearn)
+        import pickle
+        with open(path, 'rb') as f:
+            model = pickle.load(f)
+        if hasattr(model, 'estimators_') and hasattr(model, 'classes_'):
+            model = FlatForest.from_sklearn(model)
+        return model
+    
+    def _warm_up(self, model):
+        """
+        Run sample events through a candidate model before it goes live
+        
+        Builds the flat forest's compiled evaluator and checks that the
+        model accepts our feature layout and predicts known classes.
+        """
+        n_features = getattr(model, 'n_features_in_', len(WARMUP_ROWS[0]))
+        rows = WARMUP_ROWS if n_features == len(WARMUP_ROWS[0]) else [[0.0] * n_features]
+        for row in rows:
+            if isinstance(model, FlatForest):
+                prediction = model.predict_one(row)
+            else:
+                prediction = model.predict([row])[0]
+            if int(prediction) not in LEVEL_MAP:
+                raise ValueError(f"model predicts unknown class {prediction!r}")
+        model.predict(rows)
+    
+    def _load(self):
+        """Load and warm up the preferred model file (rules when none is usable)"""
+        signature = self._signature()
+        for path in self._candidates():
+            try:
+                stat = os.stat(path)
+                start = time.perf_counter()
+                model = self._load_file(path)
+                self._warm_up(model)
+                version = (f"{os.path.basename(path)}@"
+                           f"{datetime.fromtimestamp(stat.st_mtime):%Y%m%d-%H%M%S}")
+                print(f"✓ ML model loaded successfully ({version}, "
+                      f"{(time.perf_counter() - start) * 1000:.0f} ms incl. warm-up)")
+                return ModelState(model, version, signature)
             except Exception as e:
-                print(f"⚠ Could not load ML model: {e}")
-                print("  Using rule-based classification")
+                print(f"⚠ Could not load ML model {path}: {e}")
+        
+        if self._candidates():
+            print("  Using rule-based classification")
         else:
             print("ℹ No ML model found, using rule-based classification")
+        return ModelState(None, RULES_VERSION, signature)
+    
+    def _ensure_loaded(self):
+        state = self._state
+        if state is None:
+            with self._load_lock:
+                if self._state is None:
+                    self._state = self._load()
+                state = self._state
+        return state
+    
+    def swap_model(self, model, version):
+        """
+        Warm up a model object and make it live atomically
+        
+        Classifications already running finish on the previous model.
+        """
+        self._warm_up(model)
+        with self._load_lock:
+            previous = self._state
+            self._state = ModelState(model, version, previous.signature if previous else None)
+        print(f"🔄 Model swapped: {previous.version if previous else 'none'} → {version}")
+    
+    def reload(self, force=False):
+        """
+        Reload the model files if they changed since the last load
+        
+        The new model is loaded and warmed up while the current one keeps
+        serving, then swapped in with a single reference assignment. A file
+        that fails to load keeps the current model live.
+        
+        Returns:
+            True if a new model went live
+        """
+        with self._load_lock:
+            current = self._state
+            if current is not None and not force and self._signature() == current.signature:
+                return False
+            
+            candidate = self._load()
+            if candidate.model is None and current is not None and current.model is not None:
+                print(f"⚠ Reload failed, keeping {current.version}")
+                # Remember the bad file so the watcher does not retry it every poll
+                self._state = ModelState(current.model, current.version, candidate.signature)
+                return False
+            
+            self._state = candidate
+        print(f"🔄 Model swapped: {current.version if current else 'none'} → {candidate.version}")
+        return True
+    
+    def request_reload(self):
+        """Ask the watcher thread to reload now (safe from signal handlers)"""
+        self._reload_requested.set()
+    
+    def start_watcher(self, interval=5.0):
+        """
+        Reload from a background thread when the model file changes
+        
+        Args:
+            interval: Seconds between model file checks (None = no polling,
+                reload only on request_reload())
+        """
+        if self._watcher is not None:
+            return self._watcher
+        interval = interval or None
+        
+        def run():
+            while not self._stop.is_set():
+                requested = self._reload_requested.wait(interval)
+                self._reload_requested.clear()
+                if self._stop.is_set():
+                    break
+                # Until the first lazy load there is nothing to replace
+                if self._state is None and not requested:
+                    continue
+                try:
+                    self.reload(force=requested)
+                except Exception as e:
+                    print(f"✗ Model reload error: {e}")
+        
+        self._watcher = threading.Thread(target=run, name='model-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+    
+    def install_reload_signal(self, interval=5.0):
+        """
+        Reload on SIGHUP (POSIX only; call from the main thread)
+        
+        Args:
+            interval: Seconds between model file checks as well (None = only
+                on SIGHUP)
+        
+        Returns:
+            True if the handler was installed
+        """
+        if not hasattr(signal, 'SIGHUP'):
+            return False
+        self.start_watcher(interval)
+        signal.signal(signal.SIGHUP, lambda signum, frame: self.request_reload())
+        return True
+    
+    def stop_watcher(self):
+        self._stop.set()
+        self._reload_requested.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=2.0)
+            self._watcher = None
+    
+    # ================= CLASSIFICATION =================
     
     def classify(self, risk_score, motion_count, additional_features=None):
         """
@@ -43,10 +336,22 @@ class RiskClassifier:
         Returns:
             risk_level: 'LOW', 'MEDIUM', 'HIGH', or 'CRITICAL'
         """
-        if self.use_ml and self.model:
-            return self._classify_ml(risk_score, motion_count, additional_features)
-        else:
-            return self._classify_rules(risk_score, motion_count)
+        return self.classify_versioned(risk_score, motion_count, additional_features)[0]
+    
+    def classify_versioned(self, risk_score, motion_count, additional_features=None):
+        """
+        Classify and report which model produced the answer
+        
+        Returns:
+            (risk_level, model_version); the version is 'rules' when the
+            rule-based fallback answered
+        """
+        state = self._ensure_loaded()
+        if state.model is not None:
+            level = self._classify_ml(state.model, risk_score, motion_count, additional_features)
+            if level is not None:
+                return level, state.version
+        return self._classify_rules(risk_score, motion_count), RULES_VERSION
     
     def _classify_rules(self, risk_score, motion_count):
         """
@@ -63,9 +368,12 @@ class RiskClassifier:
         else:
             return 'LOW'
     
-    def _classify_ml(self, risk_score, motion_count, additional_features):
+    def _classify_ml(self, model, risk_score, motion_count, additional_features):
         """
         ML-based classification using trained model
+        
+        Returns:
+            Risk level, or None when the model cannot score this event
         """
         try:
             # Prepare features
@@ -79,16 +387,55 @@ class RiskClassifier:
                     additional_features.get('frequency', 0),      # Events per minute
                 ])
             
+            # Forest predictions are constant within threshold bins
+            if self.cache is not None:
+                if isinstance(model, FlatForest):
+                    key = model.quantize(features)
+                else:
+                    key = tuple(np.asarray(features, dtype=np.float32).tolist())
+                level = self.cache.get(model, key)
+                if level is not None:
+                    return level
+            
             # Predict
-            prediction = self.model.predict([features])[0]
+            if isinstance(model, FlatForest):
+                prediction = model.predict_one(features)
+            else:
+                prediction = model.predict([features])[0]
             
             # Map numeric prediction to level
-            level_map = {0: 'LOW', 1: 'MEDIUM', 2: 'HIGH', 3: 'CRITICAL'}
-            return level_map.get(prediction, 'MEDIUM')
+            level = LEVEL_MAP.get(int(prediction), 'MEDIUM')
+            if self.cache is not None:
+                self.cache.put(model, key, level)
+            return level
             
         except Exception as e:
             print(f"⚠ ML prediction failed: {e}, falling back to rules")
-            return self._classify_rules(risk_score, motion_count)
+            return None
+    
+    def cache_info(self):
+        """Prediction cache statistics (None when caching is disabled)"""
+        return self.cache.info() if self.cache is not None else None
+    
+    def classify_batch(self, feature_rows):
+        """
+        Classify many events at once (vectorized when a model is loaded)
+        
+        Args:
+            feature_rows: Rows of [risk_score, motion_count, time_of_day,
+                day_of_week, frequency]
+            
+        Returns:
+            List of risk levels
+        """
+        rows = np.asarray(feature_rows, dtype=np.float64)
+        model = self.model
+        if model is not None:
+            try:
+                return [LEVEL_MAP.get(int(p), 'MEDIUM') for p in model.predict(rows)]
+            except Exception as e:
+                print(f"⚠ ML batch prediction failed: {e}, falling back to rules")
+        return [self._classify_rules(row[0], row[1]) for row in rows]
     
     def get_risk_details(self, risk_level):
         """Get detailed information about risk level"""
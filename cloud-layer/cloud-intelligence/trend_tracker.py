@@ -0,0 +1,204 @@
+"""
+Trend Tracker
+Streaming per-device risk trend and anomaly state
+
+Each device keeps a time-aware EWMA of its risk score and running sums
+over a sliding time window (bounded by window_seconds and max_samples),
+from which the rolling mean, variance, least-squares slope and z-score
+of the latest event are read. Window min / max come from monotonic
+deques. Every update is O(1) amortized and per-device memory is capped;
+the least recently updated devices are dropped beyond max_devices.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+
+# Slope (risk points per minute) beyond which a trend is rising / falling
+SLOPE_THRESHOLD = 10.0
+# |z-score| of the latest event that counts as an anomaly
+ANOMALY_ZSCORE = 3.0
+# Samples needed before anomalies are reported
+MIN_ANOMALY_SAMPLES = 10
+
+
+def to_epoch(value, default=None):
+    """Epoch seconds from a number or ISO-8601 string (default if unparsable)"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError):
+        return time.time() if default is None else default
+
+
+class DeviceTrend:
+    """Sliding-window state of one device"""
+
+    __slots__ = ('window', 'origin', 'n', 'sum_u', 'sum_u2', 'sum_s', 'sum_s2', 'sum_us',
+                 'maxq', 'minq', 'ewma', 'last_time', 'last_score', 'total')
+
+    def __init__(self):
+        self.window = deque()   # (timestamp, score)
+        self.origin = None      # Time of the oldest sample; u = t - origin keeps sums small
+        self.n = 0
+        self.sum_u = self.sum_u2 = self.sum_s = self.sum_s2 = self.sum_us = 0.0
+        self.maxq = deque()     # Decreasing scores: front is the window max
+        self.minq = deque()     # Increasing scores: front is the window min
+        self.ewma = None
+        self.last_time = None
+        self.last_score = None
+        self.total = 0
+
+    def _add(self, t, s):
+        if self.origin is None:
+            self.origin = t
+        u = t - self.origin
+        self.window.append((t, s))
+        self.n += 1
+        self.sum_u += u
+        self.sum_u2 += u * u
+        self.sum_s += s
+        self.sum_s2 += s * s
+        self.sum_us += u * s
+        while self.maxq and self.maxq[-1] < s:
+            self.maxq.pop()
+        self.maxq.append(s)
+        while self.minq and self.minq[-1] > s:
+            self.minq.pop()
+        self.minq.append(s)
+
+    def _evict(self):
+        t, s = self.window.popleft()
+        u = t - self.origin
+        self.n -= 1
+        self.sum_u -= u
+        self.sum_u2 -= u * u
+        self.sum_s -= s
+        self.sum_s2 -= s * s
+        self.sum_us -= u * s
+        if self.maxq[0] == s:
+            self.maxq.popleft()
+        if self.minq[0] == s:
+            self.minq.popleft()
+
+        if not self.window:
+            self.origin = None
+            self.sum_u = self.sum_u2 = self.sum_s = self.sum_s2 = self.sum_us = 0.0
+            return
+        # Re-base on the new oldest sample: u' = u - d
+        d = self.window[0][0] - self.origin
+        self.sum_u2 -= 2 * d * self.sum_u - self.n * d * d
+        self.sum_us -= d * self.sum_s
+        self.sum_u -= self.n * d
+        self.origin = self.window[0][0]
+
+    def update(self, t, s, window_seconds, max_samples, tau):
+        if self.ewma is None:
+            self.ewma = s
+        else:
+            # Time-aware smoothing: the weight of the past decays with the gap
+            alpha = 1.0 - math.exp(-max(0.0, t - self.last_time) / tau)
+            self.ewma += alpha * (s - self.ewma)
+        self.last_time = t
+        self.last_score = s
+        self.total += 1
+
+        self._add(t, s)
+        cutoff = t - window_seconds
+        while self.n > max_samples or self.window[0][0] < cutoff:
+            self._evict()
+
+    def snapshot(self):
+        n = self.n
+        mean = self.sum_s / n
+        variance = max(0.0, self.sum_s2 / n - mean * mean)
+        std = math.sqrt(variance)
+
+        slope = 0.0
+        denominator = n * self.sum_u2 - self.sum_u * self.sum_u
+        if n >= 2 and denominator > 1e-9:
+            slope = (n * self.sum_us - self.sum_u * self.sum_s) / denominator * 60.0
+
+        zscore = (self.last_score - mean) / std if std > 1e-9 else 0.0
+
+        if slope > SLOPE_THRESHOLD:
+            trend = 'increasing'
+        elif slope < -SLOPE_THRESHOLD:
+            trend = 'decreasing'
+        else:
+            trend = 'stable'
+
+        return {
+            'trend': trend,
+            'avg_score': round(mean, 2),
+            'max_score': self.maxq[0],
+            'min_score': self.minq[0],
+            'ewma': round(self.ewma, 2),
+            'variance': round(variance, 2),
+            'std': round(std, 2),
+            'slope_per_min': round(slope, 2) or 0.0,
+            'zscore': round(zscore, 2),
+            'anomaly': n >= MIN_ANOMALY_SAMPLES and abs(zscore) >= ANOMALY_ZSCORE,
+            'samples': n,
+            'total_events': self.total,
+            'last_score': self.last_score,
+            'last_update': datetime.fromtimestamp(self.last_time).isoformat(),
+            'confidence': 'low' if n < 2 else ('high' if n >= 10 else 'medium')
+        }
+
+
+class TrendTracker:
+    def __init__(self, window_seconds=300.0, max_samples=512, ewma_tau=60.0, max_devices=10000):
+        """
+        Args:
+            window_seconds: Time span of the rolling statistics
+            max_samples: Most samples kept per device (caps memory for chatty devices)
+            ewma_tau: EWMA time constant in seconds
+            max_devices: Devices tracked; the least recently updated are dropped
+        """
+        self.window_seconds = window_seconds
+        self.max_samples = max_samples
+        self.ewma_tau = ewma_tau
+        self.max_devices = max_devices
+        self._devices = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def update(self, device_id, risk_score, timestamp=None):
+        """
+        Add one event and return the device's updated trend
+
+        Args:
+            device_id: Device the event came from
+            risk_score: Event risk score
+            timestamp: Epoch seconds or ISO-8601 string (defaults to now)
+
+        Returns:
+            Trend dict (see DeviceTrend.snapshot)
+        """
+        t = to_epoch(timestamp)
+        with self._lock:
+            state = self._devices.get(device_id)
+            if state is None:
+                state = self._devices[device_id] = DeviceTrend()
+                if len(self._devices) > self.max_devices:
+                    self._devices.popitem(last=False)
+            else:
+                self._devices.move_to_end(device_id)
+            state.update(t, float(risk_score), self.window_seconds, self.max_samples, self.ewma_tau)
+            return state.snapshot()
+
+    def get(self, device_id):
+        """Current trend of a device (None if it has not been seen)"""
+        with self._lock:
+            state = self._devices.get(device_id)
+            return state.snapshot() if state is not None else None
+
+    def devices(self):
+        with self._lock:
+            return list(self._devices)
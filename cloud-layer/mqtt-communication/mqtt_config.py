@@ -1,15 +1,54 @@
-BROKER = "xx.xx.xx.xx"
-PORT = 1883
-
-CLIENT_ID = "Cloud_Subscriber_01"
-
-TOPIC_EVENTS  = "project/risk"
-TOPIC_STATUS  = "project/status"
-TOPIC_CONTROL = "project/relay"
-
-SUBSCRIBE_TOPICS = [
-    TOPIC_EVENTS,
-    TOPIC_STATUS
-]
-
-QOS = 1
+BROKER = "xx.xx.xx.xx"
+PORT = 1883
+
+CLIENT_ID = "Cloud_Subscriber_01"
+
+TOPIC_EVENTS  = "project/risk"
+TOPIC_STATUS  = "project/status"
+TOPIC_CONTROL = "project/relay"
+
+SUBSCRIBE_TOPICS = [
+    TOPIC_EVENTS,
+    TOPIC_STATUS
+]
+
+QOS = 1
+
+# Prometheus /metrics port for the subscriber process (None to disable)
+METRICS_PORT = 9101
+
+# Seconds between checks for a retrained classifier model (None to disable;
+# SIGHUP triggers an immediate reload)
+MODEL_RELOAD_INTERVAL = 5.0
+
+# Relay commands per device: seconds to coalesce bursts into one command and
+# minimum seconds between two relay transitions
+RELAY_COALESCE_WINDOW = 0.25
+RELAY_MIN_INTERVAL = 2.0
+
+# Action executor: seconds of alerts grouped into one email / SMS, per-delivery
+# timeout, retries of a failed delivery and items a channel may have queued
+ALERT_BATCH_INTERVAL = 5.0
+ACTION_TIMEOUT = 5.0
+ACTION_RETRIES = 2
+ACTION_QUEUE_SIZE = 1000
+
+# Static zone metadata per edge device, merged into the classifier / decision
+# features (a 'location' containing "restricted" or "secure" adds NOTIFY_SECURITY)
+DEVICE_ZONES = {
+    # "ESP32_EDGE_01": {"zone": "entrance", "location": "Main entrance"},
+}
+
+# Labels arrive on TOPIC_LABELS as {"device_id", "timestamp", "label"} naming
+# an earlier event, or in an event payload's LABEL_FIELD. They are always kept
+# in storage/labels.csv (ground truth for model_train.py --events).
+# Online learning: also learn from them live and hot-swap snapshots into the
+# classifier.
+ONLINE_LEARNING = False
+TOPIC_LABELS = "project/labels"
+LABEL_FIELD = "label"
+ONLINE_MODEL_PATH = "online_model.pkl"
+ONLINE_BATCH_SIZE = 32
+ONLINE_SNAPSHOT_INTERVAL = 60.0  # Seconds between snapshots
+ONLINE_MIN_SAMPLES = 200         # Labeled events before the first snapshot
+ONLINE_MIN_ACCURACY = 0.7        # Running accuracy a snapshot needs to go live
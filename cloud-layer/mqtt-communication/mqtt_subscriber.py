@@ -2,23 +2,74 @@ import paho.mqtt.client as mqtt
 import json
 import sys
 import os
+import time
 
 # Add parent directory to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'api-layer'))
 
-from cloud_intelligence.risk_classifier import RiskClassifier
+from cloud_intelligence.risk_classifier import LEVEL_MAP, RiskClassifier
 from cloud_intelligence.decision_engine import DecisionEngine
+from cloud_intelligence.action_executor import ActionExecutor, default_channels
+from cloud_intelligence.feature_store import FeatureStore
+from cloud_intelligence.online_learner import OnlineLearner, feature_row, parse_label
+from cloud_intelligence.trend_tracker import TrendTracker, to_epoch
 from storage.storage_manager import StorageManager
+from monitoring.metrics import REGISTRY, SIZE_BUCKETS, start_http_server
+from command_scheduler import CommandScheduler
 import mqtt_config
 
 # 🔥 Global variable for dashboard access
 LATEST_EVENT = {}
 
+# ================== METRICS ==================
+STAGE_SECONDS = REGISTRY.histogram(
+    'cloud_stage_seconds', 'Time spent in each message processing stage', ['stage']
+)
+STAGE_DECODE = STAGE_SECONDS.labels('decode')
+STAGE_CLASSIFY = STAGE_SECONDS.labels('classify')
+STAGE_DECIDE = STAGE_SECONDS.labels('decide')
+STAGE_STORE = STAGE_SECONDS.labels('store')
+STAGE_TOTAL = STAGE_SECONDS.labels('total')
+
+MESSAGE_BYTES = REGISTRY.histogram(
+    'mqtt_message_bytes', 'Size of received MQTT payloads', buckets=SIZE_BUCKETS
+)
+MESSAGES = REGISTRY.counter('mqtt_messages_total', 'MQTT messages processed successfully')
+MESSAGE_ERRORS = REGISTRY.counter('mqtt_message_errors_total', 'MQTT messages that failed', ['reason'])
+CLASSIFIER_CACHE = REGISTRY.gauge(
+    'classifier_cache', 'Risk classifier prediction cache statistics', ['stat']
+)
+QUEUE_DEPTH = REGISTRY.gauge('queue_depth', 'Items waiting in internal queues', ['queue'])
+ACTIONS = REGISTRY.gauge('action_executor', 'Action executor delivery statistics', ['channel', 'stat'])
+ONLINE = REGISTRY.gauge('online_learner', 'Online learner statistics', ['stat'])
+
 class MQTTSubscriber:
     def __init__(self):
         """Initialize MQTT Subscriber with cloud intelligence"""
         self.classifier = RiskClassifier()
+        if self.classifier.cache is not None:
+            for stat in ('hit_rate', 'size', 'hits', 'misses', 'evictions', 'invalidations'):
+                CLASSIFIER_CACHE.labels(stat).set_function(
+                    lambda stat=stat: self.classifier.cache_info()[stat]
+                )
         self.decision_engine = DecisionEngine()
+        self.trends = TrendTracker()
+        self.features = FeatureStore(zones=mqtt_config.DEVICE_ZONES)
+
+        self.learner = None
+        if mqtt_config.ONLINE_LEARNING:
+            self.learner = OnlineLearner(
+                self.classifier,
+                snapshot_path=mqtt_config.ONLINE_MODEL_PATH,
+                batch_size=mqtt_config.ONLINE_BATCH_SIZE,
+                snapshot_interval=mqtt_config.ONLINE_SNAPSHOT_INTERVAL,
+                min_samples=mqtt_config.ONLINE_MIN_SAMPLES,
+                min_accuracy=mqtt_config.ONLINE_MIN_ACCURACY
+            )
+            for stat in self.learner.stats:
+                ONLINE.labels(stat).set_function(lambda stat=stat: self.learner.stats[stat])
+            ONLINE.labels('accuracy').set_function(lambda: self.learner.accuracy or 0.0)
         self.storage = StorageManager(storage_dir=os.path.join(
             os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
             'storage'
@@ -32,11 +83,48 @@ class MQTTSubscriber:
         self.client.on_message = self.on_message
         self.client.on_disconnect = self.on_disconnect
 
+        # Relay state per device: bursts coalesce, only transitions are
+        # published and they are spaced RELAY_MIN_INTERVAL apart
+        self.relay_scheduler = CommandScheduler(
+            self.send_relay_command,
+            coalesce_window=mqtt_config.RELAY_COALESCE_WINDOW,
+            min_interval=mqtt_config.RELAY_MIN_INTERVAL,
+            state_commands={'RELAY_ON': 'relay', 'RELAY_OFF': 'relay'}
+        )
+        QUEUE_DEPTH.labels('relay_commands').set_function(self.relay_scheduler.pending_count)
+
+        # Actions run on per-channel worker threads, never in on_message
+        self.executor = ActionExecutor(
+            default_channels(
+                storage=self.storage,
+                alert_batch_interval=mqtt_config.ALERT_BATCH_INTERVAL,
+                timeout=mqtt_config.ACTION_TIMEOUT,
+                retries=mqtt_config.ACTION_RETRIES
+            ),
+            queue_size=mqtt_config.ACTION_QUEUE_SIZE
+        )
+        QUEUE_DEPTH.labels('actions').set_function(self.executor.pending_count)
+        for channel, stats in self.executor.stats.items():
+            for stat in stats:
+                ACTIONS.labels(channel, stat).set_function(
+                    lambda stats=stats, stat=stat: stats[stat]
+                )
+
+    def send_relay_command(self, device_id, command):
+        """Publish a coalesced relay command on the control topic"""
+        info = self.client.publish(
+            mqtt_config.TOPIC_CONTROL,
+            json.dumps({'device_id': device_id, 'command': command}),
+            qos=mqtt_config.QOS
+        )
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise ConnectionError(f"relay command not queued (rc {info.rc})")
+
     def on_connect(self, client, userdata, flags, rc):
         """Callback when client connects to broker"""
         if rc == 0:
             print("✓ Connected to MQTT Broker!")
-            for topic in mqtt_config.SUBSCRIBE_TOPICS:
+            for topic in list(mqtt_config.SUBSCRIBE_TOPICS) + [mqtt_config.TOPIC_LABELS]:
                 client.subscribe(topic, qos=mqtt_config.QOS)
                 print(f"  Subscribed to: {topic}")
         else:
@@ -51,27 +139,51 @@ class MQTTSubscriber:
         """Handle incoming MQTT messages"""
         global LATEST_EVENT
 
+        start = time.perf_counter()
+        MESSAGE_BYTES.observe(len(msg.payload))
+
         try:
             payload = json.loads(msg.payload.decode())
+            t_decoded = time.perf_counter()
+            STAGE_DECODE.observe(t_decoded - start)
+
+            if msg.topic == mqtt_config.TOPIC_LABELS:
+                self.on_label(payload)
+                return
 
             risk_score = payload.get('risk_score', 0)
             motion_count = payload.get('motion_count', 0)
+            device_id = payload.get('device_id', 'UNKNOWN')
+            event_time = to_epoch(payload.get('timestamp'))
+
+            # Per-device features (time, event frequency, zone), updated incrementally
+            features = self.features.update(device_id, event_time)
 
             # Cloud intelligence classification
-            cloud_risk_level = self.classifier.classify(risk_score, motion_count)
+            cloud_risk_level, model_version = self.classifier.classify_versioned(
+                risk_score, motion_count, features
+            )
+            t_classified = time.perf_counter()
+            STAGE_CLASSIFY.observe(t_classified - t_decoded)
+
+            # Per-device trend, updated incrementally
+            trend = self.trends.update(device_id, risk_score, event_time)
 
             # Decision engine
             decision = self.decision_engine.make_decision(
                 cloud_risk_level,
                 risk_score,
                 motion_count,
-                context={'time_of_day': 14, 'day_of_week': 3}
+                context=dict(features, trend=trend),
+                device_id=device_id
             )
+            t_decided = time.perf_counter()
+            STAGE_DECIDE.observe(t_decided - t_classified)
 
             # Prepare event data
             event_data = {
                 'timestamp': payload.get('timestamp', ''),
-                'device_id': payload.get('device_id', 'UNKNOWN'),
+                'device_id': device_id,
                 'edge_risk_level': payload.get('risk_level', 'LOW'),
                 'cloud_risk_level': cloud_risk_level,
                 'risk_score': risk_score,
@@ -83,27 +195,89 @@ class MQTTSubscriber:
             }
 
             # Save to CSV
+            t_store = time.perf_counter()
             self.storage.log_event(event_data)
+            t_stored = time.perf_counter()
+            STAGE_STORE.observe(t_stored - t_store)
+            self.relay_scheduler.submit(device_id, f"RELAY_{event_data['relay_state']}")
+            self.executor.submit(decision, event_data)
+
+            # Ground truth that arrived with the event is kept for training
+            label = parse_label(payload.get(mqtt_config.LABEL_FIELD))
+            if label is not None:
+                self.storage.log_label({
+                    'timestamp': event_data['timestamp'], 'device_id': device_id,
+                    'label': LEVEL_MAP[label], 'source': 'event'
+                })
+
+            # Queue for online learning (labeled now, or confirmed later by
+            # device_id + the stored timestamp)
+            if self.learner is not None:
+                self.learner.observe(
+                    device_id, event_data['timestamp'],
+                    feature_row(risk_score, motion_count, features),
+                    label=payload.get(mqtt_config.LABEL_FIELD)
+                )
+
+            STAGE_TOTAL.observe(t_stored - start)
+            MESSAGES.inc()
 
             # 🔥 Store latest event for dashboard API
-            LATEST_EVENT = event_data
+            LATEST_EVENT = dict(event_data, model_version=model_version, trend=trend)
 
             print("\n📥 Event Processed:")
             print(f"   Edge Risk: {payload.get('risk_level', 'UNKNOWN')}")
-            print(f"   Cloud Risk: {cloud_risk_level}")
-            print(f"   Risk Score: {risk_score}")
+            print(f"   Cloud Risk: {cloud_risk_level} ({model_version})")
+            print(f"   Risk Score: {risk_score} (trend {trend['trend']}, "
+                  f"{trend['slope_per_min']:+.1f}/min, z {trend['zscore']:+.1f})")
             print(f"   Motion Count: {motion_count}")
             print(f"   Actions: {', '.join(decision['actions'])}")
 
         except json.JSONDecodeError:
+            MESSAGE_ERRORS.labels('decode').inc()
             print(f"✗ Invalid JSON received: {msg.payload}")
 
         except Exception as e:
+            MESSAGE_ERRORS.labels('processing').inc()
             print(f"✗ Error processing message: {e}")
 
+    def on_label(self, payload):
+        """
+        Operator confirmation of an earlier event's risk level
+
+        The label is stored in labels.csv (ground truth for model_train.py)
+        and, with online learning on, attached to the pending event.
+        """
+        label = parse_label(payload.get('label'))
+        device_id = payload.get('device_id', 'UNKNOWN')
+        timestamp = payload.get('timestamp')
+        if label is None or not timestamp:
+            print(f"⚠ Invalid label message: {payload}")
+            return
+
+        self.storage.log_label({
+            'timestamp': timestamp, 'device_id': device_id,
+            'label': LEVEL_MAP[label], 'source': 'operator'
+        })
+        print(f"🏷  Label {LEVEL_MAP[label]} for {device_id} @ {timestamp}")
+
+        if self.learner is not None and not self.learner.confirm(device_id, timestamp, label):
+            print(f"⚠ Label for unknown or expired event, not learned online: {payload}")
+
     def start(self):
         """Connect to broker and start listening"""
         try:
+            if mqtt_config.METRICS_PORT:
+                start_http_server(mqtt_config.METRICS_PORT)
+                print(f"📈 Metrics → http://localhost:{mqtt_config.METRICS_PORT}/metrics")
+
+            if mqtt_config.MODEL_RELOAD_INTERVAL:
+                self.classifier.start_watcher(mqtt_config.MODEL_RELOAD_INTERVAL)
+
+            if self.learner is not None:
+                self.learner.start()
+                print(f"🧠 Online learning on, labels from {mqtt_config.TOPIC_LABELS}")
+
             print(f"Connecting to MQTT broker: {mqtt_config.BROKER}:{mqtt_config.PORT}")
             self.client.connect(mqtt_config.BROKER, mqtt_config.PORT, keepalive=60)
             self.client.loop_forever()
@@ -113,6 +287,11 @@ class MQTTSubscriber:
     def stop(self):
         """Disconnect safely"""
         self.client.disconnect()
+        self.classifier.stop_watcher()
+        self.relay_scheduler.close()
+        self.executor.close()
+        if self.learner is not None:
+            self.learner.stop()
 
 
 # 🔥 Dashboard API will call this
@@ -122,6 +301,8 @@ def get_latest_event():
 
 if __name__ == "__main__":
     subscriber = MQTTSubscriber()
+    # kill -HUP <pid> swaps in a retrained model without dropping messages
+    subscriber.classifier.install_reload_signal(mqtt_config.MODEL_RELOAD_INTERVAL)
     try:
         subscriber.start()
     except KeyboardInterrupt:
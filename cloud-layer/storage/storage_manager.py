@@ -1,6 +1,70 @@
 import csv
+import io
 import os
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+
+try:
+    from .timeseries import ColumnSeries
+except ImportError:
+    from timeseries import ColumnSeries
+
+# Numeric events.csv columns kept in memory for get_series
+SERIES_FIELDS = ('risk_score', 'motion_count')
+
+
+def _to_epoch(value):
+    """Epoch seconds of an ISO-8601 string (naive = local time), None if invalid"""
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def _local_epochs(timestamps):
+    """
+    Epoch seconds of a pandas Series of ISO-8601 strings, vectorized
+
+    Naive timestamps are local time, like datetime.timestamp(): they are
+    parsed as wall-clock seconds and shifted by the UTC offset of their
+    hour (computed once per distinct hour). Timestamps with an offset are
+    converted exactly; a mix of both falls back to parsing the ones with
+    an offset one by one. Invalid timestamps become NaN.
+    """
+    import pandas as pd
+
+    strings = timestamps.fillna('')
+    aware = None
+    try:
+        parsed = pd.to_datetime(strings, format='ISO8601', errors='coerce')
+    except ValueError:
+        # Naive and offset timestamps mixed (or several offsets)
+        aware = strings.str.contains(r'(?:Z|[+-]\d\d:?\d\d)$', regex=True).to_numpy()
+        parsed = pd.to_datetime(strings.where(~aware, ''), format='ISO8601', errors='coerce')
+
+    if parsed.dt.tz is not None:
+        return (parsed - pd.Timestamp(0, tz='UTC')).dt.total_seconds().to_numpy()
+
+    wall = (parsed - pd.Timestamp(0)).dt.total_seconds().to_numpy()
+    epochs = np.full(len(wall), np.nan)
+    valid = ~np.isnan(wall)
+    hours, inverse = np.unique(np.floor(wall[valid] / 3600.0) * 3600.0, return_inverse=True)
+    offsets = np.empty(len(hours))
+    for i, hour in enumerate(hours.tolist()):
+        try:
+            offsets[i] = hour - (datetime(1970, 1, 1) + timedelta(seconds=hour)).timestamp()
+        except (OverflowError, OSError, ValueError):
+            offsets[i] = np.nan
+    epochs[valid] = wall[valid] - offsets[inverse.reshape(-1)]
+
+    if aware is not None:
+        for i in np.flatnonzero(aware).tolist():
+            epoch = _to_epoch(strings.iat[i])
+            epochs[i] = np.nan if epoch is None else epoch
+    return epochs
+
 
 class StorageManager:
     """Manages event and alert storage"""
@@ -18,6 +82,11 @@ class StorageManager:
         self.storage_dir = storage_dir
         self.events_file = os.path.join(storage_dir, 'events.csv')
         self.alerts_file = os.path.join(storage_dir, 'alerts.csv')
+        self.labels_file = os.path.join(storage_dir, 'labels.csv')
+        
+        # Columnar copy of SERIES_FIELDS per device, extended as rows are appended
+        self._series = {'offset': 0, 'devices': {}}
+        self._series_lock = threading.Lock()
         
         # Create storage directory if it doesn't exist
         os.makedirs(storage_dir, exist_ok=True)
@@ -44,6 +113,14 @@ class StorageManager:
                     'timestamp', 'device_id', 'alert_level', 'channels', 'message'
                 ])
                 writer.writeheader()
+        
+        # Labels CSV (ground truth for training)
+        if not os.path.exists(self.labels_file):
+            with open(self.labels_file, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=[
+                    'timestamp', 'device_id', 'label', 'source', 'labeled_at'
+                ])
+                writer.writeheader()
     
     def log_event(self, event_data):
         """
@@ -95,6 +172,30 @@ class StorageManager:
             print(f"✗ Error logging alert: {e}")
             return False
     
+    def log_label(self, label_data):
+        """
+        Log a ground-truth label for a stored event
+        
+        Args:
+            label_data: Dict with the event's timestamp and device_id (as
+                stored in events.csv), the label (risk level) and its source
+        """
+        try:
+            with open(self.labels_file, 'a', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=[
+                    'timestamp', 'device_id', 'label', 'source', 'labeled_at'
+                ])
+                
+                if not label_data.get('labeled_at'):
+                    label_data['labeled_at'] = datetime.now().isoformat()
+                
+                writer.writerow(label_data)
+            
+            return True
+        except Exception as e:
+            print(f"✗ Error logging label: {e}")
+            return False
+    
     def get_recent_events(self, count=10):
         """
         Get the most recent events
@@ -117,6 +218,41 @@ class StorageManager:
             print(f"✗ Error reading events: {e}")
             return []
     
+    def tail_events(self, offset=0):
+        """
+        Read events appended since a previous call
+        
+        Args:
+            offset: Byte offset returned by the previous call (0 = from the start)
+            
+        Returns:
+            (events, offset) where events is a list of dicts and offset is
+            where the next call continues. A file that shrank (recreated)
+            is read again from the start.
+        """
+        try:
+            with open(self.events_file, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell()
+                if offset > size:
+                    offset = 0
+                f.seek(0)
+                header = f.readline()
+                if not header.endswith(b'\n'):
+                    return [], 0
+                start = max(offset, len(header))
+                f.seek(start)
+                data = f.read()
+            
+            # Only complete lines; a row still being written is read next time
+            end = data.rfind(b'\n') + 1
+            fieldnames = next(csv.reader([header.decode()]))
+            reader = csv.DictReader(data[:end].decode().splitlines(), fieldnames=fieldnames)
+            return list(reader), start + end
+        except Exception as e:
+            print(f"✗ Error reading events: {e}")
+            return [], offset
+    
     def get_statistics(self):
         """
         Get statistics about stored events
@@ -159,3 +295,106 @@ class StorageManager:
         except Exception as e:
             print(f"✗ Error calculating statistics: {e}")
             return {}
+    
+    def _update_series(self):
+        """
+        Extend the in-memory series with rows appended since the last call
+        
+        events.csv is read from the byte offset reached last time; the new
+        rows are parsed with pandas and appended to one ColumnSeries per
+        device. Only the first call reads the whole file. Costs 24 bytes
+        of memory per stored event.
+        """
+        import pandas as pd
+        
+        series = self._series
+        with open(self.events_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size < series['offset']:
+                # File recreated: load it again from the start
+                series['offset'], series['devices'] = 0, {}
+            f.seek(0)
+            header = f.readline()
+            if not header.endswith(b'\n'):
+                return
+            series['offset'] = max(series['offset'], len(header))
+            f.seek(series['offset'])
+            data = f.read()
+        
+        # Only complete lines; a row still being written is read next time
+        data = data[:data.rfind(b'\n') + 1]
+        if not data:
+            return
+        series['offset'] += len(data)
+        
+        columns = next(csv.reader([header.decode()]))
+        frame = pd.read_csv(
+            io.BytesIO(data), header=None, names=columns,
+            usecols=['timestamp', 'device_id', *SERIES_FIELDS],
+            dtype={'timestamp': str, 'device_id': str}, on_bad_lines='skip'
+        )
+        times = _local_epochs(frame['timestamp'])
+        values = np.column_stack([
+            pd.to_numeric(frame[field], errors='coerce').to_numpy(dtype=np.float64)
+            for field in SERIES_FIELDS
+        ])
+        keep = ~np.isnan(times) & ~np.isnan(values).any(axis=1)
+        devices = frame['device_id'].fillna('').to_numpy()[keep]
+        times, values = times[keep], values[keep]
+        
+        # Group rows by device with one stable sort, keeping file order
+        order = np.argsort(devices, kind='stable')
+        devices, times, values = devices[order], times[order], values[order]
+        bounds = np.flatnonzero(np.r_[True, devices[1:] != devices[:-1], True])
+        for lo, hi in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            column = series['devices'].get(devices[lo])
+            if column is None:
+                column = series['devices'][devices[lo]] = ColumnSeries(len(SERIES_FIELDS))
+            column.append(times[lo:hi], values[lo:hi])
+    
+    def get_series(self, device_id, start, end, fields=SERIES_FIELDS):
+        """
+        Get numeric columns for one device within a time range
+        
+        Served from numpy arrays kept per device (see _update_series): two
+        binary searches and a slice, so the cost does not depend on the
+        size of the store.
+        
+        Args:
+            device_id: Device to read (None for all devices)
+            start: datetime (naive = local time), inclusive lower bound
+            end: datetime (naive = local time), inclusive upper bound
+            fields: Columns to extract (from SERIES_FIELDS)
+            
+        Returns:
+            (timestamps, values) where timestamps is a float64 array of
+            epoch seconds (sorted for a single device) and values maps each
+            field to a float64 array
+        """
+        columns = [SERIES_FIELDS.index(field) for field in fields]
+        # Compare as epoch seconds so naive and aware datetimes both work
+        start_ts, end_ts = start.timestamp(), end.timestamp()
+        
+        try:
+            with self._series_lock:
+                self._update_series()
+                devices = self._series['devices']
+                if device_id is None:
+                    selected = [column.select(start_ts, end_ts) for column in devices.values()]
+                elif device_id in devices:
+                    selected = [devices[device_id].select(start_ts, end_ts)]
+                else:
+                    selected = []
+        except (OSError, ValueError) as e:
+            print(f"✗ Error reading series: {e}")
+            selected = []
+        
+        if not selected:
+            return np.empty(0), {field: np.empty(0) for field in fields}
+        times = np.concatenate([t for t, _ in selected])
+        values = np.concatenate([v for _, v in selected])
+        return times, {
+            field: values[:, column]
+            for field, column in zip(fields, columns)
+        }
@@ -0,0 +1,164 @@
+"""
+Time-Series Downsampling
+Shape-preserving reduction of long event series to a fixed number of points,
+and the in-memory columnar series they are cut from
+"""
+
+import numpy as np
+
+METHODS = ('lttb', 'minmax')
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling
+
+    Args:
+        x: Sorted 1-D array of timestamps
+        y: 1-D array of values
+        threshold: Number of points to keep
+
+    Returns:
+        Array of selected indices into x/y
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket i covers [edges[i], edges[i + 1]); the last "bucket" is the final point
+    every = (n - 2) / (threshold - 2)
+    edges = np.append((np.arange(threshold - 2) * every).astype(np.intp) + 1, n - 1)
+    counts = np.diff(np.append(edges, n))
+    avg_x = np.add.reduceat(x, edges) / counts
+    avg_y = np.add.reduceat(y, edges) / counts
+
+    indices = np.empty(threshold, dtype=np.intp)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        bx = x[start:end]
+        by = y[start:end]
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (by - y[a]) - (x[a] - bx) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(area.argmax())
+        indices[i + 1] = a
+
+    return indices
+
+
+def minmax_buckets(x, y, threshold):
+    """
+    Keep the minimum and maximum of each bucket (preserves spikes)
+
+    Returns:
+        Sorted array of selected indices (at most threshold entries)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    buckets = threshold // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.intp)
+
+    indices = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        chunk = y[start:end]
+        lo = start + int(chunk.argmin())
+        hi = start + int(chunk.argmax())
+        indices.extend((lo, hi) if lo <= hi else (hi, lo))
+
+    return np.unique(np.asarray(indices, dtype=np.intp))
+
+
+def downsample(x, y, points, method='lttb'):
+    """
+    Reduce a series to at most `points` points
+
+    Args:
+        x: Timestamps (epoch seconds), sorted ascending
+        y: Values
+        points: Maximum number of output points
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        (x, y) numpy arrays
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if method == 'lttb':
+        indices = lttb(x, y, points)
+    else:
+        indices = minmax_buckets(x, y, points)
+    return x[indices], y[indices]
+
+
+class ColumnSeries:
+    """
+    Growable columnar arrays of one device: epoch seconds and one float64
+    column per field
+
+    Appends are amortized O(1). Rows are kept sorted by time (out-of-order
+    appends are sorted lazily on the next read), so a time range is found
+    with two binary searches and returned as a numpy slice.
+    """
+
+    def __init__(self, n_fields, capacity=1024):
+        self.n = 0
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty((capacity, n_fields), dtype=np.float64)
+        self._sorted = True
+
+    def __len__(self):
+        return self.n
+
+    def append(self, times, values):
+        """
+        Add rows
+
+        Args:
+            times: 1-D array of epoch seconds
+            values: 2-D array with one column per field
+        """
+        k = len(times)
+        if not k:
+            return
+        needed = self.n + k
+        if needed > len(self.times):
+            capacity = max(needed, 2 * len(self.times))
+            self.times = np.resize(self.times, capacity)
+            self.values = np.resize(self.values, (capacity, self.values.shape[1]))
+        self.times[self.n:needed] = times
+        self.values[self.n:needed] = values
+        if self._sorted:
+            added = self.times[max(0, self.n - 1):needed]
+            self._sorted = bool(np.all(added[1:] >= added[:-1]))
+        self.n = needed
+
+    def select(self, start, end):
+        """
+        Rows with start <= time <= end (epoch seconds)
+
+        Returns:
+            (times, values) copies, sorted by time
+        """
+        if not self._sorted:
+            order = np.argsort(self.times[:self.n], kind='stable')
+            self.times[:self.n] = self.times[:self.n][order]
+            self.values[:self.n] = self.values[:self.n][order]
+            self._sorted = True
+        lo = np.searchsorted(self.times[:self.n], start, side='left')
+        hi = np.searchsorted(self.times[:self.n], end, side='right')
+        return self.times[lo:hi].copy(), self.values[lo:hi].copy()
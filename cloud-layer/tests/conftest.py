@@ -0,0 +1,14 @@
+"""
+Test setup: make the cloud-layer modules importable the way the services
+import them (each directory on sys.path)
+"""
+
+import os
+import sys
+
+CLOUD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for subdir in ('storage', 'cloud-intelligence', 'api-layer', 'monitoring'):
+    path = os.path.join(CLOUD_DIR, subdir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
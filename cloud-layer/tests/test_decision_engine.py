@@ -0,0 +1,68 @@
+"""
+Tests for the per-device alert cooldowns of the DecisionEngine
+"""
+
+import random
+
+from decision_engine import DecisionEngine
+
+
+def sends(engine, level, device_id, now):
+    return engine.make_decision(level, 50, 1, device_id=device_id, now=now)['send_alert']
+
+
+def test_cooldown_per_device_and_level():
+    engine = DecisionEngine(alert_cooldown=10)
+    assert sends(engine, 'HIGH', 'A', 0.0)
+    assert not sends(engine, 'HIGH', 'A', 5.0)
+    # Other devices and other levels have their own cooldowns
+    assert sends(engine, 'HIGH', 'B', 5.0)
+    assert sends(engine, 'MEDIUM', 'A', 5.0)
+    assert sends(engine, 'HIGH', 'A', 10.0)
+
+
+def test_critical_and_low_ignore_cooldown():
+    engine = DecisionEngine(alert_cooldown=10)
+    assert sends(engine, 'CRITICAL', 'A', 0.0)
+    assert sends(engine, 'CRITICAL', 'A', 0.1)
+    assert not sends(engine, 'LOW', 'A', 0.2)
+
+
+def test_realert_keeps_the_newer_expiry():
+    engine = DecisionEngine(alert_cooldown=10)
+    assert sends(engine, 'HIGH', 'A', 0.0)
+    assert sends(engine, 'HIGH', 'A', 10.0)
+    # The expiry pushed at t=0 pops at t=15 but must not drop the t=10 alert
+    assert not sends(engine, 'HIGH', 'A', 15.0)
+    assert sends(engine, 'HIGH', 'A', 20.0)
+
+
+def test_expired_entries_are_dropped():
+    engine = DecisionEngine(alert_cooldown=10)
+    for i in range(1000):
+        sends(engine, 'HIGH', f'DEV_{i}', i * 0.01)
+    assert len(engine._last_alert) == 1000
+
+    sends(engine, 'LOW', 'DEV_0', 100.0)
+    assert engine._last_alert == {}
+    assert engine._expiry == []
+
+
+def test_matches_a_scan_of_every_alert():
+    rng = random.Random(11)
+    engine = DecisionEngine(alert_cooldown=3)
+    history = {}
+    now = 0.0
+    for _ in range(5000):
+        now += rng.uniform(0, 0.2)
+        device_id = f'DEV_{rng.randrange(20)}'
+        level = rng.choice(['MEDIUM', 'HIGH'])
+
+        last = history.get((device_id, level))
+        expected = last is None or now - last >= 3
+        assert sends(engine, level, device_id, now) == expected
+        if expected:
+            history[(device_id, level)] = now
+
+    # Memory follows only the keys that alerted within the last cooldown
+    assert len(engine._last_alert) == sum(1 for t in history.values() if now - t < 3)
@@ -0,0 +1,79 @@
+"""
+Tests for FlatForest parity with the sklearn forest it was exported from
+"""
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from flat_forest import FlatForest
+
+
+@pytest.fixture(scope='module')
+def data():
+    rng = np.random.default_rng(3)
+    X = rng.uniform(0, 100, (600, 5))
+    # Integer-valued columns like motion_count/frequency put many rows on split thresholds
+    X[:, 1] = np.round(X[:, 1] / 10)
+    X[:, 3] = np.round(X[:, 3] / 20)
+    y = np.where(X[:, 0] + 5 * X[:, 1] > 90, 'HIGH', np.where(X[:, 0] > 40, 'MEDIUM', 'LOW'))
+    flip = rng.random(len(y)) < 0.1
+    y[flip] = rng.choice(['LOW', 'MEDIUM', 'HIGH'], flip.sum())
+    return X[:400], y[:400], X[400:]
+
+
+@pytest.fixture(scope='module')
+def model(data):
+    X_train, y_train, _ = data
+    # Exact parity holds for single-threaded sklearn, which sums trees in order
+    return RandomForestClassifier(n_estimators=25, max_depth=8, random_state=0, n_jobs=1).fit(X_train, y_train)
+
+
+@pytest.fixture(scope='module')
+def forest(model):
+    return FlatForest.from_sklearn(model)
+
+
+def test_predict_proba_is_bit_identical(model, forest, data):
+    _, _, X_test = data
+    assert np.array_equal(forest.predict_proba(X_test), model.predict_proba(X_test))
+
+
+def test_apply_reaches_sklearn_leaves(model, forest, data):
+    _, _, X_test = data
+    local = forest.apply(X_test) - forest.roots[:, None]
+    assert np.array_equal(local, model.apply(X_test).T)
+
+
+def test_predict_and_predict_one_match(model, forest, data):
+    _, _, X_test = data
+    expected = model.predict(X_test)
+    assert np.array_equal(forest.predict(X_test), expected)
+    assert [forest.predict_one(row) for row in X_test] == expected.tolist()
+
+
+def test_save_load_roundtrip(model, forest, data, tmp_path):
+    _, _, X_test = data
+    path = tmp_path / 'model.npz'
+    forest.save(path)
+    loaded = FlatForest.load(path)
+    assert loaded.n_trees == forest.n_trees and loaded.n_nodes == forest.n_nodes
+    assert np.array_equal(loaded.predict_proba(X_test), model.predict_proba(X_test))
+
+
+def test_quantize_is_an_exact_cache_key(forest, data):
+    _, _, X_test = data
+    by_bins = {}
+    for row in X_test:
+        by_bins.setdefault(forest.quantize(row), set()).add(tuple(forest.apply(row)[:, 0]))
+    # Rows sharing bins reach the same leaf in every tree
+    assert all(len(paths) == 1 for paths in by_bins.values())
+
+
+def test_wrong_feature_count_raises(forest):
+    with pytest.raises(ValueError):
+        forest.predict_proba(np.zeros((2, 4)))
+    with pytest.raises(ValueError):
+        forest.predict_one([1.0, 2.0])
+    with pytest.raises(ValueError):
+        forest.quantize([1.0, 2.0])
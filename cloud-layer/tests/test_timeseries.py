@@ -0,0 +1,166 @@
+"""
+Tests for time-series downsampling and the per-device columnar series
+"""
+
+import csv
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from storage_manager import SERIES_FIELDS, StorageManager
+from timeseries import ColumnSeries, downsample, lttb, minmax_buckets
+
+
+def reference_lttb(x, y, threshold):
+    """Straightforward per-point LTTB (Steinarsson 2013)"""
+    n = len(x)
+    every = (n - 2) / (threshold - 2)
+    sampled = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket; the last bucket is the final point
+        if i == threshold - 3:
+            next_start, next_end = n - 1, n
+        else:
+            next_start, next_end = int((i + 1) * every) + 1, int((i + 2) * every) + 1
+        avg_x = sum(x[next_start:next_end]) / (next_end - next_start)
+        avg_y = sum(y[next_start:next_end]) / (next_end - next_start)
+
+        start = int(i * every) + 1
+        end = n - 1 if i == threshold - 3 else int((i + 1) * every) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(best)
+        a = best
+    sampled.append(n - 1)
+    return sampled
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(7)
+    x = np.cumsum(rng.uniform(0.5, 2.0, 5000))
+    y = np.sin(x / 50.0) * 40 + rng.normal(0, 5, len(x))
+    return x, y
+
+
+@pytest.mark.parametrize('threshold', [3, 10, 102, 500, 4999])
+def test_lttb_matches_reference(series, threshold):
+    x, y = series
+    assert lttb(x, y, threshold).tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+
+
+def test_lttb_keeps_endpoints_and_order(series):
+    x, y = series
+    indices = lttb(x, y, 200)
+    assert len(indices) == 200
+    assert indices[0] == 0 and indices[-1] == len(x) - 1
+    assert np.all(np.diff(indices) > 0)
+
+
+def test_lttb_short_series_unchanged():
+    x = np.arange(5.0)
+    assert lttb(x, x, 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb(x, x, 2).tolist() == [0, 1, 2, 3, 4]
+
+
+def test_minmax_keeps_every_bucket_extreme(series):
+    x, y = series
+    threshold = 100
+    indices = minmax_buckets(x, y, threshold)
+
+    assert len(indices) <= threshold
+    assert np.all(np.diff(indices) > 0)
+    edges = np.linspace(0, len(x), threshold // 2 + 1).astype(int)
+    kept = set(indices.tolist())
+    for start, end in zip(edges[:-1], edges[1:]):
+        assert start + int(y[start:end].argmin()) in kept
+        assert start + int(y[start:end].argmax()) in kept
+
+
+def test_minmax_keeps_spike():
+    y = np.zeros(10000)
+    y[4321] = 100.0
+    x = np.arange(len(y), dtype=np.float64)
+    _, ys = downsample(x, y, 50, method='minmax')
+    assert ys.max() == 100.0
+
+
+def test_downsample_rejects_unknown_method(series):
+    x, y = series
+    with pytest.raises(ValueError):
+        downsample(x, y, 100, method='average')
+
+
+def test_column_series_grows_and_selects():
+    column = ColumnSeries(2, capacity=4)
+    times = np.arange(100, dtype=np.float64)
+    values = np.column_stack([times * 2, times * 3])
+    for lo in range(0, 100, 7):
+        column.append(times[lo:lo + 7], values[lo:lo + 7])
+
+    assert len(column) == 100
+    t, v = column.select(10, 20)
+    assert t.tolist() == list(range(10, 21))
+    assert v[:, 0].tolist() == [i * 2.0 for i in range(10, 21)]
+    assert v[:, 1].tolist() == [i * 3.0 for i in range(10, 21)]
+
+
+def test_column_series_sorts_out_of_order_rows():
+    column = ColumnSeries(1)
+    column.append(np.array([5.0, 6.0]), np.array([[50.0], [60.0]]))
+    column.append(np.array([1.0, 9.0, 3.0]), np.array([[10.0], [90.0], [30.0]]))
+
+    t, v = column.select(0, 10)
+    assert t.tolist() == [1.0, 3.0, 5.0, 6.0, 9.0]
+    assert v[:, 0].tolist() == [10.0, 30.0, 50.0, 60.0, 90.0]
+    assert column.select(7, 8)[0].size == 0
+
+
+def _write_events(storage, rows):
+    with open(storage.events_file, 'a', newline='') as f:
+        writer = csv.writer(f)
+        for timestamp, device_id, risk, count in rows:
+            writer.writerow([timestamp, device_id, 'LOW', 'LOW', risk, count, 'OFF', '', False, 'info'])
+
+
+def test_get_series_reads_appended_rows(tmp_path):
+    storage = StorageManager(str(tmp_path))
+    base = datetime(2024, 3, 1, 12, 0, 0)
+    _write_events(storage, [
+        ((base + timedelta(seconds=i)).isoformat(), f'DEV_{i % 2}', i, i % 3)
+        for i in range(10)
+    ])
+
+    times, values = storage.get_series('DEV_0', base, base + timedelta(seconds=9))
+    assert times.tolist() == [(base + timedelta(seconds=i)).timestamp() for i in range(0, 10, 2)]
+    assert values['risk_score'].tolist() == [0.0, 2.0, 4.0, 6.0, 8.0]
+    assert set(values) == set(SERIES_FIELDS)
+
+    # Rows appended later are picked up on the next read
+    _write_events(storage, [((base + timedelta(seconds=20)).isoformat(), 'DEV_0', 55, 1)])
+    times, values = storage.get_series('DEV_0', base + timedelta(seconds=5), base + timedelta(minutes=1))
+    assert values['risk_score'].tolist() == [6.0, 8.0, 55.0]
+
+    times, _ = storage.get_series(None, base, base + timedelta(minutes=1))
+    assert len(times) == 11
+    assert storage.get_series('DEV_9', base, base + timedelta(minutes=1))[0].size == 0
+
+
+def test_get_series_mixes_naive_and_offset_timestamps(tmp_path):
+    storage = StorageManager(str(tmp_path))
+    naive = datetime(2024, 3, 1, 12, 0, 0)
+    aware = datetime(2024, 3, 1, 12, 0, 30).astimezone()
+    _write_events(storage, [
+        (naive.isoformat(), 'DEV', 1, 0),
+        (aware.isoformat(), 'DEV', 2, 0),
+        ('not a time', 'DEV', 3, 0),
+    ])
+
+    times, values = storage.get_series('DEV', naive, naive + timedelta(minutes=1))
+    assert times.tolist() == [naive.timestamp(), aware.timestamp()]
+    assert values['risk_score'].tolist() == [1.0, 2.0]
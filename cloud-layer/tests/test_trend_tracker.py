@@ -0,0 +1,79 @@
+"""
+Tests for the streaming per-device TrendTracker against numpy over the window
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from trend_tracker import TrendTracker
+
+
+def window_of(events, window_seconds, max_samples):
+    """Samples the tracker should hold after the last event"""
+    cutoff = events[-1][0] - window_seconds
+    inside = [(t, s) for t, s in events if t >= cutoff]
+    return inside[-max_samples:]
+
+
+@pytest.mark.parametrize('window_seconds,max_samples', [(60.0, 512), (1e9, 25), (30.0, 40)])
+def test_running_sums_match_numpy(window_seconds, max_samples):
+    rng = random.Random(5)
+    tracker = TrendTracker(window_seconds=window_seconds, max_samples=max_samples)
+    events = []
+    t = 1.7e9  # Realistic epoch seconds: large offsets are where naive sums lose precision
+    for i in range(3000):
+        t += rng.expovariate(1.0)
+        score = 40 + 30 * math.sin(i / 50.0) + rng.gauss(0, 8)
+        events.append((t, score))
+        trend = tracker.update('DEV', score, t)
+
+        if i % 97:
+            continue
+        times, scores = map(np.array, zip(*window_of(events, window_seconds, max_samples)))
+        assert trend['samples'] == len(scores)
+        assert trend['avg_score'] == pytest.approx(scores.mean(), abs=0.006)
+        assert trend['variance'] == pytest.approx(scores.var(), abs=0.006 + 1e-6 * scores.var())
+        assert trend['max_score'] == scores.max()
+        assert trend['min_score'] == scores.min()
+        if len(scores) >= 2:
+            slope = np.polyfit(times - times[0], scores, 1)[0] * 60.0
+            assert trend['slope_per_min'] == pytest.approx(slope, abs=0.006)
+            zscore = (scores[-1] - scores.mean()) / scores.std()
+            assert trend['zscore'] == pytest.approx(zscore, abs=0.006)
+
+
+def test_ewma_is_time_aware():
+    tracker = TrendTracker(ewma_tau=10.0)
+    tracker.update('DEV', 0.0, 100.0)
+    trend = tracker.update('DEV', 100.0, 110.0)
+    assert trend['ewma'] == pytest.approx(100.0 * (1 - math.exp(-1.0)), abs=0.005)
+
+    # A simultaneous event does not move the average
+    assert tracker.update('DEV', 0.0, 110.0)['ewma'] == trend['ewma']
+
+
+def test_trend_direction_and_anomaly():
+    tracker = TrendTracker()
+    for i in range(20):
+        trend = tracker.update('UP', 10.0 + i * 5, 1000.0 + i * 6)
+    assert trend['trend'] == 'increasing'
+    assert trend['slope_per_min'] == pytest.approx(50.0)
+
+    for i in range(20):
+        tracker.update('FLAT', 20.0 + (i % 2), 1000.0 + i)
+    assert tracker.update('FLAT', 95.0, 1021.0)['anomaly']
+
+
+def test_least_recently_updated_devices_are_dropped():
+    tracker = TrendTracker(max_devices=3)
+    for device_id in ('A', 'B', 'C'):
+        tracker.update(device_id, 10, 1000.0)
+    tracker.update('A', 20, 1001.0)
+    tracker.update('D', 30, 1002.0)
+
+    assert tracker.devices() == ['C', 'A', 'D']
+    assert tracker.get('B') is None
+    assert tracker.get('A')['total_events'] == 2
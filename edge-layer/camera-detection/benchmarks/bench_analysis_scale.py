@@ -0,0 +1,147 @@
+"""
+Analysis Scale Benchmark
+Replays recorded clips through MotionAnalyzer at several analysis
+resolutions and reports CPU time per frame against detection accuracy,
+using full-resolution BGR analysis as the reference
+
+Usage:
+    python bench_analysis_scale.py clip1.mp4 clip2.avi
+    python bench_analysis_scale.py --synthetic 300    # no clips at hand
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from motion_analyzer import MotionAnalyzer
+
+# (label, width, height, grayscale); the first entry is the reference
+SCALES = [
+    ('640x480 bgr', 640, 480, False),
+    ('640x480 gray', 640, 480, True),
+    ('320x240 gray', 320, 240, True),
+    ('160x120 gray', 160, 120, True),
+]
+
+
+def load_clip(path, max_frames):
+    """Decode a clip into memory so decoding is not part of the timing"""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def synthetic_clip(n_frames, seed=0):
+    """Noisy static scene with a few moving blobs, for machines without clips"""
+    rng = np.random.default_rng(seed)
+    background = rng.integers(30, 90, (480, 640, 3), dtype=np.uint8)
+    frames = []
+    for i in range(n_frames):
+        frame = background.copy()
+        frame += rng.integers(0, 6, frame.shape, dtype=np.uint8)
+        if (i // 60) % 2:
+            x = (i * 6) % 560
+            cv2.rectangle(frame, (x, 120), (x + 70, 300), (210, 210, 210), -1)
+            cv2.circle(frame, (640 - x, 380), 25, (40, 200, 200), -1)
+        frames.append(frame)
+    return frames
+
+
+def scale_config(width, height, grayscale):
+    return type('ScaleConfig', (Config,), {
+        'ANALYSIS_WIDTH': width,
+        'ANALYSIS_HEIGHT': height,
+        'ANALYSIS_GRAYSCALE': grayscale,
+    })
+
+
+def run_scale(frames, width, height, grayscale):
+    """
+    Returns:
+        (cpu_ms_per_frame, list of (motion_detected, motion_count, motion_area))
+    """
+    analyzer = MotionAnalyzer(scale_config(width, height, grayscale))
+    results = []
+    start = time.process_time()
+    for frame in frames:
+        data = analyzer.detect(frame)
+        results.append((data['motion_detected'], data['motion_count'], data['motion_area']))
+    cpu = time.process_time() - start
+    return cpu / len(frames) * 1000, results
+
+
+def accuracy(results, reference):
+    """Detection agreement with the reference run"""
+    detected = np.array([r[0] for r in results])
+    ref_detected = np.array([r[0] for r in reference])
+    counts = np.array([r[1] for r in results], dtype=float)
+    ref_counts = np.array([r[1] for r in reference], dtype=float)
+    areas = np.array([r[2] for r in results], dtype=float)
+    ref_areas = np.array([r[2] for r in reference], dtype=float)
+
+    true_pos = np.sum(detected & ref_detected)
+    precision = true_pos / max(1, detected.sum())
+    recall = true_pos / max(1, ref_detected.sum())
+    area_error = np.abs(areas - ref_areas)[ref_detected] / np.maximum(ref_areas[ref_detected], 1)
+
+    return {
+        'agreement': float(np.mean(detected == ref_detected)),
+        'precision': float(precision),
+        'recall': float(recall),
+        'count_mae': float(np.mean(np.abs(counts - ref_counts))),
+        'area_rel_error': float(area_error.mean()) if area_error.size else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('clips', nargs='*', help='Recorded video files')
+    parser.add_argument('--max-frames', type=int, default=1500, help='Frames used per clip')
+    parser.add_argument('--synthetic', type=int, default=0, help='Add a synthetic clip with N frames')
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)  # Per-frame CPU cost, not how many cores OpenCV grabs
+
+    clips = [(path, load_clip(path, args.max_frames)) for path in args.clips]
+    if args.synthetic:
+        clips.append(('synthetic', synthetic_clip(args.synthetic)))
+    clips = [(name, frames) for name, frames in clips if frames]
+    if not clips:
+        parser.error("no readable clips (pass video files or --synthetic N)")
+
+    print("=" * 78)
+    print("Analysis Scale Benchmark (reference: full-resolution BGR)")
+    print("=" * 78)
+
+    for name, frames in clips:
+        print(f"\n🎞  {name}: {len(frames)} frames")
+        print(f"  {'scale':14s} {'cpu ms/frame':>12s} {'speedup':>8s} {'agree':>7s} "
+              f"{'prec':>6s} {'recall':>6s} {'count MAE':>9s} {'area err':>9s}")
+
+        reference = None
+        reference_ms = None
+        for label, width, height, grayscale in SCALES:
+            ms, results = run_scale(frames, width, height, grayscale)
+            if reference is None:
+                reference, reference_ms = results, ms
+            acc = accuracy(results, reference)
+            print(f"  {label:14s} {ms:12.2f} {reference_ms / ms:7.1f}x {acc['agreement']:7.1%} "
+                  f"{acc['precision']:6.1%} {acc['recall']:6.1%} {acc['count_mae']:9.2f} "
+                  f"{acc['area_rel_error']:9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+detect_motion Microbenchmark
+Frames per second and per-frame temporary allocations of the motion
+analysis hot loop, compared with the original allocate-per-frame
+implementation, plus the cost of the contour stage alone against a
+connectedComponentsWithStats labeling of the same masks
+
+Usage:
+    python bench_detect_motion.py
+    python bench_detect_motion.py --frames 1000 --clip recording.mp4
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from motion_analyzer import MotionAnalyzer
+from bench_analysis_scale import load_clip, scale_config, synthetic_clip
+
+
+class LegacyDetector:
+    """The original MotionDetector.detect_motion path, kept as a reference"""
+
+    def __init__(self, config):
+        self.config = config
+        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=500, varThreshold=16, detectShadows=True
+        )
+
+    def detect(self, frame):
+        frame = cv2.resize(frame, (640, 480))
+        fg_mask = self.bg_subtractor.apply(frame)
+        _, fg_mask = cv2.threshold(fg_mask, 200, 255, cv2.THRESH_BINARY)
+
+        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
+        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel)
+
+        contours, _ = cv2.findContours(
+            fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+        )
+
+        motion_area = 0
+        motion_count = 0
+        for c in contours:
+            area = cv2.contourArea(c)
+            if area > self.config.MIN_CONTOUR_AREA:
+                motion_area += area
+                motion_count += 1
+
+        return {
+            "motion_detected": motion_count > 0,
+            "motion_area": motion_area,
+            "motion_count": motion_count,
+            "fg_mask": fg_mask
+        }
+
+
+def measure_fps(detector, frames, warmup=30):
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+    start = time.perf_counter()
+    for frame in frames:
+        detector.detect(frame)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def measure_allocations(detector, frames, warmup=30):
+    """
+    Average temporary memory per frame
+
+    tracemalloc's peak above the pre-frame level captures every buffer the
+    frame allocated (numpy/OpenCV outputs included), however briefly.
+
+    Returns:
+        (kb_per_frame, kb_retained_total)
+    """
+    for frame in frames[:warmup]:
+        detector.detect(frame)
+
+    tracemalloc.start()
+    start_current, _ = tracemalloc.get_traced_memory()
+    peaks = 0
+    for frame in frames:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        detector.detect(frame)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks += peak - before
+    end_current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peaks / len(frames) / 1024, (end_current - start_current) / 1024
+
+
+def capture_masks(analyzer, frames):
+    """Closed motion masks the analyzer produced for a clip, one per analyzed zone"""
+    masks = []
+    analyze = analyzer._analyze_zone
+
+    def capture(zone, frame, learning_rate=-1):
+        result = analyze(zone, frame, learning_rate)
+        masks.append(zone.closed.copy())
+        return result
+
+    analyzer._analyze_zone = capture
+    for frame in frames:
+        analyzer.detect(frame)
+    return masks
+
+
+def contour_areas(mask, labels):
+    """The MotionAnalyzer area stage"""
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    return np.fromiter(map(cv2.contourArea, contours), dtype=np.float64, count=len(contours))
+
+
+def component_areas(mask, labels):
+    """Labeling alternative: component pixel counts into a preallocated labels buffer"""
+    _, _, stats, _ = cv2.connectedComponentsWithStats(mask, labels=labels, connectivity=8, ltype=cv2.CV_32S)
+    return stats[1:, cv2.CC_STAT_AREA]
+
+
+def measure_area_stage(area_fn, masks, repeat=3):
+    """Average microseconds per mask"""
+    labels = np.empty(masks[0].shape, dtype=np.int32)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for mask in masks:
+            area_fn(mask, labels)
+    return (time.perf_counter() - start) / (repeat * len(masks)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--frames', type=int, default=600, help='Frames per measurement')
+    parser.add_argument('--clip', help='Use a recorded clip instead of synthetic frames')
+    args = parser.parse_args()
+
+    cv2.setNumThreads(1)
+    frames = load_clip(args.clip, args.frames) if args.clip else synthetic_clip(args.frames)
+    if not frames:
+        parser.error(f"could not read frames from {args.clip}")
+
+    # (label, factory); a fresh detector per measurement keeps background models equal
+    default_config = scale_config(Config.ANALYSIS_WIDTH, Config.ANALYSIS_HEIGHT, Config.ANALYSIS_GRAYSCALE)
+    candidates = [
+        ('legacy 640x480 bgr', lambda: LegacyDetector(Config)),
+        ('analyzer 640x480 bgr', lambda: MotionAnalyzer(scale_config(640, 480, False))),
+        (f'analyzer {Config.ANALYSIS_WIDTH}x{Config.ANALYSIS_HEIGHT} '
+         f'{"gray" if Config.ANALYSIS_GRAYSCALE else "bgr"}', lambda: MotionAnalyzer(default_config)),
+    ]
+
+    print("=" * 66)
+    print(f"detect_motion Microbenchmark ({len(frames)} frames)")
+    print("=" * 66)
+    print(f"  {'implementation':26s} {'fps':>9s} {'temp KB/frame':>14s} {'retained KB':>12s}")
+
+    for label, factory in candidates:
+        fps = measure_fps(factory(), frames)
+        kb_per_frame, retained = measure_allocations(factory(), frames)
+        print(f"  {label:26s} {fps:9.1f} {kb_per_frame:14.1f} {retained:12.1f}")
+
+    masks = capture_masks(MotionAnalyzer(default_config), frames)
+    if masks:
+        coverage = np.mean([np.count_nonzero(m) / m.size for m in masks]) * 100
+        print(f"\nArea stage ({len(masks)} masks of {masks[0].shape[1]}x{masks[0].shape[0]}, "
+              f"{coverage:.1f}% foreground)")
+        for label, area_fn in [('findContours + contourArea', contour_areas),
+                               ('connectedComponentsWithStats', component_areas)]:
+            print(f"  {label:30s} {measure_area_stage(area_fn, masks):9.1f} us/mask")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Edge Replay Benchmark
+Replays clips through the full MotionDetector pipeline as fast as they
+decode (no camera, no serial port, no windows) and reports throughput,
+per-stage timings and the risk score trace. Results can be saved as a
+JSON baseline and later runs compared against it.
+
+Stages:
+    decode   - reading the next frame from the file / image directory
+    analyze  - background subtraction and contours (MotionAnalyzer)
+    risk     - RiskCalculator on video time
+    output   - ESP32 update through the null serial sink
+
+Usage:
+    python replay_benchmark.py clip1.mp4 frames_dir/
+    python replay_benchmark.py --synthetic 600            # no clips at hand
+    python replay_benchmark.py --synthetic 600 --update-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import Config
+from main import MotionDetector
+from bench_analysis_scale import synthetic_clip
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'replay_baseline.json')
+STAGES = ('decode', 'analyze', 'risk', 'output')
+
+
+def replay_config(source, gate=Config.MOTION_GATE):
+    return type('ReplayConfig', (Config,), {
+        'VIDEO_SOURCE': source,
+        'SERIAL_PORT': None,
+        'SHOW_DEBUG_WINDOWS': False,
+        'RECORD_VIDEO': False,
+        'MOTION_GATE': gate,
+    })
+
+
+def write_synthetic_clip(n_frames, directory):
+    """Encode the synthetic scene to a file so replay includes decoding"""
+    path = os.path.join(directory, f'synthetic_{n_frames}.avi')
+    if not os.path.exists(path):
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 15, (640, 480))
+        for frame in synthetic_clip(n_frames):
+            writer.write(frame)
+        writer.release()
+    return path
+
+
+def stage_summary(samples):
+    """Per-stage timings (seconds) -> mean / p50 / p95 in ms"""
+    ms = np.asarray(samples) * 1000
+    return {
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p95_ms': round(float(np.percentile(ms, 95)), 3)
+    }
+
+
+def replay(source, max_frames, gate=Config.MOTION_GATE):
+    """
+    Run one clip through the pipeline, every frame, in order
+
+    Returns:
+        Dict with frames, fps, per-stage stats, static-scene gate stats
+        and the risk trace
+    """
+    detector = MotionDetector(replay_config(source, gate), realtime=False)
+    cap = detector.cap
+    timings = {stage: [] for stage in STAGES}
+    trace = []
+
+    start = time.perf_counter()
+    try:
+        while len(trace) < max_frames:
+            t0 = time.perf_counter()
+            ret, frame = cap.read()
+            if not ret:
+                break
+            t1 = time.perf_counter()
+
+            stage_times = {}
+            result = detector.process_frame(frame, now=cap.timestamp, timings=stage_times)
+
+            t2 = time.perf_counter()
+            detector.output_result(result)
+            t3 = time.perf_counter()
+
+            timings['decode'].append(t1 - t0)
+            timings['analyze'].append(stage_times['analyze'])
+            timings['risk'].append(stage_times['risk'])
+            timings['output'].append(t3 - t2)
+            trace.append(round(float(result['risk_score']), 2))
+    finally:
+        elapsed = time.perf_counter() - start
+        cap.release()
+        detector.serial.close()
+
+    if not trace:
+        return None
+
+    levels = [MotionDetector.risk_level_for(score) for score in trace]
+    return {
+        'frames': len(trace),
+        'fps': round(len(trace) / elapsed, 2),
+        'stages': {stage: stage_summary(samples) for stage, samples in timings.items()},
+        'risk': {
+            'mean': round(float(np.mean(trace)), 2),
+            'max': max(trace),
+            'high_frames': levels.count('HIGH'),
+            'medium_frames': levels.count('MEDIUM')
+        },
+        'gate': {
+            key: round(value, 4) for key, value in detector.analyzer.gate_report().items()
+        } if gate else None,
+        'trace': trace
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results against a baseline
+
+    Throughput regressions beyond the threshold are failures; any change in
+    the risk trace is reported as well, since the same clip should score
+    the same unless detection behaviour was changed on purpose.
+
+    Returns:
+        List of regression messages (empty when everything matches)
+    """
+    messages = []
+    for clip, stats in results.items():
+        base = baseline.get('results', {}).get(clip)
+        if not base:
+            continue
+        if stats['fps'] < base['fps'] * (1 - threshold):
+            messages.append(f"{clip}: {stats['fps']} fps < baseline {base['fps']} fps")
+
+        n = min(len(stats['trace']), len(base['trace']))
+        if n:
+            diff = np.abs(np.subtract(stats['trace'][:n], base['trace'][:n]))
+            level_changes = sum(
+                MotionDetector.risk_level_for(a) != MotionDetector.risk_level_for(b)
+                for a, b in zip(stats['trace'][:n], base['trace'][:n])
+            )
+            if diff.max() > 0.01 or len(stats['trace']) != len(base['trace']):
+                messages.append(
+                    f"{clip}: risk trace changed (max diff {diff.max():.2f}, "
+                    f"{level_changes} level changes, {len(stats['trace'])} vs {len(base['trace'])} frames)"
+                )
+    return messages
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('clips', nargs='*', help='Video files or image directories')
+    parser.add_argument('--synthetic', type=int, default=0, help='Add a synthetic clip with N frames')
+    parser.add_argument('--max-frames', type=int, default=100000, help='Frames replayed per clip')
+    parser.add_argument('--no-gate', action='store_true', help='Disable the static-scene gate')
+    parser.add_argument('--threads', type=int, default=1, help='cv2.setNumThreads (0 = OpenCV default)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--output', help='Also write this run\'s results to a JSON file')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Allowed fps regression (0.2 = 20%%)')
+    parser.add_argument('--update-baseline', action='store_true', help='Write results as the new baseline')
+    args = parser.parse_args()
+
+    if args.threads:
+        cv2.setNumThreads(args.threads)
+
+    clips = list(args.clips)
+    if args.synthetic:
+        clips.append(write_synthetic_clip(args.synthetic, tempfile.gettempdir()))
+    if not clips:
+        parser.error("no clips (pass video files / image directories or --synthetic N)")
+
+    print("=" * 78)
+    print("Edge Replay Benchmark")
+    print("=" * 78)
+
+    results = {}
+    for clip in clips:
+        stats = replay(clip, args.max_frames, gate=Config.MOTION_GATE and not args.no_gate)
+        if stats is None:
+            print(f"✗ No frames read from {clip}")
+            continue
+        name = os.path.basename(os.path.normpath(clip))
+        results[name] = stats
+
+        print(f"\n🎞  {name}: {stats['frames']} frames, {stats['fps']:.1f} fps")
+        print(f"  {'stage':8s} {'mean ms':>8s} {'p50 ms':>8s} {'p95 ms':>8s}")
+        for stage, s in stats['stages'].items():
+            print(f"  {stage:8s} {s['mean_ms']:8.2f} {s['p50_ms']:8.2f} {s['p95_ms']:8.2f}")
+        risk = stats['risk']
+        print(f"  risk: mean {risk['mean']:.1f}, max {risk['max']:.1f}, "
+              f"{risk['medium_frames']} MEDIUM / {risk['high_frames']} HIGH frames")
+        if stats['gate']:
+            gate = stats['gate']
+            print(f"  gate: {gate['hit_rate']:.1%} frames skipped, check {gate['gate_ms']:.3f} ms, "
+                  f"full analysis {gate['full_ms']:.2f} ms, saved {gate['saved_ms']:.2f} ms/frame "
+                  f"({gate['saved_fraction']:.0%} of analysis CPU)")
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'opencv': cv2.__version__,
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✓ Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nℹ No baseline at {args.baseline}; run with --update-baseline to record one")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n✗ {len(regressions)} difference(s) from baseline:")
+        for message in regressions:
+            print(f"  - {message}")
+        return 1
+
+    print(f"\n✓ Matches baseline (fps within {args.threshold:.0%}, same risk trace)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
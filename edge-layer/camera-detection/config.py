@@ -7,22 +7,78 @@ class Config:
     # Camera Settings
     CAMERA_INDEX = 0  # 0 for default webcam, 1 for external camera
     
+    # Replay Source
+    VIDEO_SOURCE = None  # None = live CAMERA_INDEX; or a video file / image directory path
+    REPLAY_FPS = None    # Frame rate for image directories (default 15) or to override a file's
+    
+    # Multi-Camera Node (multi_camera.py)
+    CAMERA_INDICES = [0, 1, 2, 3]  # One analysis process per camera
+    CAMERA_STALE_SECONDS = 2.0     # Ignore cameras that stopped reporting
+    MULTI_CAMERA_BONUS = 10        # Node risk added per extra camera seeing motion
+    
     # Serial Communication
     SERIAL_PORT = 'COM16'  # Windows: 'COM16', Linux: '/dev/ttyUSB0', Mac: '/dev/cu.usbserial-*'
+                           # None = no ESP32 (null sink for headless / replay runs)
     BAUD_RATE = 115200
+    SERIAL_HEARTBEAT_SECONDS = 1.0  # Resend an unchanged state this often (ESP32 link watchdog)
     
     # Motion Detection Thresholds
-    MIN_CONTOUR_AREA = 500  # Minimum area to consider as motion (pixels)
+    MIN_CONTOUR_AREA = 500  # Minimum area to consider as motion (pixels at FRAME_WIDTH x FRAME_HEIGHT)
+    
+    # Frame Geometry
+    FRAME_WIDTH = 640       # Reference frame size; areas and scores are expressed in these pixels
+    FRAME_HEIGHT = 480
+    ANALYSIS_WIDTH = 320    # Background subtraction runs at this size (e.g. 640x480, 320x240, 160x120)
+    ANALYSIS_HEIGHT = 240
+    ANALYSIS_GRAYSCALE = True  # Analyze a single gray channel instead of BGR
+    
+    # Static-Scene Gate (skips background subtraction on unchanged frames)
+    MOTION_GATE = True            # Compare a thumbnail with the last analyzed motion-free frame first
+    GATE_WIDTH = 80               # Thumbnail size for the comparison
+    GATE_HEIGHT = 60
+    GATE_PIXEL_DELTA = 15         # Gray-level change that counts a thumbnail pixel as changed
+    GATE_CHANGED_FRACTION = 0.002 # Scene is static while at most this share of pixels changed
+    GATE_BG_UPDATE_EVERY = 10     # Run the full path at least every N frames to keep learning the background
+    
+    # Regions of Interest
+    # Polygons in FRAME_WIDTH x FRAME_HEIGHT pixels. Only the zones' bounding
+    # crops are analyzed; leave empty to analyze the whole frame.
+    #   weight:   multiplies the zone's area/count risk scores
+    #   min_area: minimum contour area for this zone (defaults to MIN_CONTOUR_AREA)
+    ZONES = []
+    # Example:
+    # ZONES = [
+    #     {'name': 'front_door', 'polygon': [(40, 60), (220, 60), (220, 470), (40, 470)],
+    #      'weight': 1.5, 'min_area': 400},
+    #     {'name': 'fence_line', 'polygon': [(300, 300), (640, 250), (640, 330), (300, 380)],
+    #      'weight': 1.0},
+    # ]
     
     # Risk Thresholds (0-100 scale)
     RISK_LOW_THRESHOLD = 30      # Below this = LOW risk
     RISK_MEDIUM_THRESHOLD = 60   # Below this = MEDIUM, above = HIGH
     
+    # Risk History
+    RISK_HISTORY_SIZE = 30         # Motion detections kept for statistics
+    RISK_HISTORY_SECONDS = 10.0    # ...and only those younger than this (None = no limit)
+    FREQUENCY_TAU_SECONDS = 2.0    # Time constant of the motion frequency EWMA
+    
     # Processing
-    FRAME_SKIP = 1  # Process every N frames (1 = process all)
+    FRAME_SKIP = 1  # Process every N frames (1 = process all); floor in every mode
+    TARGET_FPS = 15  # Active analysis rate cap (0 = as fast as possible)
+    IDLE_FPS = 3  # Analysis rate while the scene is quiet
+    IDLE_AFTER_SECONDS = 5.0  # Quiet time before dropping back to IDLE_FPS
+    STATS_INTERVAL = 5.0  # Seconds between per-stage fps/latency reports
+    
+    # Event Recording (RECORD_VIDEO)
+    RECORD_VIDEO = True          # Keep a pre-event ring buffer and save clips on HIGH risk
+    RECORD_DIR = 'recordings'    # Clip output directory
+    RECORD_FPS = 10              # Frames per second buffered and written
+    RECORD_PRE_SECONDS = 5.0     # Video kept before the trigger (sets the fixed buffer size)
+    RECORD_POST_SECONDS = 5.0    # Video recorded after the last HIGH trigger
     
     # Display
-    SHOW_DEBUG_WINDOWS = True
+    SHOW_DEBUG_WINDOWS = True  # False = headless (no cv2 windows, stop with Ctrl+C)
     
     # Logging
     LOG_LEVEL = 'INFO'  # DEBUG, INFO, WARNING, ERROR
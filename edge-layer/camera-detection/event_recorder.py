@@ -0,0 +1,189 @@
+"""
+Event Recorder
+Pre-event video ring buffer behind the RECORD_VIDEO action
+
+Frames are downscaled into a ring of slots allocated once at startup, so
+memory stays fixed however long the detector runs. When an event is
+triggered a background encoder thread writes a clip starting
+pre_seconds before the trigger and following the live ring until
+post_seconds after it. The capture side only ever does one resize into a
+slot under a short lock; it never waits for the encoder.
+"""
+
+import math
+import os
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+
+class EventRecorder:
+    def __init__(self, output_dir, frame_size, fps=10, pre_seconds=5.0,
+                 post_seconds=5.0, margin_seconds=2.0, fourcc='mp4v', extension='.mp4'):
+        """
+        Args:
+            output_dir: Directory clips are written to
+            frame_size: (width, height) stored and encoded
+            fps: Frames per second kept in the ring and written to clips
+            pre_seconds: Seconds of video kept before a trigger
+            post_seconds: Seconds recorded after the (last) trigger
+            margin_seconds: Extra ring capacity so a slow encoder can lag
+                the live frames without losing them
+            fourcc: cv2.VideoWriter codec
+            extension: Clip file extension
+        """
+        self.output_dir = output_dir
+        self.frame_size = tuple(frame_size)
+        self.fps = fps
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.extension = extension
+
+        width, height = self.frame_size
+        self.capacity = int(math.ceil((pre_seconds + margin_seconds) * fps))
+        self._frames = np.zeros((self.capacity, height, width, 3), dtype=np.uint8)
+        self._times = np.zeros(self.capacity, dtype=np.float64)
+        self._out = np.empty((height, width, 3), dtype=np.uint8)  # Encoder's copy of a slot
+        self._head = 0            # Sequence number of the next pushed frame
+        self._last_push = None
+        self._interval = 1.0 / fps
+
+        self._cond = threading.Condition()
+        self._clip_end = None     # End time of the clip being recorded / requested
+        self._trigger_time = None
+        self._closed = False
+
+        self.stats = {'pushed': 0, 'clips': 0, 'frames_written': 0, 'frames_lost': 0}
+        self.last_clip = None
+
+        self._encoder = threading.Thread(target=self._run, name='event-recorder', daemon=True)
+        self._encoder.start()
+
+    @property
+    def memory_bytes(self):
+        return self._frames.nbytes
+
+    @property
+    def recording(self):
+        return self._clip_end is not None
+
+    def push(self, frame, timestamp=None):
+        """
+        Store a frame, throttled to the recording fps (call once per captured frame)
+
+        Returns:
+            True if the frame was stored
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        if self._last_push is not None and timestamp - self._last_push < self._interval * 0.9:
+            return False
+        self._last_push = timestamp
+
+        with self._cond:
+            slot = self._head % self.capacity
+            if frame.shape[1::-1] == self.frame_size:
+                np.copyto(self._frames[slot], frame)
+            else:
+                cv2.resize(frame, self.frame_size, dst=self._frames[slot], interpolation=cv2.INTER_AREA)
+            self._times[slot] = timestamp
+            self._head += 1
+            self.stats['pushed'] += 1
+            self._cond.notify_all()
+        return True
+
+    def trigger(self, timestamp=None):
+        """
+        Request a clip around this moment; a trigger during a clip extends it
+
+        Args:
+            timestamp: Trigger time on the push() clock (time.perf_counter)
+        """
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        with self._cond:
+            if self._clip_end is None:
+                self._trigger_time = timestamp
+            self._clip_end = max(self._clip_end or 0.0, timestamp + self.post_seconds)
+            self._cond.notify_all()
+
+    def _first_seq_after(self, start_time):
+        """Oldest buffered frame at or after start_time (call with the lock held)"""
+        oldest = max(0, self._head - self.capacity)
+        for seq in range(oldest, self._head):
+            if self._times[seq % self.capacity] >= start_time:
+                return seq
+        return self._head
+
+    def _run(self):
+        """Encoder thread: write one clip per trigger"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._trigger_time is not None)
+                if self._closed and self._trigger_time is None:
+                    return
+                seq = self._first_seq_after(self._trigger_time - self.pre_seconds)
+
+            self._write_clip(seq)
+
+    def _end_clip(self):
+        """
+        Mark the clip finished (call with the lock held, in the same hold
+        that decided to stop, so a later trigger() starts a new clip instead
+        of extending the finished one)
+        """
+        self._trigger_time = None
+        self._clip_end = None
+
+    def _write_clip(self, seq):
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]  # Back-to-back clips get distinct names
+        path = os.path.join(self.output_dir, f"event_{stamp}{self.extension}")
+        writer = cv2.VideoWriter(path, self.fourcc, self.fps, self.frame_size)
+        if not writer.isOpened():
+            print(f"✗ Cannot open video writer for {path}")
+            with self._cond:
+                self._end_clip()
+            return
+        print(f"🎥 Recording event clip → {path}")
+
+        written = 0
+        while True:
+            with self._cond:
+                # Wait for the next frame, or stop once the clip is complete
+                if not self._cond.wait_for(
+                    lambda: self._head > seq or self._closed, timeout=self.post_seconds + 1.0
+                ) or (self._head <= seq and self._closed):
+                    self._end_clip()
+                    break
+
+                oldest = max(0, self._head - self.capacity)
+                if seq < oldest:
+                    # Encoder fell behind and the ring wrapped; skip ahead
+                    self.stats['frames_lost'] += oldest - seq
+                    seq = oldest
+
+                slot = seq % self.capacity
+                if self._times[slot] > self._clip_end:
+                    self._end_clip()
+                    break
+                np.copyto(self._out, self._frames[slot])
+
+            writer.write(self._out)
+            written += 1
+            seq += 1
+
+        writer.release()
+        self.stats['clips'] += 1
+        self.stats['frames_written'] += written
+        self.last_clip = path
+        print(f"✓ Event clip saved ({written} frames, {written / self.fps:.1f}s)")
+
+    def close(self):
+        """Finish the clip in progress (up to the frames already buffered) and stop"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._encoder.join(timeout=10.0)
@@ -5,94 +5,226 @@ Captures video, detects motion, calculates risk, and sends to ESP32
 
 import cv2
 import numpy as np
+import threading
 import time
 from risk_calculator import RiskCalculator
-from serial_sender import SerialSender
+from motion_analyzer import MotionAnalyzer
+from event_recorder import EventRecorder
+from serial_sender import NullSerialSender, SerialSender
+from pipeline import AdaptiveRate, FrameGrabber, LatestSlot, PipelineStats
+from video_source import open_capture
 from config import Config
 
 
 class MotionDetector:
-    def __init__(self):
-        self.MEDIUM_THRESHOLD = 15
-        self.HIGH_THRESHOLD = 20
-
-        self.config = Config()
+    # ESP32 buzzer/relay thresholds (match esp32_edge_control.ino)
+    MEDIUM_THRESHOLD = 15
+    HIGH_THRESHOLD = 20
+
+    def __init__(self, config=None, realtime=True):
+        """
+        Args:
+            config: Config class or instance (defaults to Config)
+            realtime: Pace VIDEO_SOURCE replay to its frame rate; False
+                reads frames as fast as they decode (benchmarks)
+        """
+        self.config = config or Config()
         self.risk_calc = RiskCalculator(self.config)
-        self.serial = SerialSender(self.config.SERIAL_PORT, self.config.BAUD_RATE)
-
-        self.cap = cv2.VideoCapture(self.config.CAMERA_INDEX)
+        if self.config.SERIAL_PORT is None:
+            self.serial = NullSerialSender()
+        else:
+            self.serial = SerialSender(
+                self.config.SERIAL_PORT, self.config.BAUD_RATE, self.config.SERIAL_HEARTBEAT_SECONDS
+            )
+
+        self.cap = open_capture(self.config, realtime=realtime)
         if not self.cap.isOpened():
             raise Exception("Cannot open camera")
-        print(f"Camera {self.config.CAMERA_INDEX} opened successfully")
-
-        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=500, varThreshold=16, detectShadows=True
+        if self.config.VIDEO_SOURCE is None:
+            print(f"Camera {self.config.CAMERA_INDEX} opened successfully")
+        else:
+            print(f"Replaying {self.config.VIDEO_SOURCE} ({self.cap.fps:.1f} fps)")
+
+        self.analyzer = MotionAnalyzer(self.config)
+        self.rate = AdaptiveRate(
+            active_fps=self.config.TARGET_FPS,
+            idle_fps=self.config.IDLE_FPS,
+            idle_after=self.config.IDLE_AFTER_SECONDS,
+            frame_skip=self.config.FRAME_SKIP
         )
 
+        # Pre-event ring buffer for RECORD_VIDEO clips, at the analysis resolution
+        self.recorder = None
+        if self.config.RECORD_VIDEO:
+            self.recorder = EventRecorder(
+                self.config.RECORD_DIR,
+                (self.config.ANALYSIS_WIDTH, self.config.ANALYSIS_HEIGHT),
+                fps=self.config.RECORD_FPS,
+                pre_seconds=self.config.RECORD_PRE_SECONDS,
+                post_seconds=self.config.RECORD_POST_SECONDS
+            )
+            print(f"✓ Event recorder: {self.config.RECORD_PRE_SECONDS:.0f}s pre-event buffer "
+                  f"({self.recorder.memory_bytes / 1e6:.1f} MB)")
+
     def detect_motion(self, frame):
-        fg_mask = self.bg_subtractor.apply(frame)
-        _, fg_mask = cv2.threshold(fg_mask, 200, 255, cv2.THRESH_BINARY)
+        return self.analyzer.detect(frame)
+
+    @classmethod
+    def risk_level_for(cls, risk_score):
+        """Level sent to the ESP32 for a risk score"""
+        return ("HIGH" if risk_score >= cls.HIGH_THRESHOLD else
+                "MEDIUM" if risk_score >= cls.MEDIUM_THRESHOLD else "LOW")
+
+    @classmethod
+    def relay_state_for(cls, risk_score):
+        """Relay ON for MEDIUM / HIGH"""
+        return 1 if risk_score >= cls.MEDIUM_THRESHOLD else 0
+
+    def process_frame(self, frame, now=None, timings=None):
+        """
+        Analyze one frame and work out what to send to the ESP32
+
+        Args:
+            frame: Camera frame
+            now: Frame time for the risk history (defaults to the wall clock)
+            timings: Optional dict that receives 'analyze' and 'risk' seconds
+        """
+        start = time.perf_counter()
+        motion_data = self.detect_motion(frame)
+        analyzed = time.perf_counter()
+
+        # ✅ NOW risk_calculator gets correct data
+        risk_score, _ = self.risk_calc.calculate_risk(motion_data, now)
+
+        if timings is not None:
+            timings["analyze"] = analyzed - start
+            timings["risk"] = time.perf_counter() - analyzed
+
+        # The analyzer reuses its mask buffer for the next frame, so the
+        # debug window (shown from another thread) gets its own copy
+        fg_mask = motion_data["fg_mask"]
+        if self.config.SHOW_DEBUG_WINDOWS:
+            fg_mask = fg_mask.copy()
 
-        kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (5, 5))
-        fg_mask = cv2.morphologyEx(fg_mask, cv2.MORPH_CLOSE, kernel)
+        return {
+            "risk_score": risk_score,
+            "risk_level": self.risk_level_for(risk_score),
+            "motion_count": motion_data["motion_count"],
+            "relay_state": self.relay_state_for(risk_score),
+            "fg_mask": fg_mask
+        }
 
-        contours, _ = cv2.findContours(
-            fg_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+    def output_result(self, result):
+        """Send a processed result to the ESP32 and the debug window"""
+        self.serial.update(
+            result["risk_score"], result["risk_level"],
+            result["motion_count"], result["relay_state"]
         )
 
-        motion_area = 0
-        motion_count = 0
+        if self.config.SHOW_DEBUG_WINDOWS:
+            cv2.imshow("Motion Mask", result["fg_mask"])
 
-        for c in contours:
-            area = cv2.contourArea(c)
-            if area > self.config.MIN_CONTOUR_AREA:
-                motion_area += area
-                motion_count += 1
+    def _processing_loop(self, grabber, results, stop_event):
+        """Processing stage: analyze the freshest frame at the adaptive rate"""
+        next_tick = time.perf_counter()
+        was_high = False
 
-        return {
-            "motion_detected": motion_count > 0,   # 🔥 REQUIRED
-            "motion_area": motion_area,
-            "motion_count": motion_count,
-            "fg_mask": fg_mask
-        }
+        try:
+            while not stop_event.is_set():
+                item = grabber.read(timeout=1.0)
+                if item is None:
+                    if grabber.frames.closed:
+                        break
+                    continue
+
+                frame, captured_at, frame_seq = item
+                if not self.rate.accept(frame_seq):
+                    continue
+
+                start = time.perf_counter()
+                result = self.process_frame(frame)
+                result["captured_at"] = captured_at
+                self.stats["process"].record(time.perf_counter() - start)
+                results.put(result)
+
+                # Crossing into HIGH starts (or extends) an event clip
+                is_high = result["risk_level"] == "HIGH"
+                if self.recorder and is_high and not was_high:
+                    self.recorder.trigger(captured_at)
+                was_high = is_high
+
+                mode = self.rate.update(result["motion_count"] > 0)
+                if mode == "active":
+                    print(f"⚡ Motion → active mode ({self.rate.fps} fps)")
+                elif mode == "idle":
+                    print(f"💤 Quiet → idle mode ({self.rate.fps} fps)")
+
+                # Pace to the current target rate instead of a fixed sleep
+                next_tick = max(next_tick + self.rate.interval, time.perf_counter())
+                delay = next_tick - time.perf_counter()
+                if delay > 0:
+                    stop_event.wait(delay)
+        finally:
+            results.close()
 
     def run(self):
         print("🚀 Motion Detection Started")
 
+        self.stats = PipelineStats(
+            ["capture", "process", "output", "end_to_end"],
+            interval=self.config.STATS_INTERVAL
+        )
+        grabber = FrameGrabber(
+            self.cap, self.stats["capture"],
+            on_frame=self.recorder.push if self.recorder else None
+        ).start()
+        results = LatestSlot()
+        stop_event = threading.Event()
+        processor = threading.Thread(
+            target=self._processing_loop,
+            args=(grabber, results, stop_event),
+            name="process",
+            daemon=True
+        )
+        processor.start()
+
         try:
+            # Output stage stays on the main thread (required by cv2.imshow)
             while True:
-                ret, frame = self.cap.read()
-                if not ret:
+                result = results.get(timeout=0.05)
+                if result is None:
+                    if results.closed:
+                        break
+                else:
+                    start = time.perf_counter()
+                    self.output_result(result)
+                    done = time.perf_counter()
+                    self.stats["output"].record(done - start)
+                    self.stats["end_to_end"].record(done - result["captured_at"])
+
+                if self.config.SHOW_DEBUG_WINDOWS and cv2.waitKey(1) & 0xFF == ord('q'):
                     break
 
-                frame = cv2.resize(frame, (640, 480))
-                motion_data = self.detect_motion(frame)
-
-                # ✅ NOW risk_calculator gets correct data
-                risk_score, _ = self.risk_calc.calculate_risk(motion_data)
-
-                # Send risk score
-                self.serial.send_risk_data(
-                    risk_score,
-                    "HIGH" if risk_score >= self.HIGH_THRESHOLD else
-                    "MEDIUM" if risk_score >= self.MEDIUM_THRESHOLD else "LOW",
-                    motion_data["motion_count"]
+                gate = ""
+                if self.analyzer.gate_enabled:
+                    g = self.analyzer.gate_report()
+                    gate = f" | gate {g['hit_rate']:.0%} skipped, {g['saved_fraction']:.0%} analysis CPU saved"
+                self.stats.maybe_report(
+                    f"{self.rate.mode} mode | "
+                    f"dropped {grabber.frames.dropped} frames / {results.dropped} results" + gate
                 )
 
-                # Relay ON for MEDIUM / HIGH
-                relay_state = 1 if risk_score >= self.MEDIUM_THRESHOLD else 0
-                self.serial.send_relay_state(relay_state)
-
-                cv2.imshow("Motion Mask", motion_data["fg_mask"])
-
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    break
-
-                time.sleep(0.1)
-
+        except KeyboardInterrupt:
+            pass
         finally:
+            stop_event.set()
+            grabber.stop()
+            processor.join(timeout=2.0)
             self.cap.release()
-            cv2.destroyAllWindows()
+            if self.recorder:
+                self.recorder.close()
+            if self.config.SHOW_DEBUG_WINDOWS:
+                cv2.destroyAllWindows()
             self.serial.close()
             print("Cleanup complete")
 
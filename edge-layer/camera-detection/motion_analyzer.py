@@ -0,0 +1,300 @@
+"""
+Motion Analyzer
+Background subtraction and contour analysis, optionally at a reduced
+grayscale resolution and restricted to polygon zones
+
+A cheap gate runs first: a thumbnail of the frame is compared with the
+thumbnail of the last fully analyzed frame, and when that frame showed no
+motion and nothing has changed since, the background subtraction,
+morphology and contour stages are skipped. Every GATE_BG_UPDATE_EVERY
+skipped frames one frame goes through the full path anyway so the
+background model keeps learning lighting drift.
+
+The per-frame path writes into buffers allocated once at startup
+(OpenCV dst arguments) and filters contour areas in one numpy pass.
+findContours is kept over connectedComponentsWithStats: it only traces
+the outlines of the sparse blobs motion produces, while labeling visits
+every pixel. benchmarks/bench_detect_motion.py measures both on the same
+masks; on the synthetic clip at 320x240 (4% foreground, one thread) the
+contour stage took about 27 us per mask against about 410 us for
+connectedComponentsWithStats with a preallocated labels buffer.
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+BG_HISTORY = 500  # MOG2 history in analyzed frames
+
+
+class Zone:
+    """A polygon region analyzed on its own bounding crop"""
+
+    def __init__(self, name, polygon, weight, min_area, scale_x, scale_y, frame_size):
+        """
+        Args:
+            name: Zone name reported in the results
+            polygon: List of (x, y) points in reference-frame pixels
+            weight: Risk weight applied to this zone's scores
+            min_area: Minimum contour area in reference pixels
+            scale_x, scale_y: Reference -> analysis coordinate scale
+            frame_size: (width, height) of the analysis frame
+        """
+        self.name = name
+        self.weight = weight
+        self.min_area = min_area
+
+        reference = np.array(polygon, dtype=np.float32)
+        self.zone_area = float(cv2.contourArea(reference))
+
+        points = np.round(reference * (scale_x, scale_y)).astype(np.int32)
+        width, height = frame_size
+        x, y, w, h = cv2.boundingRect(points)
+        x0, y0 = max(0, x), max(0, y)
+        x1, y1 = min(width, x + w), min(height, y + h)
+        self.rect = (x0, y0, x1, y1)
+
+        shape = (y1 - y0, x1 - x0)
+        self.mask = np.zeros(shape, dtype=np.uint8)
+        cv2.fillPoly(self.mask, [points - (x0, y0)], 255)
+
+        # Per-frame work buffers, reused on every frame
+        self.fg = np.empty(shape, dtype=np.uint8)
+        self.closed = np.empty(shape, dtype=np.uint8)
+
+        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
+            history=BG_HISTORY, varThreshold=16, detectShadows=True
+        )
+
+    @property
+    def pixels(self):
+        x0, y0, x1, y1 = self.rect
+        return (x1 - x0) * (y1 - y0)
+
+
+class MotionAnalyzer:
+    def __init__(self, config):
+        """
+        Args:
+            config: Config with FRAME_*/ANALYSIS_* sizes, MIN_CONTOUR_AREA
+                and optional ZONES
+        """
+        self.config = config
+        self.analysis_size = (config.ANALYSIS_WIDTH, config.ANALYSIS_HEIGHT)
+        self.grayscale = config.ANALYSIS_GRAYSCALE
+
+        # Contour areas are reported in reference-frame pixels (FRAME_WIDTH x
+        # FRAME_HEIGHT) so MIN_CONTOUR_AREA and the risk area score keep
+        # their meaning whatever the analysis resolution is
+        scale_x = config.ANALYSIS_WIDTH / config.FRAME_WIDTH
+        scale_y = config.ANALYSIS_HEIGHT / config.FRAME_HEIGHT
+        self.area_scale = 1.0 / (scale_x * scale_y)
+
+        kernel_size = max(3, int(round(5 * scale_x)) | 1)
+        self.kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+
+        zones = getattr(config, 'ZONES', None) or [{
+            'name': 'full_frame',
+            'polygon': [
+                (0, 0), (config.FRAME_WIDTH, 0),
+                (config.FRAME_WIDTH, config.FRAME_HEIGHT), (0, config.FRAME_HEIGHT)
+            ],
+        }]
+        self.full_frame = not getattr(config, 'ZONES', None)
+        self.zones = [
+            Zone(
+                z['name'], z['polygon'],
+                z.get('weight', 1.0),
+                z.get('min_area', config.MIN_CONTOUR_AREA),
+                scale_x, scale_y, self.analysis_size
+            )
+            for z in zones
+        ]
+
+        # Preallocated frame buffers
+        width, height = self.analysis_size
+        self._resized = np.empty((height, width, 3), dtype=np.uint8)
+        self._gray = np.empty((height, width), dtype=np.uint8)
+
+        # Display mask for the debug window (zones pasted into a full frame)
+        self.fg_mask = np.zeros((height, width), dtype=np.uint8)
+
+        # Static-scene gate
+        self.gate_enabled = getattr(config, 'MOTION_GATE', False)
+        self.gate_size = (getattr(config, 'GATE_WIDTH', 80), getattr(config, 'GATE_HEIGHT', 60))
+        self.gate_delta = getattr(config, 'GATE_PIXEL_DELTA', 15)
+        self.gate_max_changed = int(
+            getattr(config, 'GATE_CHANGED_FRACTION', 0.002) * self.gate_size[0] * self.gate_size[1]
+        )
+        self.gate_refresh = getattr(config, 'GATE_BG_UPDATE_EVERY', 10)
+        self._thumb_ref = np.empty(self.gate_size[::-1], dtype=np.uint8)
+        self._thumb_diff = np.empty(self.gate_size[::-1], dtype=np.uint8)
+        self._thumb_gray = np.empty(self.gate_size[::-1], dtype=np.uint8)
+        self._thumb_bgr = np.empty(self.gate_size[::-1] + (3,), dtype=np.uint8)
+        self._ref_static = False   # Last full analysis found no motion
+        self._skipped_run = 0
+        self.gate_stats = {'frames': 0, 'skipped': 0, 'gate_s': 0.0, 'full_frames': 0, 'full_s': 0.0}
+
+    @property
+    def analyzed_fraction(self):
+        """Share of the analysis frame covered by zone crops"""
+        total = self.analysis_size[0] * self.analysis_size[1]
+        return min(1.0, sum(z.pixels for z in self.zones) / total)
+
+    def prepare(self, frame):
+        """Resize (and convert) a camera frame to the analysis format"""
+        h, w = frame.shape[:2]
+        if (w, h) != self.analysis_size:
+            interpolation = cv2.INTER_AREA if w > self.analysis_size[0] else cv2.INTER_LINEAR
+            resized = self._resized if frame.ndim == 3 else self._gray
+            frame = cv2.resize(frame, self.analysis_size, dst=resized, interpolation=interpolation)
+        if self.grayscale and frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return frame
+
+    def _thumbnail(self, frame):
+        """Small grayscale copy of an analysis frame for the gate"""
+        if frame.ndim == 3:
+            cv2.resize(frame, self.gate_size, dst=self._thumb_bgr, interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(self._thumb_bgr, cv2.COLOR_BGR2GRAY, dst=self._thumb_gray)
+        return cv2.resize(frame, self.gate_size, dst=self._thumb_gray, interpolation=cv2.INTER_AREA)
+
+    def _scene_static(self, thumb):
+        """True when the frame matches the last fully analyzed, motion-free frame"""
+        if not self._ref_static or self._skipped_run >= self.gate_refresh:
+            return False
+        cv2.absdiff(thumb, self._thumb_ref, dst=self._thumb_diff)
+        cv2.threshold(self._thumb_diff, self.gate_delta, 255, cv2.THRESH_BINARY, dst=self._thumb_diff)
+        return cv2.countNonZero(self._thumb_diff) <= self.gate_max_changed
+
+    def gate_report(self):
+        """
+        Gate effectiveness since startup
+
+        Returns:
+            Dict with hit_rate (share of frames skipped), the average cost of
+            the gate check and of a full analysis in ms, and the estimated
+            CPU saved per frame in ms and as a share of the ungated cost
+        """
+        g = self.gate_stats
+        frames = max(1, g['frames'])
+        full_ms = g['full_s'] / g['full_frames'] * 1000 if g['full_frames'] else 0.0
+        gate_ms = g['gate_s'] / frames * 1000
+        saved_ms = g['skipped'] * full_ms / frames - gate_ms
+        return {
+            'hit_rate': g['skipped'] / frames,
+            'gate_ms': gate_ms,
+            'full_ms': full_ms,
+            'saved_ms': saved_ms,
+            'saved_fraction': saved_ms / full_ms if full_ms else 0.0
+        }
+
+    def _analyze_zone(self, zone, frame, learning_rate=-1):
+        """Background subtraction and contour analysis over one zone crop"""
+        x0, y0, x1, y1 = zone.rect
+        zone.bg_subtractor.apply(frame[y0:y1, x0:x1], fgmask=zone.fg, learningRate=learning_rate)
+        cv2.threshold(zone.fg, 200, 255, cv2.THRESH_BINARY, dst=zone.fg)
+        if not self.full_frame:
+            cv2.bitwise_and(zone.fg, zone.mask, dst=zone.fg)
+        cv2.morphologyEx(zone.fg, cv2.MORPH_CLOSE, self.kernel, dst=zone.closed)
+
+        contours, _ = cv2.findContours(
+            zone.closed, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE
+        )
+        if not contours:
+            return zone.closed, 0, 0
+
+        areas = np.fromiter(map(cv2.contourArea, contours), dtype=np.float64, count=len(contours))
+        areas *= self.area_scale
+        moving = areas > zone.min_area
+        return zone.closed, float(areas[moving].sum()), int(np.count_nonzero(moving))
+
+    def detect(self, frame):
+        """
+        Detect motion in a camera frame of any size
+
+        Returns:
+            Dict with motion_detected, motion_area (reference pixels),
+            motion_count, per-zone metrics, the analysis-resolution
+            fg_mask (a reused buffer: copy it to keep it past the next frame)
+            and gated (True when the static-scene gate skipped analysis)
+        """
+        frame = self.prepare(frame)
+
+        if self.gate_enabled:
+            start = time.perf_counter()
+            thumb = self._thumbnail(frame)
+            static = self._scene_static(thumb)
+            self.gate_stats['frames'] += 1
+            self.gate_stats['gate_s'] += time.perf_counter() - start
+            if static:
+                self.gate_stats['skipped'] += 1
+                self._skipped_run += 1
+                return self._static_result()
+            start = time.perf_counter()
+
+        learning_rate = -1
+        if self.gate_enabled and self._skipped_run:
+            # This frame also stands in for the identical frames the gate skipped
+            learning_rate = min(1.0, (self._skipped_run + 1) / BG_HISTORY)
+        result = self._analyze(frame, learning_rate)
+
+        if self.gate_enabled:
+            self.gate_stats['full_frames'] += 1
+            self.gate_stats['full_s'] += time.perf_counter() - start
+            self._ref_static = not result["motion_detected"]
+            self._skipped_run = 0
+            np.copyto(self._thumb_ref, thumb)
+        return result
+
+    def _static_result(self):
+        """Result for a gated frame: no motion anywhere"""
+        return {
+            "motion_detected": False,
+            "motion_area": 0,
+            "motion_count": 0,
+            "zones": [{
+                "name": zone.name,
+                "weight": zone.weight,
+                "zone_area": zone.zone_area,
+                "motion_area": 0.0,
+                "motion_count": 0
+            } for zone in self.zones],
+            "fg_mask": self.fg_mask,
+            "gated": True
+        }
+
+    def _analyze(self, frame, learning_rate=-1):
+        """Full background subtraction and contour pass over every zone"""
+        if not self.full_frame:
+            self.fg_mask.fill(0)
+
+        zone_results = []
+        for zone in self.zones:
+            fg_mask, motion_area, motion_count = self._analyze_zone(zone, frame, learning_rate)
+            if self.full_frame:
+                self.fg_mask = fg_mask
+            else:
+                x0, y0, x1, y1 = zone.rect
+                np.maximum(self.fg_mask[y0:y1, x0:x1], fg_mask, out=self.fg_mask[y0:y1, x0:x1])
+
+            zone_results.append({
+                "name": zone.name,
+                "weight": zone.weight,
+                "zone_area": zone.zone_area,
+                "motion_area": motion_area,
+                "motion_count": motion_count
+            })
+
+        motion_area = sum(z["motion_area"] for z in zone_results)
+        motion_count = sum(z["motion_count"] for z in zone_results)
+
+        return {
+            "motion_detected": motion_count > 0,
+            "motion_area": motion_area,
+            "motion_count": motion_count,
+            "zones": zone_results,
+            "fg_mask": self.fg_mask,
+            "gated": False
+        }
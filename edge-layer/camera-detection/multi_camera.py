@@ -0,0 +1,180 @@
+"""
+Multi-Camera Edge Node
+Runs one analysis process per camera (no shared GIL) and a coordinator
+that owns the serial link and merges per-camera risk into a node score
+"""
+
+import multiprocessing as mp
+import queue
+import time
+
+import cv2
+
+from config import Config
+from main import MotionDetector
+from motion_analyzer import MotionAnalyzer
+from pipeline import AdaptiveRate, FrameGrabber
+from risk_calculator import RiskCalculator
+from serial_sender import NullSerialSender, SerialSender
+
+
+def camera_worker(camera_index, results, stop_event, config=Config):
+    """
+    Analysis process for one camera
+
+    Publishes compact (camera_index, timestamp, risk_score, motion_count)
+    tuples; results are dropped rather than blocking when the coordinator
+    falls behind.
+    """
+    cv2.setNumThreads(1)  # One core per camera process
+
+    cap = cv2.VideoCapture(camera_index)
+    if not cap.isOpened():
+        print(f"✗ Cannot open camera {camera_index}")
+        return
+    print(f"Camera {camera_index} opened successfully")
+
+    analyzer = MotionAnalyzer(config)
+    risk_calc = RiskCalculator(config)
+    rate = AdaptiveRate(
+        active_fps=config.TARGET_FPS,
+        idle_fps=config.IDLE_FPS,
+        idle_after=config.IDLE_AFTER_SECONDS,
+        frame_skip=config.FRAME_SKIP
+    )
+    grabber = FrameGrabber(cap).start()
+    next_tick = time.perf_counter()
+
+    try:
+        while not stop_event.is_set():
+            item = grabber.read(timeout=1.0)
+            if item is None:
+                if grabber.frames.closed:
+                    break
+                continue
+
+            frame, _, frame_seq = item
+            if not rate.accept(frame_seq):
+                continue
+
+            motion_data = analyzer.detect(frame)
+            risk_score, _ = risk_calc.calculate_risk(motion_data)
+            rate.update(motion_data["motion_count"] > 0)
+
+            try:
+                results.put_nowait(
+                    (camera_index, time.time(), risk_score, motion_data["motion_count"])
+                )
+            except queue.Full:
+                pass
+
+            next_tick = max(next_tick + rate.interval, time.perf_counter())
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                stop_event.wait(delay)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        grabber.stop()
+        cap.release()
+
+
+def merge_camera_risk(latest, now, stale_after, bonus):
+    """
+    Combine per-camera results into a node-level reading
+
+    The node score is the worst camera's score plus a bonus for every
+    additional camera currently seeing motion.
+
+    Args:
+        latest: Dict camera_index -> (timestamp, risk_score, motion_count)
+        now: Current time.time()
+        stale_after: Seconds after which a camera's result is ignored
+        bonus: Score added per extra camera with motion
+
+    Returns:
+        (node_risk_score, total_motion_count, active_cameras)
+    """
+    fresh = [
+        (score, count) for ts, score, count in latest.values()
+        if now - ts <= stale_after
+    ]
+    if not fresh:
+        return 0.0, 0, 0
+
+    active = sum(1 for _, count in fresh if count > 0)
+    node_score = max(score for score, _ in fresh) + bonus * max(0, active - 1)
+    return min(100.0, node_score), sum(count for _, count in fresh), active
+
+
+class MultiCameraNode:
+    def __init__(self, config=Config):
+        self.config = config
+        if config.SERIAL_PORT is None:
+            self.serial = NullSerialSender()
+        else:
+            self.serial = SerialSender(config.SERIAL_PORT, config.BAUD_RATE, config.SERIAL_HEARTBEAT_SECONDS)
+        self.results = mp.Queue(maxsize=16 * len(config.CAMERA_INDICES))
+        self.stop_event = mp.Event()
+        self.workers = [
+            mp.Process(
+                target=camera_worker,
+                args=(index, self.results, self.stop_event, config),
+                name=f"camera-{index}",
+                daemon=True
+            )
+            for index in config.CAMERA_INDICES
+        ]
+        self.latest = {}
+
+    def run(self):
+        print(f"🚀 Multi-camera node started ({len(self.workers)} cameras)")
+        for worker in self.workers:
+            worker.start()
+
+        received = {index: 0 for index in self.config.CAMERA_INDICES}
+        last_report = time.perf_counter()
+
+        try:
+            while any(worker.is_alive() for worker in self.workers):
+                try:
+                    camera_index, ts, risk_score, motion_count = self.results.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                self.latest[camera_index] = (ts, risk_score, motion_count)
+                received[camera_index] += 1
+
+                node_score, node_motion, active = merge_camera_risk(
+                    self.latest, time.time(),
+                    self.config.CAMERA_STALE_SECONDS, self.config.MULTI_CAMERA_BONUS
+                )
+                self.serial.update(
+                    node_score, MotionDetector.risk_level_for(node_score),
+                    node_motion, MotionDetector.relay_state_for(node_score)
+                )
+
+                now = time.perf_counter()
+                if now - last_report >= self.config.STATS_INTERVAL:
+                    elapsed = now - last_report
+                    rates = " | ".join(
+                        f"cam{index} {count / elapsed:.1f} fps" for index, count in received.items()
+                    )
+                    print(f"📊 {rates} | node risk {node_score:.1f} ({active} active)")
+                    received = dict.fromkeys(received, 0)
+                    last_report = now
+
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop_event.set()
+            for worker in self.workers:
+                worker.join(timeout=3.0)
+                if worker.is_alive():
+                    worker.terminate()
+            self.serial.close()
+            print("Cleanup complete")
+
+
+if __name__ == "__main__":
+    MultiCameraNode().run()
@@ -0,0 +1,225 @@
+"""
+Frame Pipeline Helpers
+Latest-value handoff between pipeline threads and per-stage timing stats
+"""
+
+import threading
+import time
+
+
+class LatestSlot:
+    """
+    Single-item mailbox that always holds the newest value
+
+    Producers never block: putting a new item replaces one that has not
+    been consumed yet (counted as dropped), so consumers never work on
+    stale data.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._taken = 0
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if self._seq > self._taken:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Wait for an item newer than the last one taken
+
+        Returns:
+            The item, or None on timeout or after close()
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > self._taken or self._closed, timeout):
+                return None
+            if self._seq == self._taken:
+                return None
+            self._taken = self._seq
+            return self._item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+
+class AdaptiveRate:
+    """
+    Idle/active analysis rate scheduler
+
+    Runs at the idle rate while the scene is quiet, jumps to the active
+    rate as soon as motion is seen and decays back to idle after a quiet
+    period. frame_skip is a floor: at least that many camera frames pass
+    between two analyzed frames whatever the mode.
+    """
+
+    def __init__(self, active_fps, idle_fps, idle_after, frame_skip=1):
+        self.active_fps = active_fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.frame_skip = max(1, frame_skip)
+
+        self.mode = 'active'  # Start active so the background model learns quickly
+        self._last_motion = time.perf_counter()
+        self._last_seq = None
+
+    @property
+    def fps(self):
+        return self.active_fps if self.mode == 'active' else self.idle_fps
+
+    @property
+    def interval(self):
+        """Seconds between analyzed frames in the current mode (0 = no cap)"""
+        return 1.0 / self.fps if self.fps else 0.0
+
+    def accept(self, frame_seq):
+        """Check the FRAME_SKIP floor for a captured frame number"""
+        if self._last_seq is not None and frame_seq - self._last_seq < self.frame_skip:
+            return False
+        self._last_seq = frame_seq
+        return True
+
+    def update(self, motion_detected, now=None):
+        """
+        Feed the latest analysis result
+
+        Returns:
+            The new mode if it changed, else None
+        """
+        now = time.perf_counter() if now is None else now
+        if motion_detected:
+            self._last_motion = now
+            if self.mode != 'active':
+                self.mode = 'active'
+                return self.mode
+        elif self.mode == 'active' and now - self._last_motion >= self.idle_after:
+            self.mode = 'idle'
+            return self.mode
+        return None
+
+
+class FrameGrabber:
+    """Capture thread that keeps only the freshest frame from a cv2.VideoCapture"""
+
+    def __init__(self, cap, stats=None, on_frame=None):
+        """
+        Args:
+            cap: Opened cv2.VideoCapture
+            stats: Optional StageStats for read() latency
+            on_frame: Optional callback(frame, capture_time) run on the capture
+                thread for every frame; it must be quick and never block
+        """
+        self.cap = cap
+        self.frames = LatestSlot()
+        self.stats = stats
+        self.on_frame = on_frame
+        self._thread = threading.Thread(target=self._run, name='capture', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        seq = 0
+        while not self.frames.closed:
+            start = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            now = time.perf_counter()
+            if self.stats:
+                self.stats.record(now - start)
+            if self.on_frame:
+                self.on_frame(frame, now)
+            seq += 1
+            self.frames.put((frame, now, seq))
+        self.frames.close()
+
+    def read(self, timeout=1.0):
+        """
+        Get the newest frame not yet read
+
+        Returns:
+            (frame, capture_time, frame_number) or None when the source is exhausted
+        """
+        return self.frames.get(timeout)
+
+    def stop(self):
+        self.frames.close()
+        self._thread.join(timeout=2.0)
+
+
+class StageStats:
+    """Throughput and latency of one pipeline stage over a reporting interval"""
+
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._count = 0
+        self._busy = 0.0
+        self._since = time.perf_counter()
+
+    def record(self, duration):
+        with self._lock:
+            self._count += 1
+            self._busy += duration
+
+    def snapshot(self):
+        """
+        Read and reset the interval counters
+
+        Returns:
+            Dict with fps and average latency in ms
+        """
+        now = time.perf_counter()
+        with self._lock:
+            elapsed = now - self._since
+            count, busy = self._count, self._busy
+            self._count, self._busy, self._since = 0, 0.0, now
+        return {
+            'fps': count / elapsed if elapsed > 0 else 0.0,
+            'latency_ms': busy / count * 1000 if count else 0.0
+        }
+
+
+class PipelineStats:
+    """Groups stage stats and prints a periodic one-line report"""
+
+    def __init__(self, stage_names, interval=5.0):
+        self.stages = {name: StageStats(name) for name in stage_names}
+        self.interval = interval
+        self._last_report = time.perf_counter()
+
+    def __getitem__(self, name):
+        return self.stages[name]
+
+    def maybe_report(self, extra=''):
+        """Print and reset the stats once per interval"""
+        now = time.perf_counter()
+        if now - self._last_report < self.interval:
+            return None
+        self._last_report = now
+
+        report = {name: stage.snapshot() for name, stage in self.stages.items()}
+        parts = [
+            f"{name} {s['fps']:.1f} fps {s['latency_ms']:.1f} ms"
+            for name, s in report.items()
+        ]
+        if extra:
+            parts.append(extra)
+        print("📊 " + " | ".join(parts))
+        return report
@@ -3,41 +3,64 @@ Risk Calculator
 Converts motion metrics into risk scores and levels
 """
 
+import math
 import time
+from collections import deque
 
 class RiskCalculator:
     def __init__(self, config):
         self.config = config
-        self.motion_history = []
-        self.max_history = 30  # Keep last 30 detections
         
-    def calculate_risk(self, motion_data):
+        # Ring buffer of (time, area, count) motion detections with running sums
+        self.motion_history = deque()
+        self.max_history = getattr(config, 'RISK_HISTORY_SIZE', 30)          # Count-based window
+        self.max_history_age = getattr(config, 'RISK_HISTORY_SECONDS', None)  # Time-based window
+        self._area_sum = 0.0
+        self._count_sum = 0
+        
+        # Exponentially decayed motion event rate (events per second)
+        self.frequency_tau = getattr(config, 'FREQUENCY_TAU_SECONDS', 2.0)
+        self._event_rate = 0.0
+        self._rate_time = None
+        
+    def calculate_risk(self, motion_data, now=None):
         """
         Calculate risk score based on motion metrics
         
+        Call this for every analyzed frame, with or without motion, so the
+        frequency estimate decays during quiet frames.
+        
         Args:
             motion_data: Dict with motion_detected, motion_area, motion_count
+            now: Monotonic timestamp of the frame (defaults to now; pass
+                video timestamps when replaying recordings)
             
         Returns:
             (risk_score, risk_level)
         """
-        if not motion_data['motion_detected']:
-            return 0.0, 'LOW'
+        now = time.monotonic() if now is None else now
+        motion = motion_data['motion_detected']
         
-        # Add to history
-        self.motion_history.append({
-            'time': time.time(),
-            'area': motion_data['motion_area'],
-            'count': motion_data['motion_count']
-        })
+        self._update_event_rate(motion, now)
+        self._expire_history(now)
         
-        # Keep only recent history
-        if len(self.motion_history) > self.max_history:
-            self.motion_history.pop(0)
+        if not motion:
+            return 0.0, 'LOW'
+        
+        # Add to history, evicting the oldest entry when full
+        if len(self.motion_history) >= self.max_history:
+            self._evict_oldest()
+        entry = (now, motion_data['motion_area'], motion_data['motion_count'])
+        self.motion_history.append(entry)
+        self._area_sum += entry[1]
+        self._count_sum += entry[2]
         
         # Calculate factors
-        area_score = self._calculate_area_score(motion_data['motion_area'])
-        count_score = self._calculate_count_score(motion_data['motion_count'])
+        if motion_data.get('zones'):
+            area_score, count_score = self._calculate_zone_scores(motion_data['zones'])
+        else:
+            area_score = self._calculate_area_score(motion_data['motion_area'])
+            count_score = self._calculate_count_score(motion_data['motion_count'])
         frequency_score = self._calculate_frequency_score()
         
         # Weighted combination
@@ -55,14 +78,36 @@ class RiskCalculator:
         
         return risk_score, risk_level
     
-    def _calculate_area_score(self, area):
+    def _calculate_area_score(self, area, max_area=307200):
         """Score based on motion area (0-100)"""
         # Normalize area to 0-100 scale
-        # Assume max area is full frame (640*480 = 307200)
-        max_area = 307200
+        # Default max area is full frame (640*480 = 307200)
         score = (area / max_area) * 100
         return min(100, score)
     
+    def _calculate_zone_scores(self, zones):
+        """
+        Area and count scores from per-zone metrics
+        
+        Each zone's area is normalized to the zone's own size and scaled by
+        its weight; the most alarming zone drives each score.
+        
+        Returns:
+            (area_score, count_score)
+        """
+        area_score = 0
+        count_score = 0
+        
+        for zone in zones:
+            if not zone['motion_count']:
+                continue
+            weight = zone.get('weight', 1.0)
+            zone_area = zone.get('zone_area') or 307200
+            area_score = max(area_score, weight * self._calculate_area_score(zone['motion_area'], zone_area))
+            count_score = max(count_score, weight * self._calculate_count_score(zone['motion_count']))
+        
+        return min(100, area_score), min(100, count_score)
+    
     def _calculate_count_score(self, count):
         """Score based on number of moving objects (0-100)"""
         # More objects = higher risk
@@ -71,17 +116,42 @@ class RiskCalculator:
         score = (count / max_count) * 100
         return min(100, score)
     
+    def _update_event_rate(self, motion, now):
+        """
+        EWMA of the motion event rate
+        
+        The rate decays by exp(-dt / tau) between frames and each motion
+        frame adds 1 / tau, so quiet frames pull the estimate down and the
+        result converges to events per second.
+        """
+        if self._rate_time is not None:
+            dt = max(0.0, now - self._rate_time)
+            self._event_rate *= math.exp(-dt / self.frequency_tau)
+        self._rate_time = now
+        if motion:
+            self._event_rate += 1.0 / self.frequency_tau
+    
+    def _expire_history(self, now):
+        """Drop detections older than the time-based window"""
+        if self.max_history_age is None:
+            return
+        cutoff = now - self.max_history_age
+        while self.motion_history and self.motion_history[0][0] < cutoff:
+            self._evict_oldest()
+    
+    def _evict_oldest(self):
+        _, area, count = self.motion_history.popleft()
+        if self.motion_history:
+            self._area_sum -= area
+            self._count_sum -= count
+        else:
+            # Reset instead of subtracting so float error cannot build up
+            self._area_sum = 0.0
+            self._count_sum = 0
+    
     def _calculate_frequency_score(self):
         """Score based on motion frequency (0-100)"""
-        if len(self.motion_history) < 2:
-            return 0
-        
-        # Calculate events per second over history
-        time_span = self.motion_history[-1]['time'] - self.motion_history[0]['time']
-        if time_span == 0:
-            return 0
-        
-        events_per_second = len(self.motion_history) / time_span
+        events_per_second = self._event_rate
         
         # Assume 5+ events/sec is maximum risk
         max_frequency = 5
@@ -106,11 +176,9 @@ class RiskCalculator:
                 'total_events': 0
             }
         
-        total_area = sum(h['area'] for h in self.motion_history)
-        total_count = sum(h['count'] for h in self.motion_history)
-        
         return {
-            'avg_area': total_area / len(self.motion_history),
-            'avg_count': total_count / len(self.motion_history),
-            'total_events': len(self.motion_history)
+            'avg_area': self._area_sum / len(self.motion_history),
+            'avg_count': self._count_sum / len(self.motion_history),
+            'total_events': len(self.motion_history),
+            'events_per_second': self._event_rate
         }
@@ -1,39 +1,154 @@
-import serial
+"""
+Serial Sender
+Keeps the ESP32 in sync with the latest risk state from a background
+writer thread, so the detection loop never waits on the UART
+
+Every update replaces the pending state; the writer sends one framed
+message when the state changes or when the heartbeat interval elapses:
+
+    $R,<risk>,<level>,<motion_count>,<relay>*<checksum>\n
+
+<checksum> is the XOR of every character between '$' and '*' as two hex
+digits (NMEA style).
+"""
+
+import threading
 import time
 
+import serial
+
+
+def frame_message(risk_score, risk_level, motion_count, relay_state):
+    """Build one framed, checksummed state message"""
+    body = f"R,{int(risk_score)},{risk_level},{int(motion_count)},{int(relay_state)}"
+    checksum = 0
+    for ch in body.encode():
+        checksum ^= ch
+    return f"${body}*{checksum:02X}\n".encode()
+
 
 class SerialSender:
-    def __init__(self, port, baud_rate=115200):
+    def __init__(self, port, baud_rate=115200, heartbeat=1.0):
+        """
+        Args:
+            port: Serial port name
+            baud_rate: UART speed
+            heartbeat: Seconds between resends of an unchanged state
+        """
         self.port = port
         self.baud_rate = baud_rate
+        self.heartbeat = heartbeat
         self.ser = None
         self.connected = False
+
+        # (risk, level, motion_count, relay) as it will be framed
+        self._state = (0, 'LOW', 0, 0)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {'updates': 0, 'sent': 0, 'heartbeats': 0, 'errors': 0}
+
         self._connect()
+        self._writer = threading.Thread(target=self._run, name='serial-writer', daemon=True)
+        if self.connected:
+            self._writer.start()
 
     def _connect(self):
         try:
-            self.ser = serial.Serial(self.port, self.baud_rate, timeout=1)
+            self.ser = serial.Serial(self.port, self.baud_rate, timeout=1, write_timeout=1)
             time.sleep(2)
             self.connected = True
             print(f"✓ Serial connected on {self.port}")
         except Exception as e:
             print("✗ Serial failed, SIMULATION mode:", e)
 
+    def update(self, risk_score, risk_level, motion_count, relay_state):
+        """Publish the latest state; returns immediately"""
+        state = (int(risk_score), risk_level, int(motion_count), int(relay_state))
+        with self._cond:
+            self.stats['updates'] += 1
+            if state != self._state:
+                self._state = state
+                self._cond.notify()
+
     def send_risk_data(self, risk_score, risk_level, motion_count):
-        if self.connected:
-            msg = f"{int(risk_score)}\n"
-            self.ser.write(msg.encode())
-            self.ser.flush()
-            print(f"[Serial] Risk={int(risk_score)} Level={risk_level}")
+        with self._cond:
+            relay_state = self._state[3]
+        self.update(risk_score, risk_level, motion_count, relay_state)
 
     def send_relay_state(self, state):
-        if self.connected:
-            msg = f"RELAY:{state}\n"
-            self.ser.write(msg.encode())
-            self.ser.flush()
-            print(f"[Serial] Relay={state}")
+        with self._cond:
+            risk_score, risk_level, motion_count, _ = self._state
+        self.update(risk_score, risk_level, motion_count, state)
+
+    def _run(self):
+        """Writer thread: send on change, or resend at the heartbeat interval"""
+        sent = None
+        last_send = 0.0
+        failed = False
+        while True:
+            with self._cond:
+                # After a failed write only close() cuts the heartbeat wait
+                # short, so a dead port is retried once per heartbeat
+                self._cond.wait_for(
+                    lambda: self._closed or (not failed and self._state != sent),
+                    timeout=max(0.0, last_send + self.heartbeat - time.monotonic())
+                )
+                state, closed = self._state, self._closed
+
+            if state == sent and time.monotonic() - last_send < self.heartbeat:
+                if closed:
+                    break
+                continue
+
+            try:
+                self.ser.write(frame_message(*state))
+            except (serial.SerialException, OSError) as e:
+                self.stats['errors'] += 1
+                if not failed:
+                    print(f"✗ Serial write failed, retrying every {self.heartbeat}s: {e}")
+                failed = True
+            else:
+                if failed:
+                    print("✓ Serial write recovered")
+                failed = False
+                if sent is None or state[1] != sent[1] or state[3] != sent[3]:
+                    print(f"[Serial] Risk={state[0]} Level={state[1]} Relay={state[3]}")
+                self.stats['heartbeats' if state == sent else 'sent'] += 1
+                sent = state
+            last_send = time.monotonic()
+
+            if closed:
+                break
 
     def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._writer.is_alive():
+            self._writer.join(timeout=2.0)
         if self.ser:
             self.ser.close()
             print("Serial closed")
+
+
+class NullSerialSender:
+    """Serial sink for headless runs and benchmarks: keeps the last state, sends nothing"""
+
+    connected = False
+
+    def __init__(self):
+        self.state = (0, 'LOW', 0, 0)
+        self.stats = {'updates': 0, 'sent': 0, 'heartbeats': 0, 'errors': 0}
+
+    def update(self, risk_score, risk_level, motion_count, relay_state):
+        self.state = (int(risk_score), risk_level, int(motion_count), int(relay_state))
+        self.stats['updates'] += 1
+
+    def send_risk_data(self, risk_score, risk_level, motion_count):
+        self.update(risk_score, risk_level, motion_count, self.state[3])
+
+    def send_relay_state(self, state):
+        self.update(*self.state[:3], state)
+
+    def close(self):
+        pass
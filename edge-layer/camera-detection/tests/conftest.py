@@ -0,0 +1,12 @@
+"""
+Test setup: make the camera-detection modules importable the way main.py
+imports them
+"""
+
+import os
+import sys
+
+CAMERA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if CAMERA_DIR not in sys.path:
+    sys.path.insert(0, CAMERA_DIR)
@@ -0,0 +1,91 @@
+"""
+Tests for the constant-time RiskCalculator history and EWMA frequency
+"""
+
+import math
+
+import pytest
+
+from risk_calculator import RiskCalculator
+
+
+class RiskConfig:
+    RISK_LOW_THRESHOLD = 30
+    RISK_MEDIUM_THRESHOLD = 60
+    RISK_HISTORY_SIZE = 5
+    RISK_HISTORY_SECONDS = None
+    FREQUENCY_TAU_SECONDS = 2.0
+
+
+def motion(area=1000, count=2):
+    return {'motion_detected': True, 'motion_area': area, 'motion_count': count}
+
+
+QUIET = {'motion_detected': False, 'motion_area': 0, 'motion_count': 0}
+
+
+def test_event_rate_matches_closed_form_ewma():
+    calc = RiskCalculator(RiskConfig)
+    tau = RiskConfig.FREQUENCY_TAU_SECONDS
+    frames = [(0.0, True), (0.1, True), (0.5, False), (0.7, True), (2.0, False), (2.1, True)]
+
+    expected = 0.0
+    last = None
+    for t, moving in frames:
+        calc.calculate_risk(motion() if moving else QUIET, now=t)
+        if last is not None:
+            expected *= math.exp(-(t - last) / tau)
+        expected += 1.0 / tau if moving else 0.0
+        last = t
+
+    assert calc._event_rate == pytest.approx(expected)
+
+
+def test_event_rate_converges_to_events_per_second():
+    calc = RiskCalculator(RiskConfig)
+    for i in range(400):
+        calc.calculate_risk(motion(), now=i * 0.25)
+    # 4 events per second; the EWMA of a periodic impulse train sits within
+    # one impulse (1 / tau) of the true rate
+    assert calc._event_rate == pytest.approx(4.0, abs=1.0 / RiskConfig.FREQUENCY_TAU_SECONDS)
+
+
+def test_event_rate_decays_while_quiet():
+    calc = RiskCalculator(RiskConfig)
+    calc.calculate_risk(motion(), now=0.0)
+    peak = calc._event_rate
+    calc.calculate_risk(QUIET, now=RiskConfig.FREQUENCY_TAU_SECONDS)
+    assert calc._event_rate == pytest.approx(peak / math.e)
+
+
+def test_running_sums_follow_count_window():
+    calc = RiskCalculator(RiskConfig)
+    entries = [(100 * (i + 1), i + 1) for i in range(12)]
+    for i, (area, count) in enumerate(entries):
+        calc.calculate_risk(motion(area, count), now=float(i))
+        window = entries[max(0, i + 1 - RiskConfig.RISK_HISTORY_SIZE):i + 1]
+        stats = calc.get_statistics()
+        assert stats['total_events'] == len(window)
+        assert stats['avg_area'] == pytest.approx(sum(a for a, _ in window) / len(window))
+        assert stats['avg_count'] == pytest.approx(sum(c for _, c in window) / len(window))
+
+
+def test_time_window_expires_old_detections():
+    class TimedConfig(RiskConfig):
+        RISK_HISTORY_SIZE = 100
+        RISK_HISTORY_SECONDS = 3.0
+
+    calc = RiskCalculator(TimedConfig)
+    for t in range(5):
+        calc.calculate_risk(motion(area=100 * (t + 1)), now=float(t))
+    assert calc.get_statistics()['total_events'] == 4
+
+    # A quiet frame still expires entries, down to an exact reset
+    calc.calculate_risk(QUIET, now=100.0)
+    assert calc.get_statistics() == {'avg_area': 0, 'avg_count': 0, 'total_events': 0}
+    assert calc._area_sum == 0.0 and calc._count_sum == 0
+
+
+def test_quiet_frame_scores_low():
+    calc = RiskCalculator(RiskConfig)
+    assert calc.calculate_risk(QUIET, now=0.0) == (0.0, 'LOW')
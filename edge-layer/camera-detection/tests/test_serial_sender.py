@@ -0,0 +1,101 @@
+"""
+Tests for the framed serial messages and the background writer
+"""
+
+import threading
+import time
+from functools import reduce
+
+import pytest
+import serial
+
+from serial_sender import SerialSender, frame_message
+
+
+def parse_frame(line):
+    """Python version of the ESP32 parseFrame: (fields, checksum ok)"""
+    text = line.decode()
+    assert text.startswith('$') and text.endswith('\n')
+    body, checksum = text[1:-1].split('*')
+    expected = reduce(lambda acc, ch: acc ^ ch, body.encode(), 0)
+    return body.split(','), int(checksum, 16) == expected
+
+
+@pytest.mark.parametrize('state', [
+    (0, 'LOW', 0, 0),
+    (42.9, 'MEDIUM', 3, 1),
+    (100, 'HIGH', 17, 0),
+])
+def test_frame_message_checksum(state):
+    line = frame_message(*state)
+    fields, ok = parse_frame(line)
+    assert ok
+    assert fields == ['R', str(int(state[0])), state[1], str(state[2]), str(state[3])]
+
+
+def test_frame_message_known_value():
+    # XOR of "R,0,LOW,0,0" worked by hand
+    assert frame_message(0, 'LOW', 0, 0) == b'$R,0,LOW,0,0*36\n'
+
+
+def test_corrupted_frame_fails_checksum():
+    line = bytearray(frame_message(55, 'HIGH', 4, 1))
+    line[3] ^= 0x01
+    assert not parse_frame(bytes(line))[1]
+
+
+class FakeSerial:
+    """Serial port stand-in that records writes and can be made to fail"""
+
+    def __init__(self):
+        self.lines = []
+        self.fail = False
+
+    def write(self, data):
+        if self.fail:
+            raise serial.SerialException('device disconnected')
+        self.lines.append(data)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def sender(monkeypatch):
+    port = FakeSerial()
+    monkeypatch.setattr(serial, 'Serial', lambda *args, **kwargs: port)
+    monkeypatch.setattr(time, 'sleep', lambda seconds: None)
+    sender = SerialSender('FAKE', heartbeat=0.2)
+    yield sender, port
+    sender.close()
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        threading.Event().wait(0.01)
+    return predicate()
+
+
+def test_sends_changes_and_heartbeats(sender):
+    sender, port = sender
+    sender.update(70, 'HIGH', 2, 1)
+    assert wait_until(lambda: frame_message(70, 'HIGH', 2, 1) in port.lines)
+    assert wait_until(lambda: sender.stats['heartbeats'] >= 1)
+    assert all(parse_frame(line)[1] for line in port.lines)
+
+
+def test_failed_writes_back_off_to_the_heartbeat(sender):
+    sender, port = sender
+    assert wait_until(lambda: sender.stats['sent'] >= 1)
+    port.fail = True
+    for i in range(50):
+        sender.update(i, 'LOW', 0, 0)
+        threading.Event().wait(0.01)
+
+    # About half a second of failures at a 0.2s heartbeat: a handful of
+    # retries, not a busy loop
+    assert 1 <= sender.stats['errors'] <= 5
+
+    port.fail = False
+    assert wait_until(lambda: frame_message(49, 'LOW', 0, 0) in port.lines)
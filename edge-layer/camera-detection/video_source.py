@@ -0,0 +1,117 @@
+"""
+Video Sources
+Opens the detector's frame source: a live camera, a video file or a
+directory of images, all behind the cv2.VideoCapture read() interface
+"""
+
+import os
+import time
+
+import cv2
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ReplayCapture:
+    """
+    Replays a video file or an image directory
+
+    Frames carry a media timestamp (frame_index / fps) so time-based logic
+    can run on video time. With realtime=True reads are paced to the source
+    fps, like a camera; otherwise frames are returned as fast as they decode.
+    """
+
+    def __init__(self, source, fps=None, realtime=True):
+        """
+        Args:
+            source: Video file path or directory of images (sorted by name)
+            fps: Frame rate for image directories, or to override the file's
+            realtime: Pace reads to the source frame rate
+        """
+        self.source = source
+        self.realtime = realtime
+        self.frame_index = 0
+        self._start = None
+
+        if os.path.isdir(source):
+            self._cap = None
+            self._images = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            self.fps = fps or 15.0
+        else:
+            self._cap = cv2.VideoCapture(source)
+            self._images = None
+            self.fps = fps or self._cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    def isOpened(self):
+        if self._images is not None:
+            return bool(self._images)
+        return self._cap.isOpened()
+
+    @property
+    def frame_count(self):
+        if self._images is not None:
+            return len(self._images)
+        return int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    @property
+    def timestamp(self):
+        """Media time in seconds of the last frame read"""
+        return max(0, self.frame_index - 1) / self.fps
+
+    def read(self):
+        if self._images is not None:
+            frame = None
+            while frame is None and self.frame_index < len(self._images):
+                frame = cv2.imread(self._images[self.frame_index])
+                if frame is None:
+                    print(f"✗ Skipping unreadable image {self._images[self.frame_index]}")
+                    self._images.pop(self.frame_index)
+            ret = frame is not None
+        else:
+            ret, frame = self._cap.read()
+
+        if not ret:
+            return False, None
+
+        if self.realtime:
+            if self._start is None:
+                self._start = time.perf_counter()
+            delay = self._start + self.frame_index / self.fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        self.frame_index += 1
+        return True, frame
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv2.CAP_PROP_FRAME_COUNT:
+            return self.frame_count
+        return self._cap.get(prop) if self._cap is not None else 0
+
+    def release(self):
+        if self._cap is not None:
+            self._cap.release()
+
+
+def open_capture(config, realtime=True):
+    """
+    Open the configured frame source
+
+    Args:
+        config: Config with CAMERA_INDEX, VIDEO_SOURCE and REPLAY_FPS
+        realtime: Pace file/directory replay to the source frame rate
+
+    Returns:
+        cv2.VideoCapture for a live camera, ReplayCapture otherwise
+    """
+    source = getattr(config, 'VIDEO_SOURCE', None)
+    if source is None:
+        return cv2.VideoCapture(config.CAMERA_INDEX)
+    if not os.path.exists(source):
+        raise FileNotFoundError(f"Video source not found: {source}")
+    return ReplayCapture(source, fps=getattr(config, 'REPLAY_FPS', None), realtime=realtime)
@@ -8,10 +8,20 @@
 #define BUZZER_ON  HIGH
 #define BUZZER_OFF LOW
 
+#define RISK_MEDIUM 15
+#define RISK_HIGH   20
+
+// Framed link: "$R,<risk>,<level>,<count>,<relay>*<XX>"; the edge node
+// resends its state every second, so silence means the link is down
+#define LINK_TIMEOUT_MS 5000
+
 bool buzzerActive = false;
 bool highRisk = false;
 int relayState = 0;
 
+bool framedLink = false;
+unsigned long lastFrame = 0;
+
 unsigned long lastBeep = 0;
 bool buzzerState = false;
 
@@ -31,6 +41,33 @@ void buzzerControl() {
   }
 }
 
+// ================= SERIAL PROTOCOL =================
+void applyRisk(int risk) {
+  buzzerActive = (risk >= RISK_MEDIUM);
+  highRisk     = (risk >= RISK_HIGH);
+}
+
+// Parse a framed state message; returns false on a malformed frame or bad checksum
+bool parseFrame(const String &input) {
+  int star = input.lastIndexOf('*');
+  if (star < 0 || star + 3 != (int)input.length()) return false;
+
+  byte checksum = 0;
+  for (int i = 1; i < star; i++) checksum ^= input[i];
+  if (checksum != (byte)strtol(input.substring(star + 1).c_str(), NULL, 16)) return false;
+
+  String body = input.substring(1, star);      // R,<risk>,<level>,<count>,<relay>
+  int f1 = body.indexOf(',');
+  int f2 = body.indexOf(',', f1 + 1);
+  int f3 = body.indexOf(',', f2 + 1);
+  int f4 = body.indexOf(',', f3 + 1);
+  if (body[0] != 'R' || f1 < 0 || f2 < 0 || f3 < 0 || f4 < 0) return false;
+
+  applyRisk(body.substring(f1 + 1, f2).toInt());
+  relayState = body.substring(f4 + 1).toInt();
+  return true;
+}
+
 // ================= SETUP =================
 void setup() {
   Serial.begin(115200);
@@ -52,19 +89,34 @@ void loop() {
     String input = Serial.readStringUntil('\n');
     input.trim();
 
-    if (input.startsWith("RELAY:")) {
+    if (input.startsWith("$")) {
+      if (parseFrame(input)) {
+        framedLink = true;
+        lastFrame = millis();
+      } else {
+        Serial.println("BAD FRAME");
+      }
+    } else if (input.startsWith("RELAY:")) {
+      // Legacy two-line protocol
       relayState = input.substring(6).toInt();
-    } else {
+    } else if (input.length() > 0) {
       int risk = input.toInt();
-
-      buzzerActive = (risk >= 15);
-      highRisk     = (risk >= 20);
+      applyRisk(risk);
 
       Serial.print("Risk=");
       Serial.println(risk);
     }
   }
 
+  // Fail safe when the framed heartbeat stops
+  if (framedLink && millis() - lastFrame > LINK_TIMEOUT_MS) {
+    framedLink = false;
+    buzzerActive = false;
+    highRisk = false;
+    relayState = 0;
+    Serial.println("LINK LOST");
+  }
+
   digitalWrite(RELAY_PIN, relayState == 1 ? RELAY_ON : RELAY_OFF);
   buzzerControl();
 }